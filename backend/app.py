@@ -1,38 +1,48 @@
+import io
 import os
-from flask import Flask, jsonify, request
+import re
+import time
+import click
+import json
+import base64
+from flask import Flask, Blueprint, Response, jsonify, request, g, current_app, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 
 # Para el hashing de contraseñas
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.datastructures import MultiDict
 
 # Para la autenticación JWT
 from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity
 
 # Necesario para las consultas OR y AND
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, tuple_, exists, text, update, event, bindparam
+
+# Para la carga anticipada (eager loading) de relaciones
+from sqlalchemy.orm import selectinload, joinedload, contains_eager
+from sqlalchemy.schema import AddConstraint, CreateTable
+from sqlalchemy.exc import DataError, IntegrityError
+
+from cache import TTLCache, create_cache
+from events import create_broker
+from jobs import BackgroundJob
+from passwords import PasswordHasher, HasherBusy
+from serializers import (USER, BOARD, LIST, CARD, CARD_SUMMARY, COMMENT, ASSIGNMENT, CARD_POSITION, SAVED_FILTER,
+                         ARCHIVED_CARD, ARCHIVED_COMMENT, json_provider_class)
+from config import config_by_name, engine_options
 
 
 # Opcional: Cargar variables de entorno si aún tienes el archivo .env para SECRET_KEY
 # from dotenv import load_dotenv
 # load_dotenv() # Descomenta si usas .env para SECRET_KEY y JWT_SECRET_KEY
 
-app = Flask(__name__)
-CORS(app)
-
-# Configuración de la base de datos (SQLite)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Clave Secreta para Flask y JWT. ¡CAMBIA ESTO EN PRODUCCIÓN!
-# Puedes obtenerla de un .env o asignarla directamente aquí para desarrollo
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'tu_super_secreto_para_flask_y_jwt')
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'otra_super_secreta_para_jwt') # Clave específica para JWT
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1) # Los tokens expiran en 1 hora
+# Extensiones sin aplicación: se enlazan a cada app en create_app()
+jwt = JWTManager()
+db = SQLAlchemy()
 
-jwt = JWTManager(app)
-db = SQLAlchemy(app)
+# Todas las rutas y comandos CLI cuelgan de este blueprint
+api = Blueprint('api', __name__, cli_group=None)
 
 # =========================================================
 # Definición de Modelos de Base de Datos
@@ -43,7 +53,7 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False) # Los hashes scrypt ocupan ~160 caracteres
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relaciones
@@ -56,12 +66,12 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
-    # Métodos para manejo de contraseñas
+    # Métodos para manejo de contraseñas (el cálculo se hace en el pool de password_hasher())
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher().hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher().verify(self.password_hash, password)
 
 
 class Board(db.Model):
@@ -71,9 +81,20 @@ class Board(db.Model):
     description = db.Column(db.Text, nullable=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    # Relaciones
-    lists = db.relationship('List', backref='board', lazy=True, cascade="all, delete-orphan")
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Revisión agregada: sube con cualquier cambio del tablero, sus listas, tarjetas,
+    # comentarios o asignaciones (ver bump_board_revisions). Base de los ETag.
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    card_count = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Contador (ver apply_counter_deltas)
+    deleted_at = db.Column(db.DateTime, nullable=True) # Borrado pendiente de purga (ver soft_delete_board)
+
+    # Relaciones. El borrado en cascada lo hace la base (ON DELETE CASCADE): passive_deletes
+    # evita que el ORM cargue y borre una a una las filas hijas.
+    lists = db.relationship('List', backref='board', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        db.Index('ix_boards_owner_id', 'owner_id', 'id'), # get_user_boards: filtro por dueño, paginado por id
+    )
 
     def __repr__(self):
         return f'<Board {self.title}>'
@@ -82,12 +103,19 @@ class List(db.Model):
     __tablename__ = 'lists'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
-    board_id = db.Column(db.Integer, db.ForeignKey('boards.id'), nullable=False)
+    board_id = db.Column(db.Integer, db.ForeignKey('boards.id', ondelete='CASCADE'), nullable=False)
     order = db.Column(db.Integer, nullable=False, default=0) # Para el orden de las listas
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    card_count = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Contador (ver apply_counter_deltas)
 
     # Relaciones
-    cards = db.relationship('Card', backref='list', lazy=True, cascade="all, delete-orphan")
+    cards = db.relationship('Card', backref='list', lazy=True, cascade="all, delete-orphan", passive_deletes=True,
+                            order_by='[Card.order, Card.id]')
+
+    __table_args__ = (
+        db.Index('ix_lists_board_order', 'board_id', 'order', 'id'), # get_board_lists: filtro por tablero, orden (order, id)
+    )
 
     def __repr__(self):
         return f'<List {self.title}>'
@@ -97,16 +125,24 @@ class Card(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    list_id = db.Column(db.Integer, db.ForeignKey('lists.id'), nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), nullable=False)
     creator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     due_date = db.Column(db.DateTime, nullable=True)
     order = db.Column(db.Integer, nullable=False, default=0) # Para el orden de las tarjetas
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Contadores (ver apply_counter_deltas)
+    assignment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relaciones
-    comments = db.relationship('Comment', backref='card', lazy=True, cascade="all, delete-orphan")
-    assignments = db.relationship('CardAssignment', backref='card', lazy=True, cascade="all, delete-orphan")
+    comments = db.relationship('Comment', backref='card', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    assignments = db.relationship('CardAssignment', backref='card', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        db.Index('ix_cards_list_order', 'list_id', 'order', 'id'), # get_list_cards: filtro por lista, orden (order, id)
+        db.Index('ix_cards_creator_id', 'creator_id'), # /cards/filter?creator_id=
+        db.Index('ix_cards_due_date', 'due_date'), # /cards/filter por rango de vencimiento
+    )
 
     def __repr__(self):
         return f'<Card {self.title}>'
@@ -115,9 +151,14 @@ class Comment(db.Model):
     __tablename__ = 'comments'
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    card_id = db.Column(db.Integer, db.ForeignKey('cards.id'), nullable=False)
+    card_id = db.Column(db.Integer, db.ForeignKey('cards.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_comments_card_created', 'card_id', 'created_at', 'id'), # get_card_comments: orden (created_at, id)
+    )
 
     def __repr__(self):
         return f'<Comment {self.id}>'
@@ -125,21 +166,1521 @@ class Comment(db.Model):
 class CardAssignment(db.Model):
     __tablename__ = 'card_assignments'
     id = db.Column(db.Integer, primary_key=True) # Un ID primario para esta tabla de unión
-    card_id = db.Column(db.Integer, db.ForeignKey('cards.id'), nullable=False)
+    card_id = db.Column(db.Integer, db.ForeignKey('cards.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     assigned_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    __table_args__ = (db.UniqueConstraint('card_id', 'user_id', name='_card_user_uc'),) # Asegura que una tarjeta no se asigne dos veces al mismo usuario
+    __table_args__ = (
+        db.UniqueConstraint('card_id', 'user_id', name='_card_user_uc'), # Asegura que una tarjeta no se asigne dos veces al mismo usuario
+        db.Index('ix_card_assignments_user_card', 'user_id', 'card_id'), # Acceso por asignación: "tarjetas asignadas a X"
+    )
 
     def __repr__(self):
         return f'<CardAssignment Card:{self.card_id} User:{self.user_id}>'
 
+class ChangeLog(db.Model):
+    # Una fila por entidad cambiada en cada revisión de un tablero (ver record_board_changes)
+    __tablename__ = 'change_log'
+    id = db.Column(db.Integer, primary_key=True)
+    board_id = db.Column(db.Integer, nullable=False) # Sin clave foránea: sobrevive al borrado del tablero hasta la purga
+    revision = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(20), nullable=False) # 'board', 'list', 'card', 'comment' o 'assignment'
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False) # 'upsert' o 'delete'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_change_log_board_revision', 'board_id', 'revision', 'id'), # /boards/<id>/changes?since=
+    )
+
+    def __repr__(self):
+        return f'<ChangeLog Board:{self.board_id} r{self.revision} {self.op} {self.entity}:{self.entity_id}>'
+
+class UserCardIndex(db.Model):
+    # Una fila por cada (usuario, tarjeta que puede ver): dueño del tablero o asignado.
+    # Copia board_id y due_date para que /me/cards y /me/due se resuelvan por índice (ver refresh_user_card_index)
+    __tablename__ = 'user_card_index'
+    user_id = db.Column(db.Integer, primary_key=True)
+    card_id = db.Column(db.Integer, primary_key=True) # Sin claves foráneas: se mantiene al cambiar las tarjetas
+    board_id = db.Column(db.Integer, nullable=False)
+    due_date = db.Column(db.DateTime, nullable=True)
+    assigned = db.Column(db.Boolean, nullable=False, default=False) # La tarjeta está asignada a user_id
+
+    __table_args__ = (
+        db.Index('ix_user_card_index_assigned', 'user_id', 'assigned', 'board_id', 'card_id'), # /me/cards
+        db.Index('ix_user_card_index_due', 'user_id', 'due_date', 'card_id'), # /me/due
+        db.Index('ix_user_card_index_card', 'card_id'), # refresh_user_card_index
+    )
+
+    def __repr__(self):
+        return f'<UserCardIndex User:{self.user_id} Card:{self.card_id}>'
+
+class SavedFilter(db.Model):
+    # Parámetros de /cards/filter guardados con nombre; sus tarjetas se mantienen en saved_filter_results
+    __tablename__ = 'saved_filters'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    name = db.Column(db.String(120), nullable=False)
+    params = db.Column(db.JSON, nullable=False) # Ver CardFilter.to_args
+    card_count = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Filas en saved_filter_results
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'name', name='_user_filter_name_uc'),
+        db.Index('ix_saved_filters_user_id', 'user_id', 'id'), # get_saved_filters: filtro por usuario, paginado por id
+    )
+
+    def __repr__(self):
+        return f'<SavedFilter {self.name}>'
+
+class SavedFilterResult(db.Model):
+    # Tarjetas que cumplen cada filtro guardado (ver refresh_saved_filters)
+    __tablename__ = 'saved_filter_results'
+    filter_id = db.Column(db.Integer, db.ForeignKey('saved_filters.id', ondelete='CASCADE'), primary_key=True)
+    card_id = db.Column(db.Integer, primary_key=True) # Sin clave foránea: se limpia al reevaluar tras borrar la tarjeta
+
+    __table_args__ = (
+        db.Index('ix_saved_filter_results_card', 'card_id'), # refresh_saved_filters: filtros que contienen una tarjeta
+    )
+
+    def __repr__(self):
+        return f'<SavedFilterResult Filter:{self.filter_id} Card:{self.card_id}>'
+
+# Archivo: tarjetas retiradas con sus comentarios y asignaciones (ver archive_cards).
+# Fuera de las tablas calientes, no cuentan en listados, filtros, índices ni contadores.
+class ArchivedCard(db.Model):
+    __tablename__ = 'archived_cards'
+    id = db.Column(db.Integer, primary_key=True)
+    card_id = db.Column(db.Integer, nullable=False) # Id que tenía en cards (SQLite puede reutilizarlo)
+    board_id = db.Column(db.Integer, db.ForeignKey('boards.id', ondelete='CASCADE'), nullable=False)
+    list_id = db.Column(db.Integer, nullable=True) # Lista de origen; sin clave foránea: puede borrarse después
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    due_date = db.Column(db.DateTime, nullable=True)
+    order = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    assignment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    archived_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True) # None: archivado por 'cards-archive'
+
+    comments = db.relationship('ArchivedComment', lazy=True, cascade="all, delete-orphan", passive_deletes=True,
+                               order_by='ArchivedComment.created_at')
+    assignments = db.relationship('ArchivedCardAssignment', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        db.Index('ix_archived_cards_board', 'board_id', 'id'), # get_archived_cards: por tablero, de más a menos reciente
+        {'sqlite_autoincrement': True}, # Ids crecientes sin reutilizar (ver archive_cards)
+    )
+
+    def __repr__(self):
+        return f'<ArchivedCard {self.title}>'
+
+class ArchivedComment(db.Model):
+    __tablename__ = 'archived_comments'
+    id = db.Column(db.Integer, primary_key=True)
+    archived_card_id = db.Column(db.Integer, db.ForeignKey('archived_cards.id', ondelete='CASCADE'), nullable=False)
+    comment_id = db.Column(db.Integer, nullable=False) # Id que tenía en comments
+    content = db.Column(db.Text, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_archived_comments_card', 'archived_card_id', 'created_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ArchivedComment {self.id}>'
+
+class ArchivedCardAssignment(db.Model):
+    __tablename__ = 'archived_card_assignments'
+    id = db.Column(db.Integer, primary_key=True)
+    archived_card_id = db.Column(db.Integer, db.ForeignKey('archived_cards.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    assigned_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_archived_card_assignments_card', 'archived_card_id'),
+    )
+
+    def __repr__(self):
+        return f'<ArchivedCardAssignment ArchivedCard:{self.archived_card_id} User:{self.user_id}>'
+
+
+# =========================================================
+# Migraciones de esquema versionadas
+# =========================================================
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaVersion {self.version}>'
+
+# Lista de (versión, descripción, función). Cada migración debe ser idempotente:
+# en una base nueva db.create_all() ya crea el esquema actual y las migraciones
+# solo completan lo que create_all no sabe hacer sobre tablas existentes.
+MIGRATIONS = []
+
+def migration(version, description):
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return decorator
+
+def create_model_index(table_name, index_name):
+    # Crea un índice declarado en los modelos si todavía no existe en la base
+    table = db.metadata.tables[table_name]
+    index = next(ix for ix in table.indexes if ix.name == index_name)
+    index.create(db.session.connection(), checkfirst=True)
+
+def add_model_column(table_name, column_name):
+    # Añade a una tabla existente una columna declarada en los modelos si todavía no existe
+    connection = db.session.connection()
+    if column_name in {column['name'] for column in db.inspect(connection).get_columns(table_name)}:
+        return
+    column = db.metadata.tables[table_name].c[column_name]
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(connection.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    connection.execute(text(ddl))
+
+@migration(1, "Índices para claves foráneas y columnas de orden")
+def migrate_hot_indexes():
+    create_model_index('boards', 'ix_boards_owner_id')
+    create_model_index('lists', 'ix_lists_board_order')
+    create_model_index('cards', 'ix_cards_list_order')
+    create_model_index('cards', 'ix_cards_creator_id')
+    create_model_index('cards', 'ix_cards_due_date')
+    create_model_index('comments', 'ix_comments_card_created')
+    create_model_index('card_assignments', 'ix_card_assignments_user_card')
+
+def upgrade_database():
+    """Crea las tablas que falten y aplica en orden las migraciones pendientes."""
+    db.create_all()
+    current_version = db.session.query(db.func.max(SchemaVersion.version)).scalar() or 0
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version <= current_version:
+            continue
+        fn()
+        db.session.add(SchemaVersion(version=version, description=description))
+        db.session.commit() # Cada migración se aplica y registra en su propia transacción
+        current_app.logger.info('Migración %s aplicada: %s', version, description)
+
+@api.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Aplica las migraciones pendientes: flask --app app db-upgrade"""
+    upgrade_database()
+
+
+# =========================================================
+# Carga por lotes de relaciones (evita consultas N+1)
+# =========================================================
+
+# Opciones de carga reutilizables: cada relación se resuelve con una consulta
+# extra por nivel (selectin) o dentro de la misma consulta (joined), nunca con
+# una consulta por fila.
+CARD_ASSIGNEES = selectinload(Card.assignments).joinedload(CardAssignment.user)
+COMMENT_AUTHOR = joinedload(Comment.commenter)
+ASSIGNMENT_USER = joinedload(CardAssignment.user)
+
+def serialize_assigned_users(card):
+    # Requiere que card.assignments y assignment.user estén cargados (ver CARD_ASSIGNEES)
+    return [{
+        "user_id": assignment.user.id,
+        "username": assignment.user.username,
+        "email": assignment.user.email
+    } for assignment in card.assignments]
+
+def load_assigned_users(card_ids):
+    # Igual que serialize_assigned_users pero sin entidades: {card_id: [usuarios]} en una consulta
+    assigned = {card_id: [] for card_id in card_ids}
+    if card_ids:
+        rows = db.session.query(CardAssignment.card_id, User.id, User.username, User.email) \
+            .join(User, CardAssignment.user_id == User.id) \
+            .filter(CardAssignment.card_id.in_(card_ids)) \
+            .order_by(CardAssignment.id).all()
+        for card_id, user_id, username, email in rows:
+            assigned[card_id].append({"user_id": user_id, "username": username, "email": email})
+    return assigned
+
+
+# =========================================================
+# Paginación por cursor (keyset)
+# =========================================================
+
+def encode_cursor(values):
+    # El cursor es opaco para el cliente: JSON de la clave de orden en base64 url-safe
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor, key_columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(key_columns):
+        return None
+    try:
+        return [datetime.fromisoformat(v) if isinstance(col.type, db.DateTime) and v is not None else v
+                for v, col in zip(values, key_columns)]
+    except (ValueError, TypeError):
+        return None
+
+def paginate_keyset(query, key_columns, key_of=None, descending=False):
+    """Aplica ?limit= y ?cursor= a una consulta ordenada por key_columns.
+
+    key_columns debe identificar cada fila de forma única (p. ej. (order, id)).
+    key_of extrae la clave de una fila; por defecto lee los atributos de key_columns.
+    descending invierte el orden de todas las columnas de la clave.
+    Devuelve (filas, next_cursor, error_response).
+    """
+    limit = request.args.get('limit', current_app.config['DEFAULT_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor, key_columns)
+        if values is None:
+            return None, None, jsonify({"msg": "Invalid cursor"})
+        if descending:
+            query = query.filter(tuple_(*key_columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*key_columns) > tuple_(*values))
+
+    # Pedimos una fila de más para saber si hay página siguiente sin hacer un COUNT
+    order_by = [column.desc() for column in key_columns] if descending else key_columns
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if key_of is None:
+            key_of = lambda row: [getattr(row, col.key) for col in key_columns]
+        next_cursor = encode_cursor(key_of(rows[-1]))
+
+    return rows, next_cursor, None
+
+
+# =========================================================
+# Vista resumida de tarjetas (?view=summary)
+# =========================================================
+
+# La vista 'summary' selecciona columnas sueltas en lugar de entidades Card: no se
+# lee ni se hidrata la descripción completa, solo su longitud y un extracto.
+CARD_VIEWS = ('full', 'summary')
+
+def parse_card_view():
+    """Lee ?view= y ?fields= de un listado de tarjetas. Devuelve (vista, campos, error_msg)."""
+    view = request.args.get('view', 'full')
+    if view not in CARD_VIEWS:
+        return None, None, f"Invalid view. Use one of: {', '.join(CARD_VIEWS)}"
+    schema = CARD_SUMMARY if view == 'summary' else CARD
+    fields, error_msg = schema.parse_fields(request.args.get('fields'))
+    return view, fields, error_msg
+
+def card_summary_columns(fields=None):
+    # Columnas de CARD_SUMMARY, limitadas a ?fields=; id y order siempre (clave de paginación)
+    preview_length = current_app.config['CARD_SUMMARY_PREVIEW_LENGTH']
+    columns = {
+        'id': Card.id,
+        'title': Card.title,
+        'list_id': Card.list_id,
+        'creator_id': Card.creator_id,
+        'due_date': Card.due_date,
+        'order': Card.order,
+        'comment_count': Card.comment_count,
+        'assignment_count': Card.assignment_count,
+        'description_length': db.func.length(Card.description).label('description_length'),
+        'description_preview': db.func.substr(Card.description, 1, preview_length).label('description_preview'),
+    }
+    return [column for name, column in columns.items() if name in ('id', 'order') or fields is None or name in fields]
+
+def dump_card_summaries(rows, fields=None, **computed):
+    # computed: funciones fila -> valor para campos extra (p. ej. board_id en /cards/filter)
+    with_assignees = CARD_SUMMARY.wants('assigned_users', fields)
+    assigned = load_assigned_users([row.id for row in rows]) if with_assignees else None
+    items = []
+    for row in rows:
+        extra = {name: value_of(row) for name, value_of in computed.items()}
+        if with_assignees:
+            extra['assigned_users'] = assigned[row.id]
+        items.append(CARD_SUMMARY.dump(row, fields, **extra))
+    return items
+
+
+# =========================================================
+# Motor de filtros de tarjetas
+# =========================================================
+
+# Sin vencimiento se ordena después de cualquier fecha (el cursor no admite NULL)
+NO_DUE_DATE = datetime(9999, 12, 31)
+
+def card_sort_keys(sort):
+    # Clave de orden única de cada criterio de ?sort=; el prefijo '-' invierte el orden
+    if sort == 'position':
+        return (List.order, Card.order, Card.id)
+    if sort == 'due_date':
+        return (db.func.coalesce(Card.due_date, NO_DUE_DATE), Card.id)
+    return (getattr(Card, sort), Card.id)
+
+def paginate_sorted(query, sort_keys, descending=False):
+    # paginate_keyset añadiendo las claves de orden como últimas columnas de cada fila
+    keys = [key.label(f'sort_key_{position}') for position, key in enumerate(sort_keys)]
+    return paginate_keyset(
+        query.add_columns(*keys),
+        sort_keys,
+        key_of=lambda row: list(row[-len(keys):]),
+        descending=descending
+    )
+
+def card_visible_to(user_id):
+    # Semi-joins: la tarjeta está en un tablero suyo O le está asignada. IN (subconsulta sin
+    # correlación) no multiplica filas, así que no hace falta DISTINCT, y cada rama puede
+    # recorrerse por índice (ix_boards_owner_id + ix_lists_board_order, ix_card_assignments_user_card).
+    # Los tableros borrados (pendientes de purga) no dan acceso por ninguna de las dos ramas.
+    owned_lists = db.select(List.id).join(Board, List.board_id == Board.id) \
+        .where(Board.owner_id == user_id, Board.deleted_at.is_(None)).correlate(None)
+    assigned_cards = db.select(CardAssignment.card_id) \
+        .join(Card, CardAssignment.card_id == Card.id).join(List, Card.list_id == List.id) \
+        .join(Board, List.board_id == Board.id) \
+        .where(CardAssignment.user_id == user_id, Board.deleted_at.is_(None)).correlate(None)
+    return or_(Card.list_id.in_(owned_lists), Card.id.in_(assigned_cards))
+
+class CardFilter:
+    """Criterios de búsqueda de tarjetas convertidos en una consulta planificada.
+
+    La consulta parte de Card con un JOIN a List (uno a uno, sin duplicados) y aplica
+    cada criterio como condición sobre columnas indexadas o como semi-join
+    (IN con subconsulta), primero los más selectivos. El permiso de acceso se omite cuando otro criterio ya lo
+    implica (tablero o lista propios, o tarjetas asignadas al propio usuario).
+    """
+
+    SORTS = ('position', 'due_date', 'created_at', 'updated_at')
+
+    def __init__(self, assignee_id=None, creator_id=None, board_id=None, list_id=None,
+                 due_date_start=None, due_date_end=None, title_contains=None, sort='position'):
+        self.assignee_id = assignee_id
+        self.creator_id = creator_id
+        self.board_id = board_id
+        self.list_id = list_id
+        self.due_date_start = due_date_start
+        self.due_date_end = due_date_end
+        self.title_contains = title_contains
+        self.sort = sort
+
+    @classmethod
+    def from_args(cls, args):
+        """Crea el filtro a partir de los parámetros de /cards/filter. Devuelve (filtro, error_msg)."""
+        due_dates = {}
+        for name in ('due_date_start', 'due_date_end'):
+            value = args.get(name)
+            try:
+                due_dates[name] = datetime.fromisoformat(value) if value else None
+            except ValueError:
+                return None, f"Invalid {name} format. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)"
+
+        sort = args.get('sort', 'position')
+        if sort.lstrip('-') not in cls.SORTS or sort == '-position':
+            return None, f"Invalid sort. Use one of: {', '.join(cls.SORTS)} (prefix '-' for descending, except position)"
+
+        return cls(
+            assignee_id=args.get('user_id', type=int), # Tarjetas asignadas a este user_id
+            creator_id=args.get('creator_id', type=int), # Tarjetas creadas por este user_id
+            board_id=args.get('board_id', type=int),
+            list_id=args.get('list_id', type=int),
+            title_contains=args.get('title_contains') or None,
+            sort=sort,
+            **due_dates
+        ), None
+
+    def to_args(self):
+        """Parámetros de /cards/filter equivalentes (forma en que se guarda un filtro)."""
+        args = {
+            'user_id': self.assignee_id,
+            'creator_id': self.creator_id,
+            'board_id': self.board_id,
+            'list_id': self.list_id,
+            'due_date_start': self.due_date_start.isoformat() if self.due_date_start else None,
+            'due_date_end': self.due_date_end.isoformat() if self.due_date_end else None,
+            'title_contains': self.title_contains,
+            'sort': self.sort,
+        }
+        return {name: value for name, value in args.items() if value is not None}
+
+    @property
+    def sort_keys(self):
+        return card_sort_keys(self.sort.lstrip('-'))
+
+    @property
+    def descending(self):
+        return self.sort.startswith('-')
+
+    def conditions(self, user_id, card_ids=None):
+        # De más a menos selectivo: tarjetas concretas, lista, tablero, asignado, creador, título y rango de fechas
+        conditions = []
+        if card_ids is not None:
+            conditions.append(Card.id.in_(card_ids))
+        if self.list_id:
+            conditions.append(Card.list_id == self.list_id) # ix_cards_list_order
+        if self.board_id:
+            conditions.append(List.board_id == self.board_id) # ix_lists_board_order
+        if self.assignee_id:
+            conditions.append(Card.id.in_( # ix_card_assignments_user_card
+                db.select(CardAssignment.card_id).where(CardAssignment.user_id == self.assignee_id)
+            ))
+        if self.creator_id:
+            conditions.append(Card.creator_id == self.creator_id) # ix_cards_creator_id
+        if self.title_contains:
+            title_match = build_search_query(self.title_contains, columns=['title']) if search_enabled() else None
+            if title_match:
+                conditions.append(Card.id.in_(search_ids('card', title_match, card_ids))) # Prefijo de palabra vía FTS5
+            else:
+                conditions.append(Card.title.ilike(f'%{self.title_contains}%'))
+        if self.due_date_start:
+            conditions.append(Card.due_date >= self.due_date_start) # ix_cards_due_date
+        if self.due_date_end:
+            conditions.append(Card.due_date <= self.due_date_end)
+        if not self.access_implied(user_id):
+            conditions.append(card_visible_to(user_id))
+        elif self.assignee_id == user_id:
+            # "Asignadas a mí" no comprueba el tablero: descarta los borrados pendientes de purga (búsqueda por PK)
+            conditions.append(db.select(Board.id).where(Board.id == List.board_id, Board.deleted_at.is_(None)).exists())
+        return conditions
+
+    def access_implied(self, user_id):
+        # Con una lista o tablero propios, o "asignadas a mí", todas las tarjetas candidatas
+        # son visibles y el EXISTS de permisos sobra (una consulta por clave primaria)
+        if self.assignee_id == user_id:
+            return True
+        if self.list_id:
+            owner_id = db.session.query(Board.owner_id).join(List, List.board_id == Board.id) \
+                .filter(List.id == self.list_id, Board.deleted_at.is_(None)).scalar()
+            return owner_id == user_id
+        if self.board_id:
+            return db.session.query(Board.owner_id) \
+                .filter(Board.id == self.board_id, Board.deleted_at.is_(None)).scalar() == user_id
+        return False
+
+    def select(self, *entities, options=()):
+        # Card JOIN List sin condiciones: base de query() y de las lecturas de filtros guardados
+        return db.session.query(*entities).select_from(Card) \
+            .join(List, Card.list_id == List.id) \
+            .options(*options)
+
+    def query(self, user_id, *entities, options=(), card_ids=None):
+        """Consulta de las tarjetas visibles para user_id que cumplen el filtro, sin ordenar.
+
+        card_ids limita la evaluación a esas tarjetas (reevaluación de filtros guardados).
+        """
+        return self.select(*entities, options=options).filter(*self.conditions(user_id, card_ids))
+
+    def paginate(self, query):
+        """Página de filas (entidades de query..., claves de orden) según ?limit= y ?cursor=."""
+        return paginate_sorted(query, self.sort_keys, self.descending)
+
+# =========================================================
+# Índice de tarjetas por usuario (/me/cards, /me/due)
+# =========================================================
+
+# user_card_index desnormaliza quién ve cada tarjeta, con su tablero y vencimiento.
+# "Asignadas a mí" y "vencen pronto" leen un rango de índice por usuario en lugar
+# de recorrer todos sus tableros. record_board_changes reescribe las filas de las
+# tarjetas cambiadas (incluidas asignaciones y movimientos entre tableros).
+
+def user_card_index_rows(card_ids=None):
+    # (user_id, card_id, board_id, due_date, assigned) de las tarjetas indicadas o de todas
+    owners = db.select(
+        Board.owner_id, Card.id, List.board_id, Card.due_date,
+        exists().where(CardAssignment.card_id == Card.id, CardAssignment.user_id == Board.owner_id)
+    ).select_from(Card).join(List, Card.list_id == List.id).join(Board, List.board_id == Board.id) \
+        .where(Board.deleted_at.is_(None))
+    assignees = db.select(
+        CardAssignment.user_id, Card.id, List.board_id, Card.due_date, db.literal(True)
+    ).select_from(CardAssignment).join(Card, CardAssignment.card_id == Card.id).join(List, Card.list_id == List.id) \
+        .join(Board, List.board_id == Board.id).where(Board.deleted_at.is_(None))
+    if card_ids is not None:
+        owners = owners.where(Card.id.in_(card_ids))
+        assignees = assignees.where(Card.id.in_(card_ids))
+    return owners.union(assignees) # El dueño asignado a su propia tarjeta sale una vez
+
+def refresh_user_card_index(card_ids=None):
+    """Reescribe las filas de user_card_index de estas tarjetas (o de todas con None)."""
+    if card_ids is not None and not card_ids:
+        return
+    index = UserCardIndex.__table__
+    delete = index.delete()
+    if card_ids is not None:
+        delete = delete.where(index.c.card_id.in_(card_ids))
+    db.session.execute(delete)
+    db.session.execute(index.insert().from_select(
+        ['user_id', 'card_id', 'board_id', 'due_date', 'assigned'], user_card_index_rows(card_ids)
+    ))
+
+@migration(5, "Índice de tarjetas por usuario para /me/cards y /me/due")
+def migrate_user_card_index():
+    add_model_column('boards', 'deleted_at') # user_card_index_rows ya filtra los tableros borrados (migración 8)
+    refresh_user_card_index()
+
+@api.cli.command('user-index-rebuild')
+def user_index_rebuild_command():
+    """Reconstruye el índice de tarjetas por usuario: flask --app app user-index-rebuild"""
+    refresh_user_card_index()
+    db.session.commit()
+
+
+# =========================================================
+# Filtros guardados (resultados materializados)
+# =========================================================
+
+# Cada filtro guardado conserva en saved_filter_results las tarjetas que lo cumplen
+# y en card_count cuántas son. record_board_changes reevalúa, para las tarjetas que
+# cambian, solo los filtros que pueden verse afectados: los de quienes ven esas
+# tarjetas (dueño del tablero y asignados) y los que ya las contienen.
+
+def saved_card_filter(saved_filter_params):
+    card_filter, _ = CardFilter.from_args(MultiDict(saved_filter_params)) # Validado al guardar
+    return card_filter
+
+def materialize_saved_filter(saved_filter):
+    """Recalcula desde cero las tarjetas y el contador de un filtro guardado (ya con id)."""
+    results = SavedFilterResult.__table__
+    matching = saved_card_filter(saved_filter.params).query(saved_filter.user_id, db.literal(saved_filter.id), Card.id)
+    db.session.execute(results.delete().where(results.c.filter_id == saved_filter.id))
+    db.session.execute(results.insert().from_select(['filter_id', 'card_id'], matching.statement))
+    saved_filter.card_count = db.session.execute(
+        db.select(db.func.count()).select_from(results).where(results.c.filter_id == saved_filter.id)
+    ).scalar()
+
+def refresh_saved_filters(card_ids):
+    """Actualiza de forma incremental los filtros guardados afectados por cambios en estas tarjetas."""
+    if not card_ids:
+        return
+    results = SavedFilterResult.__table__
+    viewers = db.select(Board.owner_id).join(List, List.board_id == Board.id) \
+        .join(Card, Card.list_id == List.id).where(Card.id.in_(card_ids)) \
+        .union(db.select(CardAssignment.user_id).where(CardAssignment.card_id.in_(card_ids)))
+    containing = db.select(results.c.filter_id).where(results.c.card_id.in_(card_ids))
+    affected = db.session.execute(
+        db.select(SavedFilter.id, SavedFilter.user_id, SavedFilter.params)
+        .where(or_(SavedFilter.user_id.in_(viewers), SavedFilter.id.in_(containing)))
+    ).all()
+
+    for filter_id, user_id, params in affected:
+        matching = {card_id for (card_id,) in
+                    saved_card_filter(params).query(user_id, Card.id, card_ids=card_ids).all()}
+        current = set(db.session.execute(
+            db.select(results.c.card_id).where(results.c.filter_id == filter_id, results.c.card_id.in_(card_ids))
+        ).scalars())
+        added, removed = matching - current, current - matching
+        if added:
+            db.session.execute(results.insert(), [{"filter_id": filter_id, "card_id": card_id} for card_id in added])
+        if removed:
+            db.session.execute(results.delete().where(results.c.filter_id == filter_id, results.c.card_id.in_(removed)))
+        if added or removed:
+            filters = SavedFilter.__table__
+            db.session.execute(filters.update().where(filters.c.id == filter_id)
+                               .values(card_count=filters.c.card_count + len(added) - len(removed)))
+
+@api.cli.command('saved-filters-refresh')
+def saved_filters_refresh_command():
+    """Recalcula todos los filtros guardados desde cero: flask --app app saved-filters-refresh"""
+    for saved_filter in SavedFilter.query.all():
+        materialize_saved_filter(saved_filter)
+    db.session.commit()
+
+
+# =========================================================
+# Contadores precalculados
+# =========================================================
+
+# Tarjetas por lista y por tablero, comentarios y asignaciones por tarjeta. Las columnas contador se ajustan en el mismo flush que el cambio que las mueve
+# (log_board_changes), con un UPDATE relativo (col = col + n): dos peticiones
+# simultáneas no se pisan. Las escrituras que no pasan por el ORM deben llamar a
+# apply_counter_deltas. 'counters-repair' los recalcula desde cero e informa de la deriva.
+
+class CounterDeltas:
+    """Acumula {(modelo, columna): {id: delta}} para aplicarlos con apply_counter_deltas."""
+
+    def __init__(self):
+        self.deltas = {}
+
+    def add(self, model, column, object_id, step):
+        if object_id is None or not step:
+            return
+        by_id = self.deltas.setdefault((model, column), {})
+        by_id[object_id] = by_id.get(object_id, 0) + step
+
+def apply_counter_deltas(deltas):
+    # Un UPDATE ejecutado en lote por columna; updated_at no cambia (un contador no es una edición)
+    for (model, column), by_id in deltas.deltas.items():
+        rows = [{"counter_id": object_id, "delta": delta} for object_id, delta in by_id.items() if delta]
+        if not rows:
+            continue
+        table = model.__table__
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('counter_id'))
+            .values({column: table.c[column] + bindparam('delta'), 'updated_at': table.c.updated_at}),
+            rows
+        )
+
+# (modelo, columna, valor real como subconsulta correlacionada con el modelo)
+COUNTER_SOURCES = (
+    (List, 'card_count', lambda: db.select(db.func.count(Card.id)).where(Card.list_id == List.id)),
+    (Board, 'card_count', lambda: db.select(db.func.count(Card.id)).join(List, Card.list_id == List.id)
+        .where(List.board_id == Board.id)),
+    (Card, 'comment_count', lambda: db.select(db.func.count(Comment.id)).where(Comment.card_id == Card.id)),
+    (Card, 'assignment_count', lambda: db.select(db.func.count(CardAssignment.id)).where(CardAssignment.card_id == Card.id)),
+)
+
+def repair_counters(dry_run=False):
+    """Recalcula los contadores desde cero. Devuelve {'tabla.columna': filas que no cuadraban}."""
+    drift = {}
+    for model, column, source in COUNTER_SOURCES:
+        table = model.__table__
+        actual = source().scalar_subquery()
+        mismatch = table.c[column] != actual
+        drift[f'{table.name}.{column}'] = db.session.execute(
+            db.select(db.func.count()).select_from(table).where(mismatch)
+        ).scalar()
+        if drift[f'{table.name}.{column}'] and not dry_run:
+            db.session.execute(table.update().where(mismatch).values({column: actual, 'updated_at': table.c.updated_at}))
+    return drift
+
+def overdue_counts(user_id, board_ids):
+    # {board_id: tarjetas vencidas} de tableros propios, por el índice (user_id, due_date) de user_card_index
+    if not board_ids:
+        return {}
+    return dict(
+        db.session.query(UserCardIndex.board_id, db.func.count())
+        .filter(UserCardIndex.user_id == user_id, UserCardIndex.due_date < datetime.utcnow(),
+                UserCardIndex.board_id.in_(board_ids))
+        .group_by(UserCardIndex.board_id).all()
+    )
+
+@migration(6, "Contadores de tarjetas, comentarios y asignaciones")
+def migrate_counters():
+    for table, column in (('boards', 'card_count'), ('lists', 'card_count'),
+                          ('cards', 'comment_count'), ('cards', 'assignment_count')):
+        add_model_column(table, column)
+    repair_counters()
+
+@api.cli.command('counters-repair')
+@click.option('--dry-run', is_flag=True, help='Solo informa de la deriva, sin corregirla.')
+def counters_repair_command(dry_run):
+    """Recalcula los contadores e informa de la deriva: flask --app app counters-repair [--dry-run]"""
+    for name, rows in repair_counters(dry_run).items():
+        if rows:
+            current_app.logger.warning('Contador %s: %s filas con deriva%s', name, rows, '' if dry_run else ' (corregidas)')
+        else:
+            current_app.logger.info('Contador %s: sin deriva', name)
+    if not dry_run:
+        db.session.commit()
+
+# =========================================================
+# Borrado de tableros (diferido y por lotes)
+# =========================================================
+
+# Listas, tarjetas, comentarios y asignaciones se borran en la base con ON DELETE
+# CASCADE. Un tablero se oculta primero (deleted_at) en una transacción corta; su
+# contenido se purga después por lotes, cada uno en su propia transacción, para no
+# retener el bloqueo de escritura. Los tableros pequeños se purgan en la misma
+# petición; los grandes, en un hilo de fondo (board_purger) o con 'boards-purge'.
+
+def soft_delete_board(board_id):
+    """Oculta un tablero y retira sus tarjetas del índice por usuario y de los filtros guardados."""
+    boards, index, results, filters = (Board.__table__, UserCardIndex.__table__,
+                                       SavedFilterResult.__table__, SavedFilter.__table__)
+    db.session.execute(boards.update().where(boards.c.id == board_id).values(deleted_at=datetime.utcnow()))
+    board_cards = db.select(Card.id).join(List, Card.list_id == List.id).where(List.board_id == board_id)
+    db.session.execute(index.delete().where(index.c.card_id.in_(board_cards)))
+    filter_ids = db.session.execute(
+        db.select(results.c.filter_id).where(results.c.card_id.in_(board_cards)).distinct()
+    ).scalars().all()
+    if filter_ids:
+        db.session.execute(results.delete().where(results.c.card_id.in_(board_cards)))
+        recount = db.select(db.func.count()).where(results.c.filter_id == filters.c.id).scalar_subquery()
+        db.session.execute(filters.update().where(filters.c.id.in_(filter_ids)).values(card_count=recount))
+    record_board_changes([(board_id, 'board', board_id, 'delete')]) # Avisa a los clientes abiertos
+
+def purge_board(board_id, batch_size, pause=0):
+    """Borra por lotes las tarjetas de un tablero ya ocultado y después el tablero.
+
+    Cada lote borra batch_size tarjetas (con sus comentarios y asignaciones, en
+    cascada) y se confirma por separado; entre lotes se esperan 'pause' segundos
+    para que otras escrituras tomen el bloqueo. Las tarjetas archivadas se borran
+    igual, después de las activas. Devuelve las tarjetas borradas.
+    """
+    cards, archived, boards, change_log = Card.__table__, ArchivedCard.__table__, Board.__table__, ChangeLog.__table__
+    batches = (
+        (cards, db.select(Card.id).join(List, Card.list_id == List.id).where(List.board_id == board_id)),
+        (archived, db.select(ArchivedCard.id).where(ArchivedCard.board_id == board_id)),
+    )
+    purged = 0
+    for table, batch in batches:
+        while True:
+            ids = db.session.execute(batch.limit(batch_size)).scalars().all()
+            if not ids:
+                break
+            db.session.execute(table.delete().where(table.c.id.in_(ids)))
+            db.session.commit()
+            purged += len(ids)
+            if pause:
+                time.sleep(pause)
+    db.session.execute(change_log.delete().where(change_log.c.board_id == board_id))
+    db.session.execute(boards.delete().where(boards.c.id == board_id, boards.c.deleted_at.isnot(None))) # Listas en cascada
+    db.session.commit()
+    return purged
+
+def purge_deleted_boards():
+    """Purga todos los tableros marcados como borrados. Devuelve {board_id: tarjetas borradas}."""
+    config = current_app.config
+    pending = db.session.execute(db.select(Board.id).where(Board.deleted_at.isnot(None)).order_by(Board.id)).scalars().all()
+    purged = {}
+    for board_id in pending:
+        purged[board_id] = purge_board(board_id, config['BOARD_PURGE_BATCH_SIZE'], config['BOARD_PURGE_PAUSE_SECONDS'])
+        current_app.logger.info('Tablero %s purgado: %s tarjetas', board_id, purged[board_id])
+    return purged
+
+def board_purger():
+    # Un hilo de purga por aplicación y proceso, creado en create_app()
+    return current_app.extensions['board_purger']
+
+def run_board_purger(app):
+    with app.app_context():
+        try:
+            purge_deleted_boards()
+        finally:
+            db.session.remove()
+
+@api.cli.command('boards-purge')
+def boards_purge_command():
+    """Purga los tableros borrados pendientes (p. ej. tras reiniciar): flask --app app boards-purge"""
+    purge_deleted_boards()
+
+def missing_cascades(connection):
+    # (tabla, restricción del modelo, restricción en la base) de las claves foráneas
+    # declaradas con ON DELETE CASCADE que la base todavía no tiene así
+    inspector = db.inspect(connection)
+    for table in db.metadata.sorted_tables:
+        wanted = [fk for fk in table.foreign_key_constraints if fk.ondelete == 'CASCADE']
+        if not wanted:
+            continue
+        current = {tuple(fk['constrained_columns']): fk for fk in inspector.get_foreign_keys(table.name)}
+        for constraint in wanted:
+            existing = current.get(tuple(constraint.column_keys))
+            if existing is None or (existing['options'].get('ondelete') or '').upper() != 'CASCADE':
+                yield table, constraint, existing
+
+def rebuild_sqlite_table(connection, table):
+    # SQLite no puede modificar una clave foránea: se crea la tabla nueva, se copian
+    # las filas, se borra la antigua y se renombra. Requiere foreign_keys=OFF; los
+    # índices y disparadores de la tabla antigua desaparecen y se crean de nuevo.
+    name = table.name
+    columns = ', '.join(connection.dialect.identifier_preparer.quote(column.name) for column in table.columns)
+    create = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(create.replace(f'CREATE TABLE {name} (', f'CREATE TABLE _new_{name} (', 1))
+    connection.exec_driver_sql(f'INSERT INTO _new_{name} ({columns}) SELECT {columns} FROM {name}')
+    connection.exec_driver_sql(f'DROP TABLE {name}')
+    connection.exec_driver_sql(f'ALTER TABLE _new_{name} RENAME TO {name}')
+    for index in table.indexes:
+        index.create(connection)
+
+def delete_orphans(connection):
+    # Filas hijas cuyo padre ya no existe (posibles antes de activar foreign_keys en SQLite)
+    deleted = 0
+    for table in db.metadata.sorted_tables: # Padres antes que hijos
+        for constraint in table.foreign_key_constraints:
+            if constraint.ondelete != 'CASCADE':
+                continue
+            (column, element), = zip(constraint.columns, constraint.elements)
+            parent = element.column
+            orphans = table.delete().where(column.notin_(db.select(parent)))
+            deleted += connection.execute(orphans).rowcount
+    return deleted
+
+@migration(8, "Borrado en cascada en la base (ON DELETE CASCADE) y borrado diferido de tableros")
+def migrate_cascade_deletes():
+    add_model_column('boards', 'deleted_at')
+    if db.engine.dialect.name != 'sqlite':
+        connection = db.session.connection()
+        for table, constraint, existing in list(missing_cascades(connection)):
+            if existing is not None:
+                drop = 'DROP FOREIGN KEY' if connection.dialect.name in ('mysql', 'mariadb') else 'DROP CONSTRAINT'
+                connection.execute(text(f"ALTER TABLE {table.name} {drop} {existing['name']}"))
+            connection.execute(AddConstraint(constraint))
+        return
+
+    # PRAGMA foreign_keys no tiene efecto dentro de una transacción: se usa una conexión
+    # propia, fuera de la de la sesión, y se deja con las claves foráneas activadas
+    db.session.commit()
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        try:
+            tables = {table for table, _, _ in missing_cascades(connection)}
+            for table in db.metadata.sorted_tables:
+                if table in tables:
+                    rebuild_sqlite_table(connection, table)
+            orphans = delete_orphans(connection)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+    if orphans:
+        current_app.logger.warning('Migración 8: %s filas huérfanas borradas', orphans)
+    if tables and search_enabled():
+        create_search_index() # Disparadores de cards y comments, perdidos al reconstruir
+        rebuild_search_index()
+
+# =========================================================
+# Archivo de tarjetas
+# =========================================================
+
+# Archivar una tarjeta la mueve, con sus comentarios y asignaciones, a archived_cards,
+# archived_comments y archived_card_assignments. Las tablas calientes (y sus índices,
+# el índice por usuario y los filtros guardados) solo conservan el trabajo vivo, así
+# que cargar un tablero no se encarece con el historial. Lo archivado se consulta
+# aparte (GET /boards/<id>/archived-cards), se busca con /search?types=archived y se
+# puede restaurar. Los movimientos son INSERT ... SELECT y DELETE de Core: los
+# contadores y el registro de cambios se ajustan explícitamente.
+
+def archive_cards(card_ids, archived_by):
+    """Archiva las tarjetas indicadas. Devuelve {card_id: id en archived_cards}."""
+    cards, comments, assignments = Card.__table__, Comment.__table__, CardAssignment.__table__
+    archived, archived_comments, archived_assignments = (ArchivedCard.__table__, ArchivedComment.__table__,
+                                                         ArchivedCardAssignment.__table__)
+    rows = db.session.execute(
+        db.select(Card.id, Card.list_id, List.board_id).join(List, Card.list_id == List.id).where(Card.id.in_(card_ids))
+    ).all()
+    if not rows:
+        return {}
+    ids = [row.id for row in rows]
+    now = datetime.utcnow()
+
+    copied = ('title', 'description', 'creator_id', 'due_date', 'order', 'created_at', 'updated_at',
+              'comment_count', 'assignment_count')
+    db.session.execute(archived.insert().from_select(
+        ['card_id', 'board_id', 'list_id', *copied, 'archived_at', 'archived_by'],
+        db.select(cards.c.id, List.board_id, cards.c.list_id, *(cards.c[name] for name in copied),
+                  db.literal(now, db.DateTime), db.literal(archived_by, db.Integer))
+        .join(List, cards.c.list_id == List.id).where(cards.c.id.in_(ids))
+    ))
+    # La fila más reciente de cada card_id es la recién insertada (los ids de archivo no se reutilizan)
+    new_ids = db.select(archived.c.card_id, db.func.max(archived.c.id).label('archived_id')) \
+        .where(archived.c.card_id.in_(ids)).group_by(archived.c.card_id).subquery()
+    db.session.execute(archived_comments.insert().from_select(
+        ['archived_card_id', 'comment_id', 'content', 'user_id', 'created_at', 'updated_at'],
+        db.select(new_ids.c.archived_id, comments.c.id, comments.c.content, comments.c.user_id,
+                  comments.c.created_at, comments.c.updated_at)
+        .join(new_ids, comments.c.card_id == new_ids.c.card_id)
+    ))
+    db.session.execute(archived_assignments.insert().from_select(
+        ['archived_card_id', 'user_id', 'assigned_at'],
+        db.select(new_ids.c.archived_id, assignments.c.user_id, assignments.c.assigned_at)
+        .join(new_ids, assignments.c.card_id == new_ids.c.card_id)
+    ))
+    archived_ids = dict(db.session.execute(db.select(new_ids.c.card_id, new_ids.c.archived_id)).all())
+    db.session.execute(cards.delete().where(cards.c.id.in_(ids))) # Comentarios y asignaciones en cascada
+
+    deltas = CounterDeltas()
+    entries = []
+    for card_id, list_id, board_id in rows:
+        deltas.add(List, 'card_count', list_id, -1)
+        deltas.add(Board, 'card_count', board_id, -1)
+        entries += [(board_id, 'card', card_id, 'delete'), (board_id, 'list', list_id, 'upsert'),
+                    (board_id, 'board', board_id, 'upsert')]
+    apply_counter_deltas(deltas)
+    record_board_changes(entries) # También las retira del índice por usuario y de los filtros guardados
+    return archived_ids
+
+def archive_where(*conditions, archived_by=None, batch_size=500):
+    """Archiva por lotes las tarjetas (Card JOIN List) que cumplen las condiciones.
+
+    Cada lote se confirma por separado para no retener el bloqueo de escritura.
+    Devuelve las tarjetas archivadas.
+    """
+    batch = db.select(Card.id).join(List, Card.list_id == List.id).where(*conditions).limit(batch_size)
+    total = 0
+    while True:
+        card_ids = db.session.execute(batch).scalars().all()
+        if not card_ids:
+            return total
+        total += len(archive_cards(card_ids, archived_by))
+        db.session.commit()
+
+def card_age_before(days):
+    # Tarjetas sin cambios desde hace más de 'days' días
+    return db.func.coalesce(Card.updated_at, Card.created_at) < datetime.utcnow() - timedelta(days=days)
+
+def restore_archived_card(archived_card, list_id):
+    """Devuelve una tarjeta archivada a list_id, al final, con sus comentarios y asignaciones.
+
+    Se recrea por el ORM (con un id nuevo), de modo que contadores, registro de
+    cambios e índices se actualizan en el flush como en cualquier alta.
+    """
+    card = Card(
+        title=archived_card.title,
+        description=archived_card.description,
+        list_id=list_id,
+        creator_id=archived_card.creator_id,
+        due_date=archived_card.due_date,
+        order=append_order(Card, Card.list_id, list_id),
+        created_at=archived_card.created_at,
+        comments=[Comment(content=comment.content, user_id=comment.user_id,
+                          created_at=comment.created_at, updated_at=comment.updated_at)
+                  for comment in archived_card.comments],
+        assignments=[CardAssignment(user_id=assignment.user_id, assigned_at=assignment.assigned_at)
+                     for assignment in archived_card.assignments],
+    )
+    db.session.add(card)
+    db.session.delete(archived_card)
+    return card
+
+@migration(9, "Tablas de archivo de tarjetas en el índice de búsqueda")
+def migrate_archived_cards():
+    if search_enabled():
+        create_search_index() # Disparadores de archived_cards (las tablas las crea create_all)
+
+@api.cli.command('cards-archive')
+@click.option('--older-than-days', type=click.IntRange(min=1), required=True,
+              help='Archiva las tarjetas sin cambios desde hace más de estos días.')
+def cards_archive_command(older_than_days):
+    """Archiva las tarjetas antiguas de todos los tableros: flask --app app cards-archive --older-than-days 180"""
+    archived = archive_where(card_age_before(older_than_days), List.board_id.in_(
+        db.select(Board.id).where(Board.deleted_at.is_(None))
+    ), batch_size=current_app.config['ARCHIVE_BATCH_SIZE'])
+    current_app.logger.info('%s tarjetas archivadas', archived)
+
+# =========================================================
+# Orden de listas y tarjetas con huecos (gap-based ordering)
+# =========================================================
+
+# Los valores de 'order' se reparten con huecos de ORDER_GAP. Insertar entre dos
+# hermanos toma el punto medio y solo actualiza la fila que se mueve; cuando un
+# hueco se agota se renumera (una vez) el contenedor completo.
+#
+# Dos peticiones simultáneas pueden calcular la misma posición (mismos vecinos leídos
+# antes de escribir, o dos altas al final con el mismo máximo). No se bloquea el
+# contenedor: el empate es inofensivo porque todo se ordena por (order, id), así que
+# gana el id menor, y el siguiente movimiento entre las dos encuentra el hueco
+# agotado y renumera el contenedor.
+ORDER_GAP = 1024
+
+def append_order(model, parent_column, parent_id):
+    # Subconsulta que la base evalúa dentro del propio INSERT/UPDATE: poner al final
+    # no necesita leer antes el máximo. El máximo va en una tabla derivada con el
+    # agregado dentro: MySQL no deja leer en una subconsulta la tabla que se está
+    # actualizando (error 1093) y una derivada con agregado no se fusiona, se materializa.
+    last = db.select((db.func.coalesce(db.func.max(model.order), 0) + ORDER_GAP).label('next_order')) \
+        .where(parent_column == parent_id).subquery()
+    return db.select(last.c.next_order).scalar_subquery()
+
+def rebalance_order(model, parent_column, parent_id, record_changes=True):
+    """Vuelve a espaciar con ORDER_GAP los elementos de un contenedor, conservando su orden.
+
+    El UPDATE masivo no pasa por el flush, así que las filas renumeradas se anotan en
+    change_log a mano (los clientes sincronizados por /changes deben ver su nuevo 'order').
+    """
+    ids = db.session.query(model.id).filter(parent_column == parent_id).order_by(model.order, model.id).all()
+    if ids:
+        db.session.execute(update(model), [
+            {"id": item_id, "order": (position + 1) * ORDER_GAP} for position, (item_id,) in enumerate(ids)
+        ])
+        if record_changes:
+            board_id = parent_id if model is List else db.session.get(List, parent_id).board_id
+            record_board_changes((board_id, CHANGE_ENTITIES[model], item_id, 'upsert') for item_id, in ids)
+
+def position_between(model, parent_column, parent_id, item_id, after_id=None, before_id=None):
+    """Calcula el 'order' para dejar item_id justo después de after_id o antes de before_id.
+
+    Ambos deben ser hermanos dentro de parent_id. Sin ninguno, coloca al final.
+    Devuelve (order, error_msg).
+    """
+    if after_id is None and before_id is None:
+        return append_order(model, parent_column, parent_id), None
+
+    siblings = db.session.query(model.order, model.id).filter(parent_column == parent_id, model.id != item_id)
+    anchor = siblings.filter(model.id == (after_id if after_id is not None else before_id)).first()
+    if anchor is None:
+        return None, "The reference item must belong to the target container"
+
+    anchor_key = tuple_(model.order, model.id) > tuple_(anchor.order, anchor.id)
+    if after_id is not None:
+        previous = anchor
+        following = siblings.filter(anchor_key).order_by(model.order, model.id).first()
+    else:
+        following = anchor
+        previous = siblings.filter(tuple_(model.order, model.id) < tuple_(anchor.order, anchor.id)) \
+            .order_by(model.order.desc(), model.id.desc()).first()
+
+    if previous is None:
+        return following.order - ORDER_GAP, None
+    if following is None:
+        return previous.order + ORDER_GAP, None
+    if following.order - previous.order > 1:
+        return (previous.order + following.order) // 2, None
+
+    # Hueco agotado: renumerar el contenedor y volver a calcular
+    rebalance_order(model, parent_column, parent_id)
+    return position_between(model, parent_column, parent_id, item_id, after_id, before_id)
+
+@migration(3, "Espaciar los valores de 'order' de listas y tarjetas con huecos")
+def migrate_order_gaps():
+    # El UPDATE del modelo actual también escribe lists.updated_at (migración 4)
+    add_model_column('lists', 'updated_at')
+    # Sin registro de cambios: change_log llega en una migración posterior
+    for board_id, in db.session.query(Board.id).all():
+        rebalance_order(List, List.board_id, board_id, record_changes=False)
+    for list_id, in db.session.query(List.id).all():
+        rebalance_order(Card, Card.list_id, list_id, record_changes=False)
+
+
+# =========================================================
+# Búsqueda de texto completo (SQLite FTS5)
+# =========================================================
+
+# Un único índice FTS5 para títulos/descripciones de tarjetas (activas y archivadas),
+# comentarios y usuarios. Lo mantienen triggers de la propia base, así que cualquier INSERT,
+# UPDATE o DELETE (también los de cascada) lo deja sincronizado.
+# El rowid se deriva del id de la entidad: id * 4 + código de tipo.
+SEARCH_KINDS = {'card': 1, 'comment': 2, 'user': 3, 'archived': 0}
+
+SEARCH_SOURCES = {
+    # tipo: (tabla, expresión del título, expresión del cuerpo, columnas que disparan la actualización)
+    'card': ('cards', "new.title", "coalesce(new.description, '')", 'title, description'),
+    'comment': ('comments', "''", "new.content", 'content'),
+    'user': ('users', "new.username", "new.email", 'username, email'),
+    'archived': ('archived_cards', "new.title", "coalesce(new.description, '')", 'title, description'),
+}
+
+def search_enabled():
+    return db.engine.dialect.name == 'sqlite'
+
+def create_search_index():
+    db.session.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "title, body, kind UNINDEXED, ref_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    ))
+    for kind, (table, title_expr, body_expr, watched) in SEARCH_SOURCES.items():
+        code = SEARCH_KINDS[kind]
+        insert_row = (f"INSERT INTO search_index(rowid, title, body, kind, ref_id) "
+                      f"VALUES (new.id * 4 + {code}, {title_expr}, {body_expr}, '{kind}', new.id);")
+        delete_row = f"DELETE FROM search_index WHERE rowid = old.id * 4 + {code};"
+        db.session.execute(text(f"CREATE TRIGGER IF NOT EXISTS search_{table}_ai AFTER INSERT ON {table} BEGIN {insert_row} END"))
+        db.session.execute(text(f"CREATE TRIGGER IF NOT EXISTS search_{table}_au AFTER UPDATE OF {watched} ON {table} BEGIN {delete_row} {insert_row} END"))
+        db.session.execute(text(f"CREATE TRIGGER IF NOT EXISTS search_{table}_ad AFTER DELETE ON {table} BEGIN {delete_row} END"))
+
+def rebuild_search_index():
+    # Repuebla el índice desde las tablas de origen (migración inicial o reparación)
+    db.session.execute(text("DELETE FROM search_index"))
+    for kind, (table, title_expr, body_expr, _) in SEARCH_SOURCES.items():
+        code = SEARCH_KINDS[kind]
+        db.session.execute(text(
+            f"INSERT INTO search_index(rowid, title, body, kind, ref_id) "
+            f"SELECT id * 4 + {code}, {title_expr.replace('new.', '')}, {body_expr.replace('new.', '')}, '{kind}', id FROM {table}"
+        ))
+
+@migration(2, "Índice de búsqueda FTS5 para tarjetas, comentarios y usuarios")
+def migrate_search_index():
+    if not search_enabled():
+        return
+    create_search_index()
+    rebuild_search_index()
+
+@api.cli.command('search-reindex')
+def search_reindex_command():
+    """Reconstruye el índice de búsqueda: flask --app app search-reindex"""
+    rebuild_search_index()
+    db.session.commit()
+
+def build_search_query(query, columns=None):
+    """Convierte texto libre en una consulta FTS5 segura con coincidencia por prefijo.
+
+    Cada palabra se cita (sin operadores del usuario) y se busca como prefijo;
+    todas deben aparecer. Devuelve None si no hay palabras.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    expression = ' '.join(f'"{term}"*' for term in terms)
+    if columns:
+        expression = '{%s} : (%s)' % (' '.join(columns), expression)
+    return expression
+
+def search_ids(kind, match, ids=None):
+    # Subconsulta con los ids de la entidad que coinciden; usar con Column.in_().
+    # Con ids solo se comprueban esas entidades (búsqueda por rowid, sin recorrer todas las coincidencias).
+    if ids is None:
+        return text("SELECT ref_id FROM search_index WHERE search_index MATCH :match AND kind = :kind") \
+            .bindparams(match=match, kind=kind).columns(ref_id=db.Integer)
+    rowids = [entity_id * 4 + SEARCH_KINDS[kind] for entity_id in ids]
+    return text("SELECT ref_id FROM search_index WHERE search_index MATCH :match AND rowid IN :rowids") \
+        .bindparams(bindparam('rowids', expanding=True), match=match, rowids=rowids).columns(ref_id=db.Integer)
+
+
+# =========================================================
+# Revisiones de tablero y peticiones condicionales (ETag)
+# =========================================================
+
+# Cada tablero lleva un contador 'revision' que sube en el mismo flush que cualquier
+# cambio de su contenido. Las rutas GET de un tablero (y de sus listas y tarjetas)
+# usan la revisión como ETag: si el cliente envía If-None-Match con la revisión
+# actual se responde 304 tras una sola lectura por clave primaria, sin cargar ni
+# serializar nada más.
+#
+# Cada subida de revisión deja además en change_log qué entidades cambiaron, de
+# modo que GET /boards/<id>/changes?since=N devuelve solo lo modificado desde N.
+
+# Entidades registradas en change_log y su nombre en la API
+CHANGE_ENTITIES = {Board: 'board', List: 'list', Card: 'card', Comment: 'comment', CardAssignment: 'assignment'}
+
+def bump_board_revisions(board_ids):
+    """Incrementa la revisión de los tableros indicados y devuelve {board_id: nueva revisión}."""
+    boards = Board.__table__
+    # UPDATE de Core: no sincroniza objetos Board ya cargados (commit los expira de todos modos)
+    bump = boards.update().where(boards.c.id.in_(board_ids)).values(revision=boards.c.revision + 1)
+    if db.engine.dialect.update_returning:
+        return dict(db.session.execute(bump.returning(boards.c.id, boards.c.revision)).all())
+    db.session.execute(bump)
+    return dict(db.session.execute(db.select(boards.c.id, boards.c.revision).where(boards.c.id.in_(board_ids))).all())
+
+def record_board_changes(changes):
+    """Sube la revisión de los tableros afectados y anota los cambios en change_log.
+
+    changes: iterable de (board_id, entidad, entity_id, op) con op 'upsert' o 'delete'.
+    Se llama sola desde el flush del ORM; las escrituras masivas que no pasan por
+    el ORM (UPDATE/INSERT/DELETE directos) deben llamarla explícitamente. También
+    actualiza el índice por usuario y los filtros guardados de las tarjetas cambiadas.
+    """
+    latest = {}
+    for board_id, entity, entity_id, op in changes:
+        key = (board_id, entity, entity_id)
+        if latest.get(key) != 'delete': # Dentro de un mismo flush el borrado prevalece
+            latest[key] = op
+    if not latest:
+        return
+    revisions = bump_board_revisions({board_id for board_id, _, _ in latest})
+    rows = [
+        {"board_id": board_id, "revision": revisions[board_id], "entity": entity, "entity_id": entity_id, "op": op}
+        for (board_id, entity, entity_id), op in latest.items() if board_id in revisions # Tableros borrados: nada que anotar
+    ]
+    if rows:
+        db.session.execute(db.insert(ChangeLog.__table__), rows)
+        db.session.info.setdefault('board_events', []).extend(rows) # Se publican al confirmar (publish_board_events)
+    changed_cards = {entity_id for (_, entity, entity_id) in latest if entity == 'card'}
+    refresh_user_card_index(changed_cards)
+    refresh_saved_filters(changed_cards)
+
+def resolve_boards(list_ids, card_ids):
+    # ({list_id: board_id}, {card_id: board_id}) con una consulta por tipo
+    list_boards = dict(db.session.execute(
+        db.select(List.id, List.board_id).where(List.id.in_(list_ids))
+    ).all()) if list_ids else {}
+    card_boards = dict(db.session.execute(
+        db.select(Card.id, List.board_id).join(List, Card.list_id == List.id).where(Card.id.in_(card_ids))
+    ).all()) if card_ids else {}
+    return list_boards, card_boards
+
+def pending_changes(session):
+    # (objeto, op) de las entidades registradas con cambios reales en este flush
+    for obj in session.new:
+        if type(obj) in CHANGE_ENTITIES:
+            yield obj, 'upsert'
+    for obj in session.dirty:
+        if type(obj) in CHANGE_ENTITIES and session.is_modified(obj):
+            yield obj, 'upsert'
+    for obj in session.deleted:
+        if type(obj) in CHANGE_ENTITIES:
+            yield obj, 'delete'
+
+def parent_ids(changes):
+    # Listas y tarjetas de las que cuelgan los cambios (incluida la lista de origen al mover)
+    list_ids, card_ids = set(), set()
+    for obj, _ in changes:
+        if isinstance(obj, Card):
+            list_ids.add(obj.list_id)
+            list_ids.update(db.inspect(obj).attrs.list_id.history.deleted)
+        elif isinstance(obj, (Comment, CardAssignment)):
+            card_ids.add(obj.card_id)
+    return list_ids - {None}, card_ids - {None}
+
+def cascaded_cards(list_ids):
+    # {list_id: [card_id]} de las tarjetas que la base borrará en cascada con estas listas
+    cards = {}
+    if list_ids:
+        for list_id, card_id in db.session.execute(db.select(Card.list_id, Card.id).where(Card.list_id.in_(list_ids))):
+            cards.setdefault(list_id, []).append(card_id)
+    return cards
+
+@event.listens_for(db.session, 'before_flush')
+def resolve_changed_boards(session, flush_context, instances):
+    # Antes de escribir, las filas padre siguen existiendo aunque el flush las borre.
+    # Las tarjetas de las listas borradas las elimina la base (ON DELETE CASCADE) sin
+    # pasar por el ORM: se anotan ahora para ajustar contadores e índices tras el flush.
+    list_ids, card_ids = parent_ids(list(pending_changes(session)))
+    deleted_lists = [obj.id for obj in session.deleted if isinstance(obj, List)]
+    with session.no_autoflush:
+        session.info['changed_boards'] = resolve_boards(list_ids, card_ids)
+        session.info['cascaded_cards'] = cascaded_cards(deleted_lists)
+
+@event.listens_for(db.session, 'after_flush')
+def log_board_changes(session, flush_context):
+    # Tras el flush los objetos nuevos ya tienen id; new/dirty/deleted aún describen este flush
+    changes = list(pending_changes(session))
+    if not changes:
+        return
+    list_boards, card_boards = session.info.pop('changed_boards', ({}, {}))
+    cascaded = session.info.pop('cascaded_cards', {})
+    list_ids, card_ids = parent_ids(changes)
+    missing = resolve_boards(list_ids - list_boards.keys(), card_ids - card_boards.keys()) # Padres creados en este flush
+    list_boards, card_boards = {**list_boards, **missing[0]}, {**card_boards, **missing[1]}
+
+    entries = []
+    deltas = CounterDeltas()
+    for obj, op in changes:
+        entity = CHANGE_ENTITIES[type(obj)]
+        step = 1 if obj in session.new else -1 if op == 'delete' else 0
+        if isinstance(obj, Board):
+            entries.append((obj.id, entity, obj.id, op))
+        elif isinstance(obj, List):
+            entries.append((obj.board_id, entity, obj.id, op))
+            if cascaded.get(obj.id): # Lista borrada con tarjetas: baja el card_count del tablero
+                deltas.add(Board, 'card_count', obj.board_id, -len(cascaded[obj.id]))
+                entries.append((obj.board_id, 'board', obj.board_id, 'upsert'))
+        elif isinstance(obj, Card):
+            board_id = list_boards.get(obj.list_id)
+            entries.append((board_id, entity, obj.id, op))
+            moves = [(old_list_id, -1) for old_list_id in db.inspect(obj).attrs.list_id.history.deleted]
+            for old_list_id, _ in moves:
+                if list_boards.get(old_list_id) != board_id: # Movida a otro tablero: desaparece del de origen
+                    entries.append((list_boards.get(old_list_id), entity, obj.id, 'delete'))
+            if moves:
+                moves.append((obj.list_id, 1))
+            elif step:
+                moves.append((obj.list_id, step))
+            for list_id, list_step in moves: # Cambian card_count de la lista y del tablero
+                deltas.add(List, 'card_count', list_id, list_step)
+                deltas.add(Board, 'card_count', list_boards.get(list_id), list_step)
+                entries.append((list_boards.get(list_id), 'list', list_id, 'upsert'))
+                entries.append((list_boards.get(list_id), 'board', list_boards.get(list_id), 'upsert'))
+        else:
+            board_id = card_boards.get(obj.card_id)
+            entries.append((board_id, entity, obj.id, op))
+            entries.append((board_id, 'card', obj.card_id, 'upsert')) # Cambian comment_count / assigned_users
+            deltas.add(Card, 'comment_count' if isinstance(obj, Comment) else 'assignment_count', obj.card_id, step)
+    apply_counter_deltas(deltas)
+    record_board_changes(entry for entry in entries if entry[0] is not None)
+    # Las tarjetas borradas en cascada no van al registro de cambios (el cliente quita
+    # la lista entera), pero sí salen del índice por usuario y de los filtros guardados
+    removed_cards = [card_id for card_ids in cascaded.values() for card_id in card_ids]
+    refresh_user_card_index(removed_cards)
+    refresh_saved_filters(removed_cards)
+
+def event_broker():
+    # Un broker por aplicación, creado en create_app() según EVENT_BROKER_URL
+    return current_app.extensions['event_broker']
+
+@event.listens_for(db.session, 'after_commit')
+def publish_board_events(session):
+    # Solo tras el commit: quien reciba el evento y pida /changes ya verá los datos
+    rows = session.info.pop('board_events', None)
+    if not rows:
+        return
+    by_board = {}
+    for row in rows:
+        by_board.setdefault(row["board_id"], []).append(row)
+    # Las respuestas guardadas con revisiones anteriores ya no se pedirán: liberar su espacio
+    response_cache().invalidate_tags(*(('board', board_id) for board_id in by_board))
+    for board_id, board_rows in by_board.items():
+        event_broker().publish(f'board:{board_id}', {
+            "board_id": board_id,
+            "revision": max(row["revision"] for row in board_rows),
+            "changes": [{"entity": row["entity"], "id": row["entity_id"], "op": row["op"]} for row in board_rows]
+        })
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_board_events(session):
+    session.info.pop('board_events', None)
+
+@api.cli.command('changes-prune')
+def changes_prune_command():
+    """Borra del registro de cambios las filas más antiguas que CHANGE_LOG_RETENTION_DAYS: flask --app app changes-prune"""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['CHANGE_LOG_RETENTION_DAYS'])
+    deleted = ChangeLog.query.filter(ChangeLog.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    current_app.logger.info('Registro de cambios: %s filas purgadas', deleted)
+
+@migration(4, "Sellos updated_at en tableros, listas y comentarios y revisión por tablero")
+def migrate_version_stamps():
+    add_model_column('boards', 'updated_at')
+    add_model_column('boards', 'revision')
+    add_model_column('lists', 'updated_at')
+    add_model_column('comments', 'updated_at')
+    for table in ('boards', 'lists', 'comments'):
+        db.session.execute(text(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL"))
+
+def board_revision(board_id):
+    return db.session.query(Board.revision).filter(Board.id == board_id).scalar()
+
+def conditional_get(board_id, revision):
+    """Fija el ETag de la respuesta a partir de la revisión del tablero.
+
+    Devuelve una respuesta 304 si el cliente ya tiene esa versión; si no, None.
+    """
+    g.etag = f'board-{board_id}-r{revision}'
+    if request.if_none_match.contains_weak(g.etag):
+        return current_app.response_class(status=304)
+    return None
+
+# Caché de respuestas: el JSON ya serializado de las rutas GET de un tablero, con
+# la revisión del tablero en la clave. Un cambio sube la revisión, así que nunca se
+# sirve una respuesta obsoleta; al confirmar se eliminan además las entradas del
+# tablero (publish_board_events).
+def response_cache():
+    # Una caché por aplicación, creada en create_app() según RESPONSE_CACHE_*
+    return current_app.extensions['response_cache']
+
+def cached_response(board_id, revision, build):
+    """Devuelve la respuesta de build() pasando por la caché de respuestas.
+
+    build() devuelve (respuesta, status) como una ruta; solo se guardan las 200.
+    La clave incluye la ruta completa con sus parámetros (paginación, cursor).
+    """
+    key = f'{board_id}:{revision}:{request.full_path}'
+    body = response_cache().get(key)
+    if body is not None:
+        return current_app.response_class(body, mimetype='application/json'), 200
+    response, status = build()
+    if status == 200:
+        response_cache().set(key, response.get_data(), tags=(('board', board_id),))
+    return response, status
+
+@api.after_request
+def add_etag(response):
+    etag = g.get('etag')
+    if etag and response.status_code in (200, 304):
+        response.set_etag(etag)
+        # El navegador guarda la respuesta pero revalida siempre con If-None-Match
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+# =========================================================
+# Usuario autenticado de la petición
+# =========================================================
+
+# El id del JWT se convierte a int una sola vez por petición. Los tableros propios
+# se guardan además entre peticiones (PRINCIPAL_CACHE_TTL) para comprobar la
+# propiedad sin consultar Board cuando la ruta ya cargó la lista o tarjeta.
+def principal_cache():
+    # Una caché por aplicación, creada en create_app() con PRINCIPAL_CACHE_TTL
+    return current_app.extensions['principal_cache']
+
+class Principal:
+    """Usuario autenticado de la petición, con su id ya convertido a int."""
+    __slots__ = ('user_id', '_owned_board_ids', '_owned_loaded')
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._owned_board_ids = None
+        self._owned_loaded = False # Leídos de la base en esta petición (no de la caché)
+
+    @property
+    def owned_board_ids(self):
+        if self._owned_board_ids is None:
+            self._owned_board_ids = principal_cache().get(('owned_boards', self.user_id))
+            if self._owned_board_ids is None:
+                self._load_owned_board_ids()
+        return self._owned_board_ids
+
+    def owns_board(self, board_id):
+        # Un tablero que falta en el conjunto guardado puede haberse creado después
+        # (p. ej. en otro worker): se relee una vez antes de negar el permiso. Uno borrado
+        # puede seguir en el conjunto de otro worker hasta que expire, así que esto solo
+        # decide la propiedad: las rutas de escritura leen la lista (live_list) o el
+        # tablero con deleted_at IS NULL en la base.
+        if board_id in self.owned_board_ids:
+            return True
+        if not self._owned_loaded:
+            self._load_owned_board_ids()
+        return board_id in self._owned_board_ids
+
+    def _load_owned_board_ids(self):
+        rows = db.session.query(Board.id).filter(Board.owner_id == self.user_id, Board.deleted_at.is_(None))
+        self._owned_board_ids = frozenset(board_id for board_id, in rows)
+        self._owned_loaded = True
+        key = ('owned_boards', self.user_id)
+        principal_cache().set(key, self._owned_board_ids, tags=(key,))
+
+def current_principal():
+    """Principal de la petición actual, resuelto a partir del JWT la primera vez que se pide."""
+    principal = g.get('principal')
+    if principal is None:
+        principal = g.principal = Principal(int(get_jwt_identity()))
+    return principal
+
+def invalidate_owned_boards(user_id):
+    # Llamar al borrar un tablero (los creados se detectan solos, ver Principal.owns_board)
+    principal_cache().invalidate_tags(('owned_boards', user_id))
+    g.pop('principal', None)
+
+def live_list(list_id):
+    # Lista cuyo tablero no está borrado; el borrado se comprueba en la base y no en la
+    # caché de tableros propios, que en otros workers puede tardar en enterarse
+    return List.query.join(Board, List.board_id == Board.id).filter(
+        List.id == list_id, Board.deleted_at.is_(None)
+    ).first()
+
 
 # =========================================================
 # Rutas de Autenticación
 # =========================================================
 
-@app.route('/auth/register', methods=['POST'])
+# Registro e inicio de sesión esperan al pool de hashes sin ocupar CPU del worker;
+# si el pool está saturado se responde 503 para que el cliente reintente.
+HASHER_BUSY_RETRY_AFTER = 2
+
+def password_hasher():
+    # Un pool por aplicación, creado en create_app() según PASSWORD_HASH_*
+    return current_app.extensions['password_hasher']
+
+def hasher_busy_response():
+    response = jsonify({"msg": "Too many sign-ins in progress, please retry shortly"})
+    response.headers['Retry-After'] = str(HASHER_BUSY_RETRY_AFTER)
+    return response, 503
+
+def upgrade_password_hash(user, password):
+    # Tras un inicio de sesión correcto: recalcula el hash si se guardó con otro método o coste
+    try:
+        if not password_hasher().needs_rehash(user.password_hash):
+            return
+        user.set_password(password)
+    except HasherBusy:
+        return # Se intentará en el siguiente inicio de sesión
+    db.session.commit()
+
+@migration(7, "Ampliar users.password_hash para hashes scrypt")
+def migrate_password_hash_length():
+    # SQLite no impone la longitud de VARCHAR; PostgreSQL y MySQL sí
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text("ALTER TABLE users ALTER COLUMN password_hash TYPE VARCHAR(255)"))
+    elif connection.dialect.name in ('mysql', 'mariadb'):
+        connection.execute(text("ALTER TABLE users MODIFY password_hash VARCHAR(255) NOT NULL"))
+
+@api.route('/auth/register', methods=['POST'])
 def register():
     data = request.get_json()
     username = data.get('username')
@@ -156,14 +1697,17 @@ def register():
         return jsonify({"msg": "Email already registered"}), 409
 
     new_user = User(username=username, email=email)
-    new_user.set_password(password)
+    try:
+        new_user.set_password(password)
+    except HasherBusy:
+        return hasher_busy_response()
 
     db.session.add(new_user)
     db.session.commit()
 
     return jsonify({"msg": "User registered successfully", "user_id": new_user.id}), 201
 
-@app.route('/auth/login', methods=['POST'])
+@api.route('/auth/login', methods=['POST'])
 def login():
     data = request.get_json()
     username = data.get('username')
@@ -174,14 +1718,20 @@ def login():
 
     user = User.query.filter_by(username=username).first()
 
-    if user and user.check_password(password):
+    try:
+        valid = user is not None and user.check_password(password)
+    except HasherBusy:
+        return hasher_busy_response()
+
+    if valid:
+        upgrade_password_hash(user, password)
         access_token = create_access_token(identity=str(user.id)) # Convertir user.id a string
         return jsonify(access_token=access_token), 200
     else:
         return jsonify({"msg": "Bad username or password"}), 401
 
 # Ruta de ejemplo protegida por JWT (solo para pruebas, puedes borrarla después)
-@app.route('/protected', methods=['GET'])
+@api.route('/protected', methods=['GET'])
 @jwt_required()
 def protected():
     current_user_id = get_jwt_identity()
@@ -191,38 +1741,137 @@ def protected():
 # Rutas de Usuarios
 # =========================================================
 
-@app.route('/users/search', methods=['GET'])
+@api.route('/users/search', methods=['GET'])
 @jwt_required()
 def search_users():
-    current_user_id = get_jwt_identity()
+    current_user_id = current_principal().user_id
     query = request.args.get('q', '') # Obtener el término de búsqueda
 
     if not query or len(query) < 2:
-        return jsonify([]), 200 # Devolver array vacío si la query es muy corta
+        return jsonify({"items": [], "next_cursor": None}), 200 # Devolver página vacía si la query es muy corta
 
     # Buscar usuarios por username o email, excluyendo al usuario actual (opcional)
-    users = User.query.filter(
-        (User.username.ilike(f'%{query}%')) | (User.email.ilike(f'%{query}%'))
-    ).filter(User.id != int(current_user_id)).all() # Excluir al usuario que está haciendo la búsqueda
-
-    users_data = []
-    for user in users:
-        users_data.append({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email
-        })
-    return jsonify(users_data), 200
+    users_query = User.query.filter(User.id != current_user_id) # Excluir al usuario que está haciendo la búsqueda
+    if search_enabled():
+        # Coincidencia por prefijo de palabra usando el índice FTS5 (sin recorrer la tabla)
+        match = build_search_query(query)
+        if not match:
+            return jsonify({"items": [], "next_cursor": None}), 200
+        users_query = users_query.filter(User.id.in_(search_ids('user', match)))
+    else:
+        users_query = users_query.filter(
+            (User.username.ilike(f'%{query}%')) | (User.email.ilike(f'%{query}%'))
+        )
+
+    users, next_cursor, error_response = paginate_keyset(users_query, (User.username, User.id))
+    if error_response:
+        return error_response, 400
+
+    return jsonify({"items": USER.dump_many(users), "next_cursor": next_cursor}), 200
+
+
+# =========================================================
+# Rutas de Búsqueda
+# =========================================================
+
+# Consultas FTS5 por tipo. Tarjetas y comentarios solo se devuelven si el usuario
+# es dueño del tablero o está asignado a la tarjeta (misma regla que check_card_permission).
+# Las tarjetas archivadas solo se buscan si se piden (types=archived); su card_id es el
+# de archived_cards (GET /archived-cards/<id>).
+SEARCH_ACCESS = """b.deleted_at IS NULL AND (b.owner_id = :user_id OR EXISTS (
+    SELECT 1 FROM card_assignments a WHERE a.card_id = c.id AND a.user_id = :user_id))"""
+
+SEARCH_STATEMENTS = {
+    'card': """
+        SELECT c.id AS id, c.title AS title, {snippet} AS snippet, c.id AS card_id, l.board_id AS board_id,
+               bm25(search_index, 10.0, 1.0) AS rank
+        FROM search_index
+        JOIN cards c ON c.id = search_index.ref_id
+        JOIN lists l ON l.id = c.list_id
+        JOIN boards b ON b.id = l.board_id
+        WHERE search_index MATCH :match AND search_index.kind = 'card' AND """ + SEARCH_ACCESS + """
+        ORDER BY rank LIMIT :limit""",
+    'comment': """
+        SELECT cm.id AS id, c.title AS title, {snippet} AS snippet, c.id AS card_id, l.board_id AS board_id,
+               bm25(search_index, 10.0, 1.0) AS rank
+        FROM search_index
+        JOIN comments cm ON cm.id = search_index.ref_id
+        JOIN cards c ON c.id = cm.card_id
+        JOIN lists l ON l.id = c.list_id
+        JOIN boards b ON b.id = l.board_id
+        WHERE search_index MATCH :match AND search_index.kind = 'comment' AND """ + SEARCH_ACCESS + """
+        ORDER BY rank LIMIT :limit""",
+    'user': """
+        SELECT u.id AS id, u.username AS title, {snippet} AS snippet, NULL AS card_id, NULL AS board_id,
+               bm25(search_index, 10.0, 1.0) AS rank
+        FROM search_index
+        JOIN users u ON u.id = search_index.ref_id
+        WHERE search_index MATCH :match AND search_index.kind = 'user'
+        ORDER BY rank LIMIT :limit""",
+    'archived': """
+        SELECT ac.id AS id, ac.title AS title, {snippet} AS snippet, ac.id AS card_id, ac.board_id AS board_id,
+               bm25(search_index, 10.0, 1.0) AS rank
+        FROM search_index
+        JOIN archived_cards ac ON ac.id = search_index.ref_id
+        JOIN boards b ON b.id = ac.board_id
+        WHERE search_index MATCH :match AND search_index.kind = 'archived' AND b.deleted_at IS NULL AND (
+            b.owner_id = :user_id OR EXISTS (SELECT 1 FROM archived_card_assignments a
+                                             WHERE a.archived_card_id = ac.id AND a.user_id = :user_id))
+        ORDER BY rank LIMIT :limit""",
+}
+
+@api.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    current_user_id = current_principal().user_id
+    query = request.args.get('q', '')
+    mode = request.args.get('mode', 'full') # 'full' o 'typeahead'
+    types = request.args.get('types', 'card,comment,user').split(',')
+
+    if mode not in ('full', 'typeahead'):
+        return jsonify({"msg": "mode must be 'full' or 'typeahead'"}), 400
+    if any(kind not in SEARCH_KINDS for kind in types):
+        return jsonify({"msg": f"types must be a comma-separated subset of {', '.join(SEARCH_KINDS)}"}), 400
+    if not search_enabled():
+        return jsonify({"msg": "Search is only available with the SQLite backend"}), 501
+
+    limit = request.args.get('limit', current_app.config['DEFAULT_PAGE_SIZE'], type=int)
+    if mode == 'typeahead':
+        # Autocompletado: pocos resultados, solo títulos/usuarios y sin generar fragmentos,
+        # para que el coste por tecla quede acotado.
+        limit = min(limit, current_app.config['TYPEAHEAD_LIMIT'])
+        match = build_search_query(query, columns=['title', 'body'] if types == ['user'] else ['title'])
+        snippet = "NULL"
+    else:
+        limit = min(limit, current_app.config['MAX_PAGE_SIZE'])
+        match = build_search_query(query)
+        snippet = "snippet(search_index, -1, '[', ']', '…', 12)"
+    limit = max(1, limit)
+
+    if len(query) < 2 or not match:
+        return jsonify({"items": []}), 200
+
+    results = []
+    for kind in types:
+        rows = db.session.execute(
+            text(SEARCH_STATEMENTS[kind].format(snippet=snippet)),
+            {"match": match, "limit": limit, "user_id": current_user_id}
+        ).mappings().all()
+        results.extend({"type": kind, **row} for row in rows)
+
+    # bm25 devuelve valores negativos: cuanto menor, más relevante
+    results.sort(key=lambda item: item["rank"])
+    return jsonify({"items": results[:limit]}), 200
 
 
 # =========================================================
 # Rutas de Gestión de Tableros (Boards)
 # =========================================================
 
-@app.route('/boards', methods=['POST'])
+@api.route('/boards', methods=['POST'])
 @jwt_required()
 def create_board():
-    current_user_id = get_jwt_identity()
+    current_user_id = current_principal().user_id
     data = request.get_json()
     title = data.get('title')
     description = data.get('description')
@@ -236,54 +1885,54 @@ def create_board():
 
     return jsonify({
         "msg": "Board created successfully",
-        "board": {
-            "id": new_board.id,
-            "title": new_board.title,
-            "description": new_board.description,
-            "owner_id": new_board.owner_id,
-            "created_at": new_board.created_at.isoformat()
-        }
+        "board": BOARD.dump(new_board)
     }), 201
 
-@app.route('/boards', methods=['GET'])
+@api.route('/boards', methods=['GET'])
 @jwt_required()
 def get_user_boards():
-    current_user_id = get_jwt_identity()
-    boards = Board.query.filter_by(owner_id=current_user_id).all()
-
-    boards_data = []
-    for board in boards:
-        boards_data.append({
-            "id": board.id,
-            "title": board.title,
-            "description": board.description,
-            "owner_id": board.owner_id,
-            "created_at": board.created_at.isoformat()
-        })
-    return jsonify(boards_data), 200
+    current_user_id = current_principal().user_id
+    fields, error_msg = BOARD.parse_fields(request.args.get('fields'))
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
 
-@app.route('/boards/<int:board_id>', methods=['GET'])
+    boards, next_cursor, error_response = paginate_keyset(Board.query.filter_by(owner_id=current_user_id, deleted_at=None), (Board.id,))
+    if error_response:
+        return error_response, 400
+
+    # Las vencidas dependen de la hora: se cuentan al leer (esta ruta no usa la caché de respuestas)
+    overdue = overdue_counts(current_user_id, [board.id for board in boards]) if BOARD.wants('overdue_count', fields) else {}
+    return jsonify({
+        "items": [BOARD.dump(board, fields, overdue_count=overdue.get(board.id, 0)) for board in boards],
+        "next_cursor": next_cursor
+    }), 200
+
+@api.route('/boards/<int:board_id>', methods=['GET'])
 @jwt_required()
 def get_single_board(board_id):
-    current_user_id = get_jwt_identity()
-    board = Board.query.filter_by(id=board_id, owner_id=current_user_id).first()
+    current_user_id = current_principal().user_id
+    fields, error_msg = BOARD.parse_fields(request.args.get('fields'))
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
 
     if not board:
         return jsonify({"msg": "Board not found or you don't have permission"}), 404
 
-    return jsonify({
-        "id": board.id,
-        "title": board.title,
-        "description": board.description,
-        "owner_id": board.owner_id,
-        "created_at": board.created_at.isoformat()
-    }), 200
+    not_modified = conditional_get(board.id, board.revision)
+    if not_modified:
+        return not_modified
+
+    def build():
+        return jsonify(BOARD.dump(board, fields)), 200
 
-@app.route('/boards/<int:board_id>', methods=['PUT'])
+    return cached_response(board.id, board.revision, build)
+
+@api.route('/boards/<int:board_id>', methods=['PUT'])
 @jwt_required()
 def update_board(board_id):
-    current_user_id = get_jwt_identity()
-    board = Board.query.filter_by(id=board_id, owner_id=current_user_id).first()
+    current_user_id = current_principal().user_id
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
 
     if not board:
         return jsonify({"msg": "Board not found or you don't have permission"}), 404
@@ -301,39 +1950,373 @@ def update_board(board_id):
 
     return jsonify({
         "msg": "Board updated successfully",
-        "board": {
-            "id": board.id,
-            "title": board.title,
-            "description": board.description,
-            "owner_id": board.owner_id,
-            "created_at": board.created_at.isoformat()
-        }
+        "board": BOARD.dump(board)
     }), 200
 
-@app.route('/boards/<int:board_id>', methods=['DELETE'])
+@api.route('/boards/<int:board_id>', methods=['DELETE'])
 @jwt_required()
 def delete_board(board_id):
-    current_user_id = get_jwt_identity()
-    board = Board.query.filter_by(id=board_id, owner_id=current_user_id).first()
+    current_user_id = current_principal().user_id
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
 
     if not board:
         return jsonify({"msg": "Board not found or you don't have permission"}), 404
 
-    db.session.delete(board)
+    # Se oculta al instante; el contenido se borra por lotes (ver purge_board)
+    card_count = board.card_count
+    soft_delete_board(board_id)
     db.session.commit()
+    invalidate_card_access(board_id=board_id)
+    invalidate_owned_boards(current_user_id)
+    if card_count <= current_app.config['BOARD_PURGE_SYNC_MAX_CARDS']:
+        purge_board(board_id, current_app.config['BOARD_PURGE_BATCH_SIZE'])
+    else:
+        board_purger().request()
 
     return jsonify({"msg": "Board deleted successfully"}), 200
 
+# =========================================================
+# Exportación e importación de tableros (NDJSON)
+# =========================================================
+
+# Un tablero exportado es NDJSON: una línea JSON por entidad con su "type", en orden
+# de dependencias (board, user, list, card, comment, assignment). Los ids son los del
+# origen y solo sirven para enlazar líneas; al importar se crean filas nuevas. Los
+# usuarios se reasignan por username: autores y creadores desconocidos pasan a ser
+# quien importa y las asignaciones a usuarios desconocidos se omiten. Las tarjetas
+# archivadas no se exportan.
+EXPORT_FORMAT = 1
+IMPORT_READ_BUFFER = 64 * 1024
+
+def export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def export_sections(board_id):
+    # (tipo, consulta) de cada sección del fichero, en el orden en que se escriben
+    board_cards = db.select(Card.id).join(List, Card.list_id == List.id).where(List.board_id == board_id)
+    users = db.union(
+        db.select(Card.creator_id).where(Card.id.in_(board_cards)),
+        db.select(Comment.user_id).where(Comment.card_id.in_(board_cards)),
+        db.select(CardAssignment.user_id).where(CardAssignment.card_id.in_(board_cards)),
+    )
+    return (
+        ('user', db.select(User.id, User.username).where(User.id.in_(users)).order_by(User.id)),
+        ('list', db.select(List.id, List.title, List.order, List.created_at, List.updated_at)
+            .where(List.board_id == board_id).order_by(List.order, List.id)),
+        ('card', db.select(Card.id, Card.list_id, Card.title, Card.description, Card.creator_id, Card.due_date,
+                           Card.order, Card.created_at, Card.updated_at)
+            .join(List, Card.list_id == List.id).where(List.board_id == board_id)
+            .order_by(Card.list_id, Card.order, Card.id)),
+        ('comment', db.select(Comment.id, Comment.card_id, Comment.user_id, Comment.content,
+                              Comment.created_at, Comment.updated_at)
+            .where(Comment.card_id.in_(board_cards)).order_by(Comment.card_id, Comment.created_at, Comment.id)),
+        ('assignment', db.select(CardAssignment.card_id, CardAssignment.user_id, CardAssignment.assigned_at)
+            .where(CardAssignment.card_id.in_(board_cards)).order_by(CardAssignment.card_id, CardAssignment.id)),
+    )
+
+def begin_export_snapshot():
+    # Abre la transacción de lectura de la exportación; debe ser lo primero de la sesión
+    if db.engine.dialect.name == 'sqlite':
+        # pysqlite no emite BEGIN antes de un SELECT: sin él cada consulta sería una lectura
+        # autocommit con su propia instantánea. Dentro de BEGIN todas ven la del primer SELECT.
+        db.session.connection().exec_driver_sql('BEGIN')
+    else:
+        db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+
+def export_board_lines(board, chunk_size):
+    """Genera el tablero en NDJSON, en trozos de hasta chunk_size líneas.
+
+    board es la fila (id, title, description, revision, created_at) leída tras
+    begin_export_snapshot(). Cada sección se lee con un cursor (yield_per) y se
+    escribe según llega, así que la memoria no depende del tamaño del tablero. Todas
+    las secciones se leen en esa misma transacción y ven la misma instantánea.
+    """
+    dumps = current_app.json.dumps
+    yield dumps({"type": "board", "format": EXPORT_FORMAT, "title": board.title, "description": board.description,
+                 "revision": board.revision, "created_at": export_value(board.created_at)}) + '\n'
+    for kind, query in export_sections(board.id):
+        result = db.session.execute(query.execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            yield ''.join(
+                dumps({"type": kind, **{key: export_value(value) for key, value in row._mapping.items()}}) + '\n'
+                for row in rows
+            )
+
+class BoardImportError(Exception):
+    """Línea no válida en un fichero de importación."""
+
+    def __init__(self, line_number, msg):
+        super().__init__(f'Line {line_number}: {msg}' if line_number else msg)
+        self.line_number = line_number
+
+def import_text(record, name, line_number, required=False, max_length=None):
+    value = record.get(name)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str) or (required and not value):
+        raise BoardImportError(line_number, f"'{name}' must be a{' non-empty' if required else ''} string")
+    if max_length and len(value) > max_length:
+        raise BoardImportError(line_number, f"'{name}' is longer than {max_length} characters")
+    return value
+
+def import_datetime(record, name, line_number):
+    value = record.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise BoardImportError(line_number, f"'{name}' must be an ISO 8601 date") from None
+
+def import_id(record, name, line_number, required=False):
+    # Id del origen: solo enteros o cadenas (una lista o un objeto no sirven como clave)
+    value = record.get(name)
+    if value is None and not required:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise BoardImportError(line_number, f"'{name}' must be an integer or a string")
+    return value
+
+def import_ref(record, name, ids, line_number):
+    # Id nuevo de la entidad a la que apunta record[name] (definida en una línea anterior)
+    new_id = ids.get(import_id(record, name, line_number, required=True))
+    if new_id is None:
+        raise BoardImportError(line_number, f"'{name}' does not match an earlier line")
+    return new_id
+
+class BoardImporter:
+    """Crea un tablero a partir de líneas NDJSON (ver export_board_lines), por lotes.
+
+    Las líneas se convierten en filas según llegan y se insertan en bloque (un INSERT
+    por lote y tipo) cada batch_size filas o al cambiar de tipo; cada lote se confirma
+    en su propia transacción. En memoria solo queda el lote en curso y la
+    correspondencia de ids antiguos a nuevos de listas y tarjetas.
+    """
+
+    def __init__(self, owner_id, batch_size):
+        self.owner_id = owner_id
+        self.batch_size = batch_size
+        self.board = None
+        self.users = {} # id en el origen -> id local (por username)
+        self.list_ids = {}
+        self.card_ids = {}
+        self.assigned = set() # (tarjeta, usuario) del lote en curso
+        self.kind = None
+        self.pending = [] # (línea, registro) del lote en curso
+        self.counts = {'lists': 0, 'cards': 0, 'comments': 0, 'assignments': 0}
+
+    def feed(self, line_number, record):
+        kind = record.get('type') if isinstance(record, dict) else None
+        if self.board is None:
+            if kind != 'board':
+                raise BoardImportError(line_number, "the first line must be the board")
+            if record.get('format', EXPORT_FORMAT) != EXPORT_FORMAT:
+                raise BoardImportError(line_number, f"unsupported format, expected {EXPORT_FORMAT}")
+            self.create_board(record, line_number)
+            return
+        if kind not in self.WRITERS:
+            raise BoardImportError(line_number, f"unknown type {kind!r}")
+        if kind != self.kind or len(self.pending) >= self.batch_size:
+            self.flush()
+            self.kind = kind
+        self.pending.append((line_number, record))
+
+    def finish(self):
+        self.flush()
+        if self.board is None:
+            raise BoardImportError(None, "The import is empty")
+        return self.board
+
+    def create_board(self, record, line_number):
+        self.board = Board(
+            title=import_text(record, 'title', line_number, required=True, max_length=Board.title.type.length),
+            description=import_text(record, 'description', line_number),
+            owner_id=self.owner_id,
+        )
+        db.session.add(self.board)
+        db.session.commit()
+
+    def flush(self):
+        if not self.pending:
+            return
+        deltas = CounterDeltas()
+        entries = [(self.board.id, 'board', self.board.id, 'upsert')]
+        self.WRITERS[self.kind](self, self.pending, deltas, entries)
+        apply_counter_deltas(deltas)
+        # Solo tablero, listas y tarjetas: basta para el índice por usuario y los filtros
+        # guardados, y un cliente que siguiera el tablero lo recargará entero de todos modos
+        record_board_changes(entries)
+        db.session.commit()
+        self.pending = []
+        self.assigned.clear()
+
+    def insert(self, model, rows):
+        # Ids nuevos en el orden de rows
+        table = model.__table__
+        if db.engine.dialect.name == 'sqlite':
+            # SQLite no garantiza el orden de RETURNING en un INSERT de varias filas (SQLAlchemy
+            # lo haría fila a fila). Con el bloqueo de escritura de la transacción ya tomado, cada
+            # fila recibe max(rowid) + 1: los ids del lote son consecutivos y en el orden de rows.
+            db.session.execute(table.insert(), rows)
+            last_id = db.session.execute(db.select(db.func.max(table.c.id))).scalar()
+            return list(range(last_id - len(rows) + 1, last_id + 1))
+        if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order: # Un INSERT ... RETURNING por lote
+            return db.session.execute(
+                table.insert().returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+        return [db.session.execute(table.insert(), row).inserted_primary_key[0] for row in rows]
+
+    def write_users(self, pending, deltas, entries):
+        names = {}
+        for line_number, record in pending:
+            names[import_id(record, 'id', line_number, required=True)] = import_text(record, 'username', line_number, required=True)
+        local = dict(db.session.execute(
+            db.select(User.username, User.id).where(User.username.in_(set(names.values())))
+        ).all())
+        self.users.update({old_id: local[name] for old_id, name in names.items() if name in local})
+
+    def write_lists(self, pending, deltas, entries):
+        now = datetime.utcnow()
+        rows = [{
+            "board_id": self.board.id,
+            "title": import_text(record, 'title', line_number, required=True, max_length=List.title.type.length),
+            "order": record.get('order') if isinstance(record.get('order'), int) else 0,
+            "created_at": import_datetime(record, 'created_at', line_number) or now,
+            "updated_at": import_datetime(record, 'updated_at', line_number) or now,
+        } for line_number, record in pending]
+        old_ids = [import_id(record, 'id', line_number, required=True) for line_number, record in pending]
+        for old_id, new_id in zip(old_ids, self.insert(List, rows)):
+            self.list_ids[old_id] = new_id
+            entries.append((self.board.id, 'list', new_id, 'upsert'))
+        self.counts['lists'] += len(rows)
+
+    def write_cards(self, pending, deltas, entries):
+        now = datetime.utcnow()
+        rows = [{
+            "list_id": import_ref(record, 'list_id', self.list_ids, line_number),
+            "title": import_text(record, 'title', line_number, required=True, max_length=Card.title.type.length),
+            "description": import_text(record, 'description', line_number),
+            "creator_id": self.users.get(import_id(record, 'creator_id', line_number), self.owner_id),
+            "due_date": import_datetime(record, 'due_date', line_number),
+            "order": record.get('order') if isinstance(record.get('order'), int) else 0,
+            "created_at": import_datetime(record, 'created_at', line_number) or now,
+            "updated_at": import_datetime(record, 'updated_at', line_number) or now,
+        } for line_number, record in pending]
+        old_ids = [import_id(record, 'id', line_number, required=True) for line_number, record in pending]
+        for old_id, row, new_id in zip(old_ids, rows, self.insert(Card, rows)):
+            self.card_ids[old_id] = new_id
+            deltas.add(List, 'card_count', row['list_id'], 1)
+            deltas.add(Board, 'card_count', self.board.id, 1)
+            entries.append((self.board.id, 'card', new_id, 'upsert'))
+        entries.extend((self.board.id, 'list', list_id, 'upsert') for list_id in {row['list_id'] for row in rows})
+        self.counts['cards'] += len(rows)
+
+    def write_comments(self, pending, deltas, entries):
+        now = datetime.utcnow()
+        rows = [{
+            "card_id": import_ref(record, 'card_id', self.card_ids, line_number),
+            "user_id": self.users.get(import_id(record, 'user_id', line_number), self.owner_id),
+            "content": import_text(record, 'content', line_number, required=True),
+            "created_at": import_datetime(record, 'created_at', line_number) or now,
+            "updated_at": import_datetime(record, 'updated_at', line_number) or now,
+        } for line_number, record in pending]
+        db.session.execute(db.insert(Comment.__table__), rows)
+        for row in rows:
+            deltas.add(Card, 'comment_count', row['card_id'], 1)
+        self.counts['comments'] += len(rows)
+
+    def write_assignments(self, pending, deltas, entries):
+        now = datetime.utcnow()
+        rows = []
+        for line_number, record in pending:
+            card_id = import_ref(record, 'card_id', self.card_ids, line_number)
+            user_id = self.users.get(import_id(record, 'user_id', line_number))
+            if user_id is None or (card_id, user_id) in self.assigned:
+                continue # Usuario que no existe aquí, o asignación repetida
+            self.assigned.add((card_id, user_id))
+            rows.append({"card_id": card_id, "user_id": user_id,
+                         "assigned_at": import_datetime(record, 'assigned_at', line_number) or now})
+        if rows:
+            db.session.execute(db.insert(CardAssignment.__table__), rows)
+        for row in rows:
+            deltas.add(Card, 'assignment_count', row['card_id'], 1)
+            entries.append((self.board.id, 'card', row['card_id'], 'upsert')) # Cambia quién ve la tarjeta
+        self.counts['assignments'] += len(rows)
+
+    WRITERS = {
+        'user': write_users,
+        'list': write_lists,
+        'card': write_cards,
+        'comment': write_comments,
+        'assignment': write_assignments,
+    }
+
+@api.route('/boards/<int:board_id>/export', methods=['GET'])
+@jwt_required()
+def export_board(board_id):
+    current_user_id = current_principal().user_id
+
+    # Propiedad comprobada en la base (no con la caché de tableros propios) y en la misma
+    # transacción que lee el stream: el tablero no puede desaparecer a mitad de la respuesta
+    db.session.close()
+    begin_export_snapshot()
+    board = db.session.execute(
+        db.select(Board.id, Board.title, Board.description, Board.revision, Board.created_at)
+        .where(Board.id == board_id, Board.owner_id == current_user_id, Board.deleted_at.is_(None))
+    ).first()
+    if board is None:
+        return jsonify({"msg": "Board not found or you don't have permission"}), 404
+
+    return Response(
+        stream_with_context(export_board_lines(board, current_app.config['EXPORT_CHUNK_SIZE'])),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=board-{board_id}.ndjson'}
+    )
+
+@api.route('/boards/import', methods=['POST'])
+@jwt_required()
+def import_board():
+    # El cuerpo es el NDJSON de /boards/<id>/export; se lee línea a línea sin cargarlo entero
+    current_user_id = current_principal().user_id
+    importer = BoardImporter(current_user_id, current_app.config['IMPORT_BATCH_SIZE'])
+    lines = io.BufferedReader(request.stream, IMPORT_READ_BUFFER) # request.stream lee línea a línea de byte en byte
+    try:
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = current_app.json.loads(line)
+            except ValueError:
+                raise BoardImportError(line_number, "invalid JSON") from None
+            importer.feed(line_number, record)
+        board = importer.finish()
+    except (BoardImportError, IntegrityError, DataError) as error:
+        db.session.rollback()
+        if importer.board is not None:
+            # Los lotes ya confirmados se descartan como un tablero borrado
+            soft_delete_board(importer.board.id)
+            db.session.commit()
+            board_purger().request()
+        msg = str(error) if isinstance(error, BoardImportError) else "Duplicate or invalid rows in the import"
+        return jsonify({"msg": msg}), 400
+    invalidate_owned_boards(current_user_id)
+
+    return jsonify({
+        "msg": "Board imported successfully",
+        "board": BOARD.dump(board),
+        "imported": importer.counts
+    }), 201
+
 
 # =========================================================
 # Rutas de Gestión de Listas (Lists)
 # =========================================================
 
-@app.route('/boards/<int:board_id>/lists', methods=['POST'])
+@api.route('/boards/<int:board_id>/lists', methods=['POST'])
 @jwt_required()
 def create_list(board_id):
-    current_user_id = get_jwt_identity()
-    board = Board.query.filter_by(id=board_id, owner_id=current_user_id).first()
+    current_user_id = current_principal().user_id
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
 
     if not board:
         return jsonify({"msg": "Board not found or you don't have permission"}), 404
@@ -345,10 +2328,9 @@ def create_list(board_id):
     if not title:
         return jsonify({"msg": "Title is required for the list"}), 400
 
-    # Si no se proporciona un orden, ponla al final
+    # Si no se proporciona un orden, ponla al final (calculado dentro del INSERT)
     if order is None:
-        max_order = db.session.query(db.func.max(List.order)).filter_by(board_id=board_id).scalar()
-        order = (max_order if max_order is not None else -1) + 1 # Asegura que sea el último
+        order = append_order(List, List.board_id, board_id)
 
     new_list = List(title=title, board_id=board.id, order=order)
     db.session.add(new_list)
@@ -356,88 +2338,220 @@ def create_list(board_id):
 
     return jsonify({
         "msg": "List created successfully",
-        "list": {
-            "id": new_list.id,
-            "title": new_list.title,
-            "board_id": new_list.board_id,
-            "order": new_list.order,
-            "created_at": new_list.created_at.isoformat()
-        }
+        "list": LIST.dump(new_list)
     }), 201
 
-@app.route('/boards/<int:board_id>/lists', methods=['GET'])
+@api.route('/boards/<int:board_id>/lists', methods=['GET'])
 @jwt_required()
 def get_board_lists(board_id):
-    current_user_id = get_jwt_identity()
-    board = Board.query.filter_by(id=board_id, owner_id=current_user_id).first()
+    current_user_id = current_principal().user_id
+    fields, error_msg = LIST.parse_fields(request.args.get('fields'))
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
 
     if not board:
         return jsonify({"msg": "Board not found or you don't have permission"}), 404
 
-    # Obtener las listas ordenadas por el campo 'order'
-    lists = List.query.filter_by(board_id=board_id).order_by(List.order).all()
-
-    lists_data = []
-    for lst in lists:
-        lists_data.append({
-            "id": lst.id,
-            "title": lst.title,
-            "board_id": lst.board_id,
-            "order": lst.order,
-            "created_at": lst.created_at.isoformat()
-        })
-    return jsonify(lists_data), 200
+    not_modified = conditional_get(board.id, board.revision)
+    if not_modified:
+        return not_modified
+
+    def build():
+        # Obtener las listas ordenadas por el campo 'order' (el id desempata para el cursor)
+        lists, next_cursor, error_response = paginate_keyset(List.query.filter_by(board_id=board_id), (List.order, List.id))
+        if error_response:
+            return error_response, 400
+
+        return jsonify({"items": LIST.dump_many(lists, fields), "next_cursor": next_cursor}), 200
+
+    return cached_response(board.id, board.revision, build)
+
+@api.route('/boards/<int:board_id>/full', methods=['GET'])
+@jwt_required()
+def get_board_full(board_id):
+    current_user_id = current_principal().user_id
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
+
+    if not board:
+        return jsonify({"msg": "Board not found or you don't have permission"}), 404
+
+    not_modified = conditional_get(board.id, board.revision)
+    if not_modified:
+        return not_modified
+
+    def build():
+        # Listas -> tarjetas -> asignaciones -> usuario, cargadas con selectin/joined:
+        # una consulta por nivel, sin importar cuántas listas o tarjetas tenga el tablero.
+        lists = List.query.filter_by(board_id=board_id).options(
+            selectinload(List.cards).options(CARD_ASSIGNEES)
+        ).order_by(List.order, List.id).all()
+
+        lists_data = []
+        for lst in lists:
+            cards_data = [CARD.dump(card, assigned_users=serialize_assigned_users(card)) for card in lst.cards]
+            lists_data.append(LIST.dump(lst, cards=cards_data))
+
+        return jsonify(BOARD.dump(board, lists=lists_data)), 200
+
+    return cached_response(board.id, board.revision, build)
+
+@api.route('/boards/<int:board_id>/changes', methods=['GET'])
+@jwt_required()
+def get_board_changes(board_id):
+    current_user_id = current_principal().user_id
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
 
-@app.route('/lists/<int:list_id>', methods=['PUT'])
+    if not board:
+        return jsonify({"msg": "Board not found or you don't have permission"}), 404
+
+    since = request.args.get('since', type=int)
+    if since is None or not 0 <= since <= board.revision:
+        return jsonify({"msg": f"since must be a revision between 0 and {board.revision}"}), 400
+
+    not_modified = conditional_get(board.id, board.revision)
+    if not_modified:
+        return not_modified
+
+    # Con demasiados cambios, o si el registro ya no llega hasta 'since' (purgado o
+    # anterior al registro), el cliente debe recargar /boards/<id>/full.
+    max_entries = current_app.config['CHANGES_MAX_ENTRIES']
+    entries = db.session.query(ChangeLog.revision, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op) \
+        .filter(ChangeLog.board_id == board_id, ChangeLog.revision > since) \
+        .order_by(ChangeLog.revision, ChangeLog.id).limit(max_entries + 1).all()
+    if len(entries) > max_entries or (since < board.revision and (not entries or entries[0].revision != since + 1)):
+        return jsonify({"revision": board.revision, "reset": True}), 200
+
+    # Solo cuenta la última operación de cada entidad
+    latest = {}
+    for _, entity, entity_id, op in entries:
+        latest[(entity, entity_id)] = op
+    upsert_ids = {entity: [] for entity in CHANGE_ENTITIES.values()}
+    for (entity, entity_id), op in latest.items():
+        if op == 'upsert':
+            upsert_ids[entity].append(entity_id)
+
+    upserts = {entity: [] for entity in CHANGE_ENTITIES.values()}
+    if upsert_ids['board']:
+        upserts['board'].append(BOARD.dump(board))
+    if upsert_ids['list']:
+        upserts['list'] = LIST.dump_many(
+            List.query.filter(List.board_id == board_id, List.id.in_(upsert_ids['list'])).all()
+        )
+    if upsert_ids['card']:
+        cards = Card.query.join(List).filter(List.board_id == board_id, Card.id.in_(upsert_ids['card'])) \
+            .options(CARD_ASSIGNEES).all()
+        # Misma forma que las tarjetas de /boards/<id>/full
+        upserts['card'] = [CARD.dump(card, assigned_users=serialize_assigned_users(card)) for card in cards]
+    if upsert_ids['comment']:
+        comments = Comment.query.join(Card).join(List) \
+            .filter(List.board_id == board_id, Comment.id.in_(upsert_ids['comment'])).options(COMMENT_AUTHOR).all()
+        for comment in comments:
+            commenter = comment.commenter
+            upserts['comment'].append(COMMENT.dump(comment, username=commenter.username if commenter else "Unknown"))
+    if upsert_ids['assignment']:
+        assignments = CardAssignment.query.join(Card).join(List) \
+            .filter(List.board_id == board_id, CardAssignment.id.in_(upsert_ids['assignment'])).all()
+        upserts['assignment'] = ASSIGNMENT.dump_many(assignments)
+
+    # Lo que ya no existe en este tablero (borrado o movido a otro) se informa como borrado
+    deletes = {entity: [] for entity in CHANGE_ENTITIES.values()}
+    present = {(entity, item["id"]) for entity, items in upserts.items() for item in items}
+    for (entity, entity_id), op in latest.items():
+        if (entity, entity_id) not in present:
+            deletes[entity].append(entity_id)
+
+    return jsonify({"revision": board.revision, "reset": False, "upserts": upserts, "deletes": deletes}), 200
+
+@api.route('/boards/<int:board_id>/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string']) # EventSource no puede enviar cabeceras: ?jwt=<token>
+def get_board_events(board_id):
+    current_user_id = current_principal().user_id
+    board = Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first()
+
+    if not board:
+        return jsonify({"msg": "Board not found or you don't have permission"}), 404
+
+    # Canal Server-Sent Events: un evento 'change' por cada commit que modifica el tablero,
+    # con su nueva revisión; el cliente pide después /boards/<id>/changes?since=.
+    # Primero la suscripción y después la revisión, en una transacción nueva: un commit
+    # entre ambas llega como evento o ya está en 'hello', nunca se pierde.
+    subscription = event_broker().subscribe(f'board:{board_id}')
+    db.session.rollback()
+    revision = db.session.query(Board.revision).filter_by(id=board_id).scalar()
+    db.session.close() # La conexión vuelve al pool: el stream no la necesita
+    heartbeat = current_app.config['SSE_HEARTBEAT_SECONDS']
+
+    def stream():
+        try:
+            yield f'retry: 5000\nevent: hello\ndata: {json.dumps({"revision": revision})}\n\n'
+            while True:
+                message = subscription.get(timeout=heartbeat)
+                if subscription.overflowed:
+                    # Se perdieron eventos: el cliente debe resincronizar y reconectar
+                    yield 'event: reset\ndata: {}\n\n'
+                    return
+                if message is None:
+                    yield ': keepalive\n\n' # Mantiene viva la conexión a través de proxies
+                else:
+                    yield f'event: change\ndata: {message}\n\n'
+        finally:
+            subscription.close()
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no', # Sin buffer en nginx
+    })
+
+@api.route('/lists/<int:list_id>', methods=['PUT'])
 @jwt_required()
 def update_list(list_id):
-    current_user_id = get_jwt_identity()
     # Verificar que la lista exista y que el usuario sea el dueño del tablero al que pertenece
-    lst = List.query.get(list_id)
+    lst = live_list(list_id)
     if not lst:
         return jsonify({"msg": "List not found"}), 404
 
-    board = Board.query.filter_by(id=lst.board_id, owner_id=current_user_id).first()
-    if not board:
+    if not current_principal().owns_board(lst.board_id):
         return jsonify({"msg": "List not found or you don't have permission"}), 404
 
     data = request.get_json()
     title = data.get('title', lst.title)
     order = data.get('order', lst.order)
+    after_list_id = data.get('after_list_id') # Opcional: colocar justo después de esta lista
+    before_list_id = data.get('before_list_id') # Opcional: colocar justo antes de esta lista
 
     if not title: # El título de la lista sigue siendo obligatorio
         return jsonify({"msg": "Title cannot be empty"}), 400
 
+    if after_list_id is not None or before_list_id is not None:
+        order, error_msg = position_between(List, List.board_id, lst.board_id, lst.id, after_list_id, before_list_id)
+        if error_msg:
+            return jsonify({"msg": error_msg}), 400
+
     lst.title = title
     lst.order = order
     db.session.commit()
 
     return jsonify({
         "msg": "List updated successfully",
-        "list": {
-            "id": lst.id,
-            "title": lst.title,
-            "board_id": lst.board_id,
-            "order": lst.order,
-            "created_at": lst.created_at.isoformat()
-        }
+        "list": LIST.dump(lst)
     }), 200
 
-@app.route('/lists/<int:list_id>', methods=['DELETE'])
+@api.route('/lists/<int:list_id>', methods=['DELETE'])
 @jwt_required()
 def delete_list(list_id):
-    current_user_id = get_jwt_identity()
     # Verificar que la lista exista y que el usuario sea el dueño del tablero al que pertenece
-    lst = List.query.get(list_id)
+    lst = live_list(list_id)
     if not lst:
         return jsonify({"msg": "List not found"}), 404
 
-    board = Board.query.filter_by(id=lst.board_id, owner_id=current_user_id).first()
-    if not board:
+    board_id = lst.board_id
+    if not current_principal().owns_board(board_id):
         return jsonify({"msg": "List not found or you don't have permission"}), 404
 
     db.session.delete(lst)
     db.session.commit()
+    invalidate_card_access(board_id=board_id)
 
     return jsonify({"msg": "List deleted successfully"}), 200
 
@@ -446,42 +2560,110 @@ def delete_list(list_id):
 # Rutas de Gestión de Tarjetas (Cards)
 # =========================================================
 
+# Resolución de permisos de tarjeta: tarjeta -> lista -> tablero -> dueño/asignado
+# en una sola consulta, memoizada por petición y opcionalmente entre peticiones.
+def card_access_cache():
+    # Una caché por aplicación, creada en create_app() con PERMISSION_CACHE_TTL
+    return current_app.extensions['card_access_cache']
+
+class CardAccess:
+    """Acceso de un usuario a una tarjeta, ya resuelto."""
+    __slots__ = ('card_id', 'list_id', 'board_id', 'owner_id', 'is_assigned')
+
+    def __init__(self, card_id, list_id, board_id, owner_id, is_assigned):
+        self.card_id = card_id
+        self.list_id = list_id
+        self.board_id = board_id
+        self.owner_id = owner_id
+        self.is_assigned = is_assigned
+
+    @property
+    def card(self):
+        # Si la tarjeta ya se cargó al resolver el permiso, sale del identity map sin consulta
+        return db.session.get(Card, self.card_id)
+
+def resolve_card_access_many(card_ids, user_id):
+    """Resuelve el acceso de user_id a varias tarjetas con una sola consulta.
+
+    Devuelve {card_id: CardAccess}; las tarjetas inexistentes no aparecen.
+    """
+    memo = g.setdefault('card_access', {})
+
+    accesses = {}
+    pending = []
+    for card_id in card_ids:
+        key = (user_id, card_id)
+        access = memo.get(key) or card_access_cache().get(key)
+        if access is None:
+            pending.append(card_id)
+        else:
+            accesses[card_id] = memo[key] = access
+
+    if pending:
+        is_assigned = exists().where(CardAssignment.card_id == Card.id, CardAssignment.user_id == user_id)
+        rows = db.session.query(Card, List.board_id, Board.owner_id, is_assigned) \
+            .join(List, Card.list_id == List.id) \
+            .join(Board, List.board_id == Board.id) \
+            .filter(Card.id.in_(pending), Board.deleted_at.is_(None)).all()
+        for card, board_id, owner_id, assigned in rows:
+            access = CardAccess(card.id, card.list_id, board_id, owner_id, bool(assigned))
+            card_access_cache().set((user_id, card.id), access, tags=(('card', card.id), ('board', board_id)))
+            accesses[card.id] = memo[(user_id, card.id)] = access
+            # Referencia fuerte durante la petición para que access.card salga del identity map
+            g.setdefault('loaded_cards', []).append(card)
+
+    return accesses
+
+def resolve_card_access(card_id, user_id):
+    """Devuelve el CardAccess de user_id sobre card_id, o None si la tarjeta no existe."""
+    return resolve_card_access_many([card_id], user_id).get(card_id)
+
+def invalidate_card_access(card_id=None, board_id=None):
+    # Llamar al cambiar asignaciones, mover tarjetas entre tableros o borrar tableros/tarjetas
+    card_access_cache().invalidate_tags(('card', card_id), ('board', board_id))
+    g.pop('card_access', None)
+
 # Función auxiliar para verificar permisos de tarjeta
 def check_card_permission(card_id, current_user_id):
-    card = Card.query.get(card_id)
-    if not card:
+    access = resolve_card_access(card_id, current_user_id)
+    if not access:
         return None, jsonify({"msg": "Card not found"}), 404
 
-    lst = List.query.get(card.list_id)
-    if not lst:
-        return None, jsonify({"msg": "Internal error: List for card not found"}), 500
-
-    board = Board.query.get(lst.board_id)
-    if not board:
-        return None, jsonify({"msg": "Internal error: Board for list not found"}), 500
-
     # Permiso: el usuario es propietario del tablero O la tarjeta está asignada a él
-    is_board_owner = (str(board.owner_id) == current_user_id)
-    is_assigned_to_card = CardAssignment.query.filter_by(card_id=card_id, user_id=current_user_id).first() is not None
+    is_board_owner = access.owner_id == current_user_id
 
-    if not (is_board_owner or is_assigned_to_card):
+    if not (is_board_owner or access.is_assigned):
         return None, jsonify({"msg": "You do not have permission to access/modify this card."}), 403
-    
-    return card, None, None # Devuelve la tarjeta si hay permiso
 
+    return access, None, None # Devuelve el acceso resuelto si hay permiso
+
+
+def parse_due_date_update(due_date_str, current_due_date):
+    # En actualizaciones: ausente conserva la fecha, 'null' la borra, ISO 8601 la cambia.
+    # Devuelve (due_date, error_msg).
+    if not due_date_str:
+        return current_due_date, None
+    if not isinstance(due_date_str, str):
+        return None, "due_date must be an ISO 8601 string or 'null'"
+    if due_date_str.lower() == 'null':
+        return None, None
+    try:
+        return datetime.fromisoformat(due_date_str), None
+    except ValueError:
+        return None, "Invalid due_date format. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS) or 'null'"
 
-@app.route('/lists/<int:list_id>/cards', methods=['POST'])
+
+@api.route('/lists/<int:list_id>/cards', methods=['POST'])
 @jwt_required()
 def create_card(list_id):
-    current_user_id = get_jwt_identity()
-    lst = List.query.get(list_id)
+    current_user_id = current_principal().user_id
+    lst = live_list(list_id)
 
     if not lst:
         return jsonify({"msg": "List not found"}), 404
 
     # Verificar que el usuario tenga permiso sobre el tablero de la lista (solo el dueño puede crear tarjetas)
-    board = Board.query.filter_by(id=lst.board_id, owner_id=current_user_id).first()
-    if not board:
+    if not current_principal().owns_board(lst.board_id):
         return jsonify({"msg": "List not found or you don't have permission to create cards here"}), 403 # 403 Forbidden
 
     data = request.get_json()
@@ -501,16 +2683,15 @@ def create_card(list_id):
         except ValueError:
             return jsonify({"msg": "Invalid due_date format. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)"}), 400
 
-    # Si no se proporciona un orden, ponla al final de la lista
+    # Si no se proporciona un orden, ponla al final de la lista (calculado dentro del INSERT)
     if order is None:
-        max_order = db.session.query(db.func.max(Card.order)).filter_by(list_id=list_id).scalar()
-        order = (max_order if max_order is not None else -1) + 1
+        order = append_order(Card, Card.list_id, list_id)
 
     new_card = Card(
         title=title,
         description=description,
         list_id=list_id,
-        creator_id=int(current_user_id), # Asegurarse de que creator_id sea int
+        creator_id=current_user_id,
         due_date=due_date,
         order=order
     )
@@ -519,76 +2700,84 @@ def create_card(list_id):
 
     return jsonify({
         "msg": "Card created successfully",
-        "card": {
-            "id": new_card.id,
-            "title": new_card.title,
-            "description": new_card.description,
-            "list_id": new_card.list_id,
-            "creator_id": new_card.creator_id,
-            "due_date": new_card.due_date.isoformat() if new_card.due_date else None,
-            "order": new_card.order,
-            "created_at": new_card.created_at.isoformat()
-        }
+        "card": CARD.dump(new_card)
     }), 201
 
-@app.route('/lists/<int:list_id>/cards', methods=['GET'])
+@api.route('/lists/<int:list_id>/cards', methods=['GET'])
 @jwt_required()
 def get_list_cards(list_id):
-    current_user_id = get_jwt_identity()
-    lst = List.query.get(list_id)
+    current_user_id = current_principal().user_id
+    view, fields, error_msg = parse_card_view()
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+    # Tablero, dueño y revisión en una sola consulta por clave primaria
+    lst = db.session.query(List.board_id, Board.owner_id, Board.revision) \
+        .join(Board, List.board_id == Board.id) \
+        .filter(List.id == list_id, Board.deleted_at.is_(None)).first()
 
     if not lst:
         return jsonify({"msg": "List not found"}), 404
 
     # Verificar permiso sobre el tablero
-    board = Board.query.filter_by(id=lst.board_id, owner_id=current_user_id).first()
-    if not board:
+    if lst.owner_id != current_user_id:
         return jsonify({"msg": "List not found or you don't have permission to its board"}), 403
 
-    cards = Card.query.filter_by(list_id=list_id).order_by(Card.order).all()
+    not_modified = conditional_get(lst.board_id, lst.revision)
+    if not_modified:
+        return not_modified
 
-    cards_data = []
-    for card in cards:
-        cards_data.append({
-            "id": card.id,
-            "title": card.title,
-            "description": card.description,
-            "list_id": card.list_id,
-            "creator_id": card.creator_id,
-            "due_date": card.due_date.isoformat() if card.due_date else None,
-            "order": card.order,
-            "created_at": card.created_at.isoformat(),
-            "updated_at": card.updated_at.isoformat()
-        })
-    return jsonify(cards_data), 200
+    def build():
+        if view == 'summary':
+            query = db.session.query(*card_summary_columns(fields)).filter(Card.list_id == list_id)
+        else:
+            query = Card.query.filter_by(list_id=list_id)
+        cards, next_cursor, error_response = paginate_keyset(query, (Card.order, Card.id))
+        if error_response:
+            return error_response, 400
+
+        if view == 'summary':
+            items = dump_card_summaries(cards, fields)
+        else:
+            items = CARD.dump_many(cards, fields)
+        return jsonify({"items": items, "next_cursor": next_cursor}), 200
 
-@app.route('/cards/<int:card_id>', methods=['GET'])
+    return cached_response(lst.board_id, lst.revision, build)
+
+@api.route('/cards/<int:card_id>', methods=['GET'])
 @jwt_required()
 def get_single_card(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    fields, error_msg = CARD.parse_fields(request.args.get('fields'))
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
 
-    return jsonify({
-        "id": card.id,
-        "title": card.title,
-        "description": card.description,
-        "list_id": card.list_id,
-        "creator_id": card.creator_id,
-        "due_date": card.due_date.isoformat() if card.due_date else None,
-        "order": card.order,
-        "created_at": card.created_at.isoformat(),
-        "updated_at": card.updated_at.isoformat()
-    }), 200
+    revision = board_revision(access.board_id)
+    not_modified = conditional_get(access.board_id, revision)
+    if not_modified:
+        return not_modified
+
+    def build():
+        card = access.card
+        if not card: # Puede pasar si el permiso vino de la caché y la tarjeta se borró después
+            return jsonify({"msg": "Card not found"}), 404
+
+        return jsonify(CARD.dump(card, fields)), 200
 
-@app.route('/cards/<int:card_id>', methods=['PUT'])
+    return cached_response(access.board_id, revision, build)
+
+@api.route('/cards/<int:card_id>', methods=['PUT'])
 @jwt_required()
 def update_card(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
+    card = access.card
+    if not card: # Puede pasar si el permiso vino de la caché y la tarjeta se borró después
+        return jsonify({"msg": "Card not found"}), 404
 
     data = request.get_json()
     title = data.get('title', card.title)
@@ -599,16 +2788,9 @@ def update_card(card_id):
     if not title:
         return jsonify({"msg": "Title cannot be empty"}), 400
 
-    if due_date_str:
-        try:
-            if due_date_str.lower() == 'null':
-                due_date = None
-            else:
-                due_date = datetime.fromisoformat(due_date_str)
-        except ValueError:
-            return jsonify({"msg": "Invalid due_date format. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS) or 'null'"}), 400
-    else:
-        due_date = card.due_date
+    due_date, error_msg = parse_due_date_update(due_date_str, card.due_date)
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
 
     card.title = title
     card.description = description
@@ -618,36 +2800,34 @@ def update_card(card_id):
 
     return jsonify({
         "msg": "Card updated successfully",
-        "card": {
-            "id": card.id,
-            "title": card.title,
-            "description": card.description,
-            "list_id": card.list_id,
-            "creator_id": card.creator_id,
-            "due_date": card.due_date.isoformat() if card.due_date else None,
-            "order": card.order,
-            "created_at": card.created_at.isoformat(),
-            "updated_at": card.updated_at.isoformat()
-        }
+        "card": CARD.dump(card)
     }), 200
 
-@app.route('/cards/<int:card_id>/move', methods=['PUT'])
+@api.route('/cards/<int:card_id>/move', methods=['PUT'])
 @jwt_required()
 def move_card(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
+    card = access.card
+    if not card: # Puede pasar si el permiso vino de la caché y la tarjeta se borró después
+        return jsonify({"msg": "Card not found"}), 404
 
     data = request.get_json()
     new_list_id = data.get('new_list_id')
     new_order = data.get('new_order')
+    after_card_id = data.get('after_card_id') # Opcional: colocar justo después de esta tarjeta
+    before_card_id = data.get('before_card_id') # Opcional: colocar justo antes de esta tarjeta
 
     if not new_list_id:
         return jsonify({"msg": "new_list_id is required"}), 400
 
-    target_list = List.query.get(new_list_id)
-    if not target_list:
+    # Lista destino y dueño de su tablero en una sola consulta
+    target = db.session.query(List.board_id, Board.owner_id) \
+        .join(Board, List.board_id == Board.id) \
+        .filter(List.id == new_list_id, Board.deleted_at.is_(None)).first()
+    if not target:
         return jsonify({"msg": "Target list not found"}), 404
 
     # Verificar permiso sobre el tablero de destino: el usuario debe ser dueño del tablero destino
@@ -655,17 +2835,12 @@ def move_card(card_id):
     # La lógica actual restringe mover solo dentro de tableros del mismo propietario.
     # Para permitir mover a tableros donde el usuario está asignado, la lógica sería más compleja.
     # Por simplicidad, se mantiene que el destino sea un tablero donde el usuario tiene control (dueño).
-    target_board = Board.query.filter_by(id=target_list.board_id, owner_id=current_user_id).first()
-    if not target_board: # Si el usuario NO es el dueño del tablero de destino
-        # Y tampoco es dueño del tablero original, entonces no tiene permiso
+    if target.owner_id != current_user_id: # Si el usuario NO es el dueño del tablero de destino
+        # Y tampoco es dueño del tablero original (ya resuelto en access), entonces no tiene permiso
         # para mover la tarjeta A OTRA LISTA si la lista destino está en un tablero diferente al suyo
         # o si no es dueño del tablero destino.
         # Por ahora, solo el dueño del tablero original puede moverla entre sus propias listas.
-        source_list = List.query.get(card.list_id)
-        source_board = Board.query.get(source_list.board_id)
-        
-        # Si no es el dueño del tablero de destino Y la tarjeta NO es del tablero original del usuario
-        if str(source_board.owner_id) != current_user_id:
+        if access.owner_id != current_user_id:
              return jsonify({"msg": "You do not have permission to move this card to this target list."}), 403
 
 
@@ -675,48 +2850,254 @@ def move_card(card_id):
     # si el usuario actual solo está asignado a la tarjeta.
     # El `check_card_permission` ya asegura que el usuario puede al menos ver/modificar la tarjeta.
 
-    card.list_id = new_list_id
-    if new_order is not None:
-        card.order = new_order
-    else:
-        max_order = db.session.query(db.func.max(Card.order)).filter_by(list_id=new_list_id).scalar()
-        card.order = (max_order if max_order is not None else -1) + 1
+    if new_order is None:
+        # Entre dos vecinas (punto medio) o al final; solo se actualiza esta fila
+        new_order, error_msg = position_between(Card, Card.list_id, new_list_id, card.id, after_card_id, before_card_id)
+        if error_msg:
+            return jsonify({"msg": error_msg}), 400
 
+    card.list_id = new_list_id
+    card.order = new_order
     db.session.commit()
+    if target.board_id != access.board_id:
+        invalidate_card_access(card_id=card.id)
 
     return jsonify({
         "msg": "Card moved successfully",
-        "card": {
-            "id": card.id,
-            "title": card.title,
-            "list_id": card.list_id,
-            "order": card.order
-        }
+        "card": CARD.dump(card, CARD_POSITION)
+    }), 200
+
+@api.route('/lists/<int:list_id>/reorder', methods=['PUT'])
+@jwt_required()
+def reorder_list_cards(list_id):
+    lst = live_list(list_id)
+
+    if not lst:
+        return jsonify({"msg": "List not found"}), 404
+
+    # Reordenar una lista es una operación del tablero: solo su dueño puede hacerlo
+    if not current_principal().owns_board(lst.board_id):
+        return jsonify({"msg": "List not found or you don't have permission"}), 403
+
+    # {"moves": [{"card_id": 1, "after_card_id": 7}, {"card_id": 2, "before_card_id": 5}, ...]}
+    # Cada tarjeta (de cualquier lista del mismo tablero) pasa a esta lista en la posición indicada.
+    # Los movimientos se aplican en orden y en una única transacción.
+    moves = (request.get_json() or {}).get('moves')
+    if not isinstance(moves, list) or not moves:
+        return jsonify({"msg": "moves must be a non-empty list"}), 400
+
+    card_ids = [move.get('card_id') for move in moves if isinstance(move, dict) and is_json_int(move.get('card_id'))]
+    if len(card_ids) != len(moves):
+        return jsonify({"msg": "Each move must be an object with an integer card_id"}), 400
+    error_msg = next(filter(None, (bulk_int_error(move, 'after_card_id', 'before_card_id') for move in moves)), None)
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    cards = {card.id: card for card in Card.query.join(List).filter(
+        Card.id.in_(card_ids), List.board_id == lst.board_id
+    ).all()}
+    missing = [card_id for card_id in card_ids if card_id not in cards]
+    if missing:
+        return jsonify({"msg": f"Cards not found in this board: {missing}"}), 404
+
+    for move in moves:
+        card = cards[move['card_id']]
+        order, error_msg = position_between(
+            Card, Card.list_id, list_id, card.id, move.get('after_card_id'), move.get('before_card_id')
+        )
+        if error_msg:
+            db.session.rollback()
+            return jsonify({"msg": f"Card {card.id}: {error_msg}"}), 400
+        card.list_id = list_id
+        card.order = order
+        db.session.flush() # Los siguientes movimientos deben ver esta posición
+
+    db.session.commit()
+
+    return jsonify({
+        "msg": "Cards reordered successfully",
+        "cards": [CARD.dump(card, CARD_POSITION) for card in cards.values()]
     }), 200
 
-@app.route('/cards/<int:card_id>', methods=['DELETE'])
+@api.route('/cards/<int:card_id>', methods=['DELETE'])
 @jwt_required()
 def delete_card(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
+    card = access.card
+    if not card: # Puede pasar si el permiso vino de la caché y la tarjeta se borró después
+        return jsonify({"msg": "Card not found"}), 404
 
     db.session.delete(card)
     db.session.commit()
+    invalidate_card_access(card_id=card_id)
 
     return jsonify({"msg": "Card deleted successfully"}), 200
 
+# =========================================================
+# Rutas de Archivo de Tarjetas
+# =========================================================
+
+def parse_older_than_days(data, required=False):
+    # Devuelve (días o None, error_msg)
+    days = data.get('older_than_days')
+    if days is None:
+        return None, "older_than_days is required" if required else None
+    if not isinstance(days, int) or isinstance(days, bool) or days < 1:
+        return None, "older_than_days must be a positive integer"
+    return days, None
+
+def get_archived_card(archived_card_id, current_user_id):
+    # (tarjeta archivada, error, código): la ve el dueño del tablero o quien estaba asignado
+    row = db.session.query(ArchivedCard, Board.owner_id).join(Board, ArchivedCard.board_id == Board.id) \
+        .filter(ArchivedCard.id == archived_card_id, Board.deleted_at.is_(None)).first()
+    if not row:
+        return None, jsonify({"msg": "Archived card not found"}), 404
+    archived_card, owner_id = row
+    if owner_id != current_user_id and not db.session.query(exists().where(
+            ArchivedCardAssignment.archived_card_id == archived_card_id,
+            ArchivedCardAssignment.user_id == current_user_id)).scalar():
+        return None, jsonify({"msg": "You do not have permission to access this archived card."}), 403
+    return archived_card, None, None
+
+@api.route('/cards/<int:card_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_card(card_id):
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
+    if error_response:
+        return error_response, status_code
+
+    archived_ids = archive_cards([card_id], current_user_id)
+    if not archived_ids: # Puede pasar si el permiso vino de la caché y la tarjeta se borró después
+        return jsonify({"msg": "Card not found"}), 404
+    db.session.commit()
+    invalidate_card_access(card_id=card_id)
+
+    return jsonify({
+        "msg": "Card archived successfully",
+        "archived_card": ARCHIVED_CARD.dump(db.session.get(ArchivedCard, archived_ids[card_id]))
+    }), 200
+
+@api.route('/lists/<int:list_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_list_cards(list_id):
+    # Archiva todas las tarjetas de la lista, o solo las que llevan older_than_days sin cambios
+    current_user_id = current_principal().user_id
+    lst = live_list(list_id)
+    if not lst or not current_principal().owns_board(lst.board_id):
+        return jsonify({"msg": "List not found or you don't have permission"}), 404
+
+    days, error_msg = parse_older_than_days(request.get_json(silent=True) or {})
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    conditions = [Card.list_id == list_id]
+    if days:
+        conditions.append(card_age_before(days))
+    archived = archive_where(*conditions, archived_by=current_user_id,
+                             batch_size=current_app.config['ARCHIVE_BATCH_SIZE'])
+    invalidate_card_access(board_id=lst.board_id)
+
+    return jsonify({"msg": "Cards archived successfully", "archived": archived}), 200
+
+@api.route('/boards/<int:board_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_board_cards(board_id):
+    # Archiva las tarjetas del tablero sin cambios desde hace older_than_days días
+    current_user_id = current_principal().user_id
+    if not Board.query.filter_by(id=board_id, owner_id=current_user_id, deleted_at=None).first():
+        return jsonify({"msg": "Board not found or you don't have permission"}), 404
+
+    days, error_msg = parse_older_than_days(request.get_json(silent=True) or {}, required=True)
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    archived = archive_where(List.board_id == board_id, card_age_before(days), archived_by=current_user_id,
+                             batch_size=current_app.config['ARCHIVE_BATCH_SIZE'])
+    invalidate_card_access(board_id=board_id)
+
+    return jsonify({"msg": "Cards archived successfully", "archived": archived}), 200
+
+@api.route('/boards/<int:board_id>/archived-cards', methods=['GET'])
+@jwt_required()
+def get_archived_cards(board_id):
+    # De la más a la menos recientemente archivada; ?q= busca en título y descripción, ?list_id= filtra por lista de origen
+    # Comprobación en la base: la caché de tableros propios no ve un borrado hecho en otro worker
+    board = Board.query.filter_by(id=board_id, owner_id=current_principal().user_id, deleted_at=None).first()
+    if not board:
+        return jsonify({"msg": "Board not found or you don't have permission"}), 404
+    fields, error_msg = ARCHIVED_CARD.parse_fields(request.args.get('fields'))
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    query = ArchivedCard.query.filter(ArchivedCard.board_id == board_id)
+    list_id = request.args.get('list_id', type=int)
+    if list_id:
+        query = query.filter(ArchivedCard.list_id == list_id)
+    q = request.args.get('q')
+    if q:
+        match = build_search_query(q) if search_enabled() else None
+        if match:
+            query = query.filter(ArchivedCard.id.in_(search_ids('archived', match)))
+        else:
+            query = query.filter(ArchivedCard.title.ilike(f'%{q}%'))
+
+    archived_cards, next_cursor, error_response = paginate_keyset(query, (ArchivedCard.id,), descending=True)
+    if error_response:
+        return error_response, 400
+
+    return jsonify({"items": ARCHIVED_CARD.dump_many(archived_cards, fields), "next_cursor": next_cursor}), 200
+
+@api.route('/archived-cards/<int:archived_card_id>', methods=['GET'])
+@jwt_required()
+def get_single_archived_card(archived_card_id):
+    current_user_id = current_principal().user_id
+    archived_card, error_response, status_code = get_archived_card(archived_card_id, current_user_id)
+    if error_response:
+        return error_response, status_code
+
+    return jsonify(ARCHIVED_CARD.dump(
+        archived_card,
+        comments=ARCHIVED_COMMENT.dump_many(archived_card.comments),
+        assigned_users=[assignment.user_id for assignment in archived_card.assignments]
+    )), 200
+
+@api.route('/archived-cards/<int:archived_card_id>/restore', methods=['POST'])
+@jwt_required()
+def restore_card(archived_card_id):
+    # Vuelve a su lista de origen o a list_id (del mismo tablero); solo el dueño del tablero
+    current_user_id = current_principal().user_id
+    archived_card, error_response, status_code = get_archived_card(archived_card_id, current_user_id)
+    if error_response:
+        return error_response, status_code
+    if not current_principal().owns_board(archived_card.board_id):
+        return jsonify({"msg": "Only the board owner can restore archived cards"}), 403
+
+    list_id = (request.get_json(silent=True) or {}).get('list_id') or archived_card.list_id
+    if not isinstance(list_id, int):
+        return jsonify({"msg": "list_id must be an integer"}), 400
+    lst = live_list(list_id)
+    if not lst or lst.board_id != archived_card.board_id:
+        return jsonify({"msg": "Target list not found in the card's board; pass list_id"}), 404
+
+    card = restore_archived_card(archived_card, list_id)
+    db.session.commit()
+
+    return jsonify({"msg": "Card restored successfully", "card": CARD.dump(card)}), 200
+
 # =========================================================
 # Rutas para Asignaciones y Comentarios
 # =========================================================
 
 # --- Rutas para Asignaciones de Tarjetas ---
-@app.route('/cards/<int:card_id>/assign', methods=['POST'])
+@api.route('/cards/<int:card_id>/assign', methods=['POST'])
 @jwt_required()
 def assign_user_to_card(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
 
@@ -737,22 +3118,18 @@ def assign_user_to_card(card_id):
     new_assignment = CardAssignment(card_id=card_id, user_id=user_to_assign_id)
     db.session.add(new_assignment)
     db.session.commit()
+    invalidate_card_access(card_id=card_id)
 
     return jsonify({
         "msg": "User assigned to card successfully",
-        "assignment": {
-            "id": new_assignment.id,
-            "card_id": new_assignment.card_id,
-            "user_id": new_assignment.user_id,
-            "assigned_at": new_assignment.assigned_at.isoformat()
-        }
+        "assignment": ASSIGNMENT.dump(new_assignment)
     }), 201
 
-@app.route('/cards/<int:card_id>/unassign', methods=['DELETE'])
+@api.route('/cards/<int:card_id>/unassign', methods=['DELETE'])
 @jwt_required()
 def unassign_user_from_card(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
 
@@ -768,38 +3145,47 @@ def unassign_user_from_card(card_id):
 
     db.session.delete(assignment)
     db.session.commit()
+    invalidate_card_access(card_id=card_id)
 
     return jsonify({"msg": "User unassigned from card successfully"}), 200
 
-@app.route('/cards/<int:card_id>/assignments', methods=['GET'])
+@api.route('/cards/<int:card_id>/assignments', methods=['GET'])
 @jwt_required()
 def get_card_assignments(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
 
-    assignments = CardAssignment.query.filter_by(card_id=card_id).all()
-    assigned_users_data = []
-    for assignment in assignments:
-        user = User.query.get(assignment.user_id)
-        if user:
-            assigned_users_data.append({
-                "assignment_id": assignment.id,
-                "user_id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "assigned_at": assignment.assigned_at.isoformat()
-            })
-    return jsonify(assigned_users_data), 200
+    revision = board_revision(access.board_id)
+    not_modified = conditional_get(access.board_id, revision)
+    if not_modified:
+        return not_modified
+
+    def build():
+        assignments = CardAssignment.query.filter_by(card_id=card_id).options(ASSIGNMENT_USER).all()
+        assigned_users_data = []
+        for assignment in assignments:
+            user = assignment.user
+            if user:
+                assigned_users_data.append({
+                    "assignment_id": assignment.id,
+                    "user_id": user.id,
+                    "username": user.username,
+                    "email": user.email,
+                    "assigned_at": assignment.assigned_at.isoformat()
+                })
+        return jsonify(assigned_users_data), 200
+
+    return cached_response(access.board_id, revision, build)
 
 
 # --- Rutas para Comentarios ---
-@app.route('/cards/<int:card_id>/comments', methods=['POST'])
+@api.route('/cards/<int:card_id>/comments', methods=['POST'])
 @jwt_required()
 def add_comment_to_card(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
 
@@ -809,54 +3195,56 @@ def add_comment_to_card(card_id):
     if not content:
         return jsonify({"msg": "Comment content cannot be empty"}), 400
 
-    new_comment = Comment(content=content, card_id=card_id, user_id=int(current_user_id)) # Asegurarse de que user_id sea int
+    new_comment = Comment(content=content, card_id=card_id, user_id=current_user_id)
     db.session.add(new_comment)
     db.session.commit()
 
     return jsonify({
         "msg": "Comment added successfully",
-        "comment": {
-            "id": new_comment.id,
-            "content": new_comment.content,
-            "card_id": new_comment.card_id,
-            "user_id": new_comment.user_id,
-            "created_at": new_comment.created_at.isoformat()
-        }
+        "comment": COMMENT.dump(new_comment)
     }), 201
 
-@app.route('/cards/<int:card_id>/comments', methods=['GET'])
+@api.route('/cards/<int:card_id>/comments', methods=['GET'])
 @jwt_required()
 def get_card_comments(card_id):
-    current_user_id = get_jwt_identity()
-    card, error_response, status_code = check_card_permission(card_id, current_user_id)
+    current_user_id = current_principal().user_id
+    fields, error_msg = COMMENT.parse_fields(request.args.get('fields'))
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+    access, error_response, status_code = check_card_permission(card_id, current_user_id)
     if error_response:
         return error_response, status_code
 
-    comments = Comment.query.filter_by(card_id=card_id).order_by(Comment.created_at.asc()).all()
-    comments_data = []
-    for comment in comments:
-        commenter = User.query.get(comment.user_id)
-        comments_data.append({
-            "id": comment.id,
-            "content": comment.content,
-            "card_id": comment.card_id,
-            "user_id": comment.user_id,
-            "username": commenter.username if commenter else "Unknown",
-            "created_at": comment.created_at.isoformat()
-        })
-    return jsonify(comments_data), 200
-
-@app.route('/comments/<int:comment_id>', methods=['PUT'])
+    revision = board_revision(access.board_id)
+    not_modified = conditional_get(access.board_id, revision)
+    if not_modified:
+        return not_modified
+
+    def build():
+        comments, next_cursor, error_response = paginate_keyset(
+            Comment.query.filter_by(card_id=card_id).options(COMMENT_AUTHOR), (Comment.created_at, Comment.id)
+        )
+        if error_response:
+            return error_response, 400
+        comments_data = []
+        for comment in comments:
+            commenter = comment.commenter
+            comments_data.append(COMMENT.dump(comment, fields, username=commenter.username if commenter else "Unknown"))
+        return jsonify({"items": comments_data, "next_cursor": next_cursor}), 200
+
+    return cached_response(access.board_id, revision, build)
+
+@api.route('/comments/<int:comment_id>', methods=['PUT'])
 @jwt_required()
 def update_comment(comment_id):
-    current_user_id = get_jwt_identity()
+    current_user_id = current_principal().user_id
     comment = Comment.query.get(comment_id)
 
     if not comment:
         return jsonify({"msg": "Comment not found"}), 404
 
     # Para editar/eliminar comentario, debe ser el propio creador del comentario
-    if str(comment.user_id) != current_user_id:
+    if comment.user_id != current_user_id:
         return jsonify({"msg": "You do not have permission to update this comment"}), 403
 
     data = request.get_json()
@@ -870,26 +3258,20 @@ def update_comment(comment_id):
 
     return jsonify({
         "msg": "Comment updated successfully",
-        "comment": {
-            "id": comment.id,
-            "content": comment.content,
-            "card_id": comment.card_id,
-            "user_id": comment.user_id,
-            "created_at": comment.created_at.isoformat()
-        }
+        "comment": COMMENT.dump(comment)
     }), 200
 
-@app.route('/comments/<int:comment_id>', methods=['DELETE'])
+@api.route('/comments/<int:comment_id>', methods=['DELETE'])
 @jwt_required()
 def delete_comment(comment_id):
-    current_user_id = get_jwt_identity()
+    current_user_id = current_principal().user_id
     comment = Comment.query.get(comment_id)
 
     if not comment:
         return jsonify({"msg": "Comment not found"}), 404
 
     # Para editar/eliminar comentario, debe ser el propio creador del comentario
-    if str(comment.user_id) != current_user_id:
+    if comment.user_id != current_user_id:
         return jsonify({"msg": "You do not have permission to delete this comment"}), 403
 
     db.session.delete(comment)
@@ -897,97 +3279,574 @@ def delete_comment(comment_id):
 
     return jsonify({"msg": "Comment deleted successfully"}), 200
 
+# =========================================================
+# Operaciones masivas sobre tarjetas
+# =========================================================
+
+# POST /cards/bulk aplica muchas operaciones con una sola comprobación de permisos
+# en lote y un único commit. Cada operación aplica las mismas reglas que su ruta
+# individual y devuelve su propio resultado:
+#   {"op": "create", "list_id": 1, "title": "...", "description": "...", "due_date": "..."}
+#   {"op": "update", "card_id": 5, "title": "...", "description": "...", "due_date": "...|null", "order": 3}
+#   {"op": "move",   "card_id": 5, "new_list_id": 2, "after_card_id": 7, "before_card_id": 8, "new_order": 3}
+#   {"op": "delete", "card_id": 5}
+#   {"op": "assign", "card_id": 5, "user_id": 3}
+
+def is_json_int(value):
+    # Ids y órdenes de las operaciones son enteros JSON: ni bool (True == 1) ni listas u
+    # objetos, que no sirven como clave o romperían el orden y harían fallar el lote con un 500
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def bulk_int_error(op, *names):
+    # Mensaje de error si alguno de los enteros opcionales presentes no lo es
+    for name in names:
+        if op.get(name) is not None and not is_json_int(op[name]):
+            return f"{name} must be an integer"
+    return None
+
+def bulk_text_error(op):
+    # Título y descripción, si vienen, deben ser texto (el título además no vacío)
+    if 'title' in op and (not isinstance(op['title'], str) or not op['title']):
+        return "title must be a non-empty string"
+    if op.get('description') is not None and not isinstance(op['description'], str):
+        return "description must be a string"
+    return None
+
+class BulkContext:
+    """Datos precargados en lote para validar todas las operaciones sin consultas por elemento."""
+
+    def __init__(self, operations, current_user_id):
+        self.current_user_id = current_user_id
+
+        card_ids = {op.get('card_id') for op in operations if op.get('op') != 'create' and is_json_int(op.get('card_id'))}
+        self.accesses = resolve_card_access_many(card_ids, current_user_id)
+        self.cards = {card.id: card for card in Card.query.filter(Card.id.in_(self.accesses)).all()} if self.accesses else {}
+
+        list_ids = {op.get('list_id') for op in operations if op.get('op') == 'create' and is_json_int(op.get('list_id'))} | \
+                   {op.get('new_list_id') for op in operations if op.get('op') == 'move' and is_json_int(op.get('new_list_id'))}
+        self.list_owners = dict(
+            db.session.query(List.id, Board.owner_id).join(Board, List.board_id == Board.id)
+            .filter(List.id.in_(list_ids), Board.deleted_at.is_(None)).all()
+        ) if list_ids else {}
+
+        user_ids = {op.get('user_id') for op in operations if op.get('op') == 'assign' and is_json_int(op.get('user_id'))}
+        self.user_ids = {user_id for user_id, in db.session.query(User.id).filter(User.id.in_(user_ids)).all()} if user_ids else set()
+        self.assigned = set(
+            db.session.query(CardAssignment.card_id, CardAssignment.user_id)
+            .filter(CardAssignment.card_id.in_(card_ids)).all()
+        ) if card_ids else set()
+
+        self.deleted = set()
+        self.touched_cards = set() # Tarjetas cuya entrada en la caché de permisos hay que invalidar
+
+    def card_for(self, op):
+        # Devuelve (card, status, msg) aplicando la misma regla que check_card_permission
+        card_id = op.get('card_id')
+        if not is_json_int(card_id):
+            return None, 400, "card_id must be an integer"
+        access = self.accesses.get(card_id)
+        if access is None or card_id in self.deleted or card_id not in self.cards:
+            return None, 404, "Card not found"
+        if not (access.owner_id == self.current_user_id or access.is_assigned):
+            return None, 403, "You do not have permission to access/modify this card."
+        return self.cards[card_id], None, None
+
+def bulk_card_result(card):
+    return CARD.dump(card, CARD_POSITION)
+
+def bulk_create(op, ctx):
+    list_id = op.get('list_id')
+    if not is_json_int(list_id):
+        return 400, {"msg": "list_id must be an integer"}
+    if list_id not in ctx.list_owners:
+        return 404, {"msg": "List not found"}
+    if ctx.list_owners[list_id] != ctx.current_user_id:
+        return 403, {"msg": "List not found or you don't have permission to create cards here"}
+    if not op.get('title'):
+        return 400, {"msg": "Title is required for the card"}
+    error_msg = bulk_text_error(op) or bulk_int_error(op, 'order')
+    if error_msg:
+        return 400, {"msg": error_msg}
+
+    due_date, error_msg = parse_due_date_update(op.get('due_date'), None)
+    if error_msg:
+        return 400, {"msg": error_msg}
+
+    card = Card(
+        title=op['title'],
+        description=op.get('description'),
+        list_id=list_id,
+        creator_id=ctx.current_user_id,
+        due_date=due_date,
+        order=op['order'] if op.get('order') is not None else append_order(Card, Card.list_id, list_id)
+    )
+    db.session.add(card)
+    db.session.flush() # Cada INSERT evalúa su propio append_order
+    return 201, {"card": bulk_card_result(card)}
+
+def bulk_update(op, ctx):
+    card, status, msg = ctx.card_for(op)
+    if not card:
+        return status, {"msg": msg}
+
+    title = op.get('title', card.title)
+    if not title:
+        return 400, {"msg": "Title cannot be empty"}
+    error_msg = bulk_text_error(op)
+    if error_msg:
+        return 400, {"msg": error_msg}
+    if 'order' in op and not is_json_int(op['order']):
+        return 400, {"msg": "order must be an integer"}
+    due_date, error_msg = parse_due_date_update(op.get('due_date'), card.due_date)
+    if error_msg:
+        return 400, {"msg": error_msg}
+
+    card.title = title
+    card.description = op.get('description', card.description)
+    card.due_date = due_date
+    card.order = op.get('order', card.order)
+    return 200, {"card": bulk_card_result(card)}
+
+def bulk_move(op, ctx):
+    card, status, msg = ctx.card_for(op)
+    if not card:
+        return status, {"msg": msg}
+
+    new_list_id = op.get('new_list_id')
+    if not new_list_id:
+        return 400, {"msg": "new_list_id is required"}
+    error_msg = bulk_int_error(op, 'new_list_id', 'after_card_id', 'before_card_id', 'new_order')
+    if error_msg:
+        return 400, {"msg": error_msg}
+    if new_list_id not in ctx.list_owners:
+        return 404, {"msg": "Target list not found"}
+    # Misma regla que move_card: dueño del tablero destino o del tablero de origen
+    if ctx.list_owners[new_list_id] != ctx.current_user_id and ctx.accesses[card.id].owner_id != ctx.current_user_id:
+        return 403, {"msg": "You do not have permission to move this card to this target list."}
+
+    new_order = op.get('new_order')
+    if new_order is None:
+        new_order, error_msg = position_between(
+            Card, Card.list_id, new_list_id, card.id, op.get('after_card_id'), op.get('before_card_id')
+        )
+        if error_msg:
+            return 400, {"msg": error_msg}
+
+    card.list_id = new_list_id
+    card.order = new_order
+    db.session.flush() # Los siguientes movimientos deben ver esta posición
+    ctx.touched_cards.add(card.id)
+    return 200, {"card": bulk_card_result(card)}
+
+def bulk_delete(op, ctx):
+    card, status, msg = ctx.card_for(op)
+    if not card:
+        return status, {"msg": msg}
+
+    db.session.delete(card)
+    ctx.deleted.add(card.id)
+    ctx.touched_cards.add(card.id)
+    return 200, {"msg": "Card deleted successfully"}
+
+def bulk_assign(op, ctx):
+    card, status, msg = ctx.card_for(op)
+    if not card:
+        return status, {"msg": msg}
+
+    user_id = op.get('user_id')
+    if not user_id:
+        return 400, {"msg": "User ID to assign is required"}
+    if not is_json_int(user_id):
+        return 400, {"msg": "user_id must be an integer"}
+    if user_id not in ctx.user_ids:
+        return 404, {"msg": "User to assign not found"}
+    if (card.id, user_id) in ctx.assigned:
+        return 409, {"msg": "User already assigned to this card"}
+
+    db.session.add(CardAssignment(card_id=card.id, user_id=user_id))
+    ctx.assigned.add((card.id, user_id))
+    ctx.touched_cards.add(card.id)
+    return 201, {"assignment": {"card_id": card.id, "user_id": user_id}}
+
+BULK_HANDLERS = {
+    'create': bulk_create,
+    'update': bulk_update,
+    'move': bulk_move,
+    'delete': bulk_delete,
+    'assign': bulk_assign,
+}
+
+@api.route('/cards/bulk', methods=['POST'])
+@jwt_required()
+def bulk_cards():
+    current_user_id = current_principal().user_id
+    data = request.get_json() or {}
+    operations = data.get('operations')
+    atomic = bool(data.get('atomic', False)) # Si es true, cualquier error descarta todo el lote
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"msg": "operations must be a non-empty list"}), 400
+    if len(operations) > current_app.config['BULK_MAX_OPERATIONS']:
+        return jsonify({"msg": f"At most {current_app.config['BULK_MAX_OPERATIONS']} operations per request"}), 400
+    if not all(isinstance(op, dict) and op.get('op') in BULK_HANDLERS for op in operations):
+        return jsonify({"msg": f"Each operation must be an object with op in: {', '.join(BULK_HANDLERS)}"}), 400
+
+    ctx = BulkContext(operations, current_user_id)
+
+    results = []
+    for index, op in enumerate(operations):
+        status, body = BULK_HANDLERS[op['op']](op, ctx)
+        results.append({"index": index, "op": op['op'], "status": status, **body})
+
+    failed = [result for result in results if result["status"] >= 400]
+    if atomic and failed:
+        db.session.rollback()
+        return jsonify({"msg": "No operations were applied", "committed": False, "results": results}), 400
+
+    db.session.commit()
+    for card_id in ctx.touched_cards:
+        invalidate_card_access(card_id=card_id)
+
+    return jsonify({"committed": True, "failed": len(failed), "results": results}), 200
+
+
 # =========================================================
 # Rutas de Filtrado de Tarjetas
 # =========================================================
 
-@app.route('/cards/filter', methods=['GET'])
+def card_filter_page(paginate, make_query, view, fields):
+    """Respuesta paginada de tarjetas para /cards/filter, /filters/<id>/cards y /me/...
+
+    make_query(*entidades, options=()) devuelve la consulta (Card JOIN List) ya filtrada;
+    paginate(consulta) la ordena y pagina (p. ej. CardFilter.paginate).
+    """
+    if view == 'summary':
+        # Solo columnas: ni entidades Card ni descripciones completas
+        rows, next_cursor, error_response = paginate(make_query(*card_summary_columns(fields), List.board_id))
+        if error_response:
+            return error_response, 400
+        return jsonify({"items": dump_card_summaries(rows, fields, board_id=lambda row: row.board_id), "next_cursor": next_cursor}), 200
+
+    # contains_eager reutiliza el JOIN con List para card.list y CARD_ASSIGNEES
+    # carga asignaciones y usuarios de todas las tarjetas en lote.
+    options = [contains_eager(Card.list)]
+    with_assignees = CARD.wants('assigned_users', fields)
+    if with_assignees: # Sin ?fields=...assigned_users... se ahorra la consulta de asignaciones
+        options.append(CARD_ASSIGNEES)
+    rows, next_cursor, error_response = paginate(make_query(Card, options=options))
+    if error_response:
+        return error_response, 400
+
+    cards_data = []
+    for card, *_ in rows:
+        cards_data.append(CARD.dump(
+            card, fields,
+            assigned_users=serialize_assigned_users(card) if with_assignees else None,
+            board_id=card.list.board_id # Aseguramos que board_id esté aquí
+        ))
+
+    return jsonify({"items": cards_data, "next_cursor": next_cursor}), 200
+
+@api.route('/cards/filter', methods=['GET'])
 @jwt_required()
 def filter_cards():
-    current_user_id = int(get_jwt_identity()) # Convertir a int
-
-    # Obtener los parámetros de consulta de la URL
-    user_id_filter = request.args.get('user_id', type=int) # Para tarjetas asignadas a este user_id
-    creator_id_filter = request.args.get('creator_id', type=int) # Para tarjetas creadas por este user_id
-    due_date_start_str = request.args.get('due_date_start')
-    due_date_end_str = request.args.get('due_date_end')
-    board_id_filter = request.args.get('board_id', type=int)
-    list_id_filter = request.args.get('list_id', type=int)
-    title_contains = request.args.get('title_contains')
-
-    # --- Lógica principal de acceso: el usuario es propietario del tablero O la tarjeta está asignada a él ---
-    # Esta es la base de las tarjetas que el usuario tiene permitido ver/filtrar.
-    access_condition = or_(
-        Board.owner_id == current_user_id,
-        Card.id.in_(db.session.query(CardAssignment.card_id).filter(CardAssignment.user_id == current_user_id))
+    current_user_id = current_principal().user_id
+
+    # Parámetros: user_id (asignadas a), creator_id, board_id, list_id, due_date_start,
+    # due_date_end, title_contains y sort (ver CardFilter)
+    card_filter, error_msg = CardFilter.from_args(request.args)
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+    view, fields, error_msg = parse_card_view()
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    def make_query(*entities, options=()):
+        return card_filter.query(current_user_id, *entities, options=options)
+
+    return card_filter_page(card_filter.paginate, make_query, view, fields)
+
+# =========================================================
+# Rutas de Filtros Guardados
+# =========================================================
+
+def parse_saved_filter_params(params):
+    # Valida los parámetros de un filtro guardado; devuelve (params normalizados, error_msg)
+    if not isinstance(params, dict):
+        return None, "params must be an object with /cards/filter parameters"
+    card_filter, error_msg = CardFilter.from_args(MultiDict(params))
+    if error_msg:
+        return None, error_msg
+    return card_filter.to_args(), None
+
+@api.route('/filters', methods=['POST'])
+@jwt_required()
+def create_saved_filter():
+    current_user_id = current_principal().user_id
+    data = request.get_json()
+    name = (data.get('name') or '').strip()
+
+    if not name:
+        return jsonify({"msg": "Name is required for the filter"}), 400
+    params, error_msg = parse_saved_filter_params(data.get('params', {}))
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+    if SavedFilter.query.filter_by(user_id=current_user_id, name=name).first():
+        return jsonify({"msg": "A filter with this name already exists"}), 409
+
+    saved_filter = SavedFilter(user_id=current_user_id, name=name, params=params)
+    db.session.add(saved_filter)
+    db.session.flush() # Necesitamos el id para materializar los resultados
+    materialize_saved_filter(saved_filter)
+    db.session.commit()
+
+    return jsonify({
+        "msg": "Filter saved successfully",
+        "filter": SAVED_FILTER.dump(saved_filter)
+    }), 201
+
+@api.route('/filters', methods=['GET'])
+@jwt_required()
+def get_saved_filters():
+    current_user_id = current_principal().user_id
+    # card_count viene de la propia fila: contar no recorre ninguna tarjeta
+    saved_filters, next_cursor, error_response = paginate_keyset(SavedFilter.query.filter_by(user_id=current_user_id), (SavedFilter.id,))
+    if error_response:
+        return error_response, 400
+
+    return jsonify({"items": SAVED_FILTER.dump_many(saved_filters), "next_cursor": next_cursor}), 200
+
+@api.route('/filters/<int:filter_id>', methods=['GET'])
+@jwt_required()
+def get_saved_filter(filter_id):
+    current_user_id = current_principal().user_id
+    saved_filter = SavedFilter.query.filter_by(id=filter_id, user_id=current_user_id).first()
+
+    if not saved_filter:
+        return jsonify({"msg": "Filter not found"}), 404
+
+    return jsonify(SAVED_FILTER.dump(saved_filter)), 200
+
+@api.route('/filters/<int:filter_id>', methods=['PUT'])
+@jwt_required()
+def update_saved_filter(filter_id):
+    current_user_id = current_principal().user_id
+    saved_filter = SavedFilter.query.filter_by(id=filter_id, user_id=current_user_id).first()
+
+    if not saved_filter:
+        return jsonify({"msg": "Filter not found"}), 404
+
+    data = request.get_json()
+    name = (data.get('name', saved_filter.name) or '').strip()
+    if not name:
+        return jsonify({"msg": "Name cannot be empty"}), 400
+    if name != saved_filter.name and SavedFilter.query.filter_by(user_id=current_user_id, name=name).first():
+        return jsonify({"msg": "A filter with this name already exists"}), 409
+
+    saved_filter.name = name
+    if 'params' in data:
+        params, error_msg = parse_saved_filter_params(data['params'])
+        if error_msg:
+            return jsonify({"msg": error_msg}), 400
+        if params != saved_filter.params:
+            saved_filter.params = params
+            materialize_saved_filter(saved_filter)
+    db.session.commit()
+
+    return jsonify({
+        "msg": "Filter updated successfully",
+        "filter": SAVED_FILTER.dump(saved_filter)
+    }), 200
+
+@api.route('/filters/<int:filter_id>', methods=['DELETE'])
+@jwt_required()
+def delete_saved_filter(filter_id):
+    current_user_id = current_principal().user_id
+    saved_filter = SavedFilter.query.filter_by(id=filter_id, user_id=current_user_id).first()
+
+    if not saved_filter:
+        return jsonify({"msg": "Filter not found"}), 404
+
+    db.session.delete(saved_filter) # Sus resultados se borran en cascada
+    db.session.commit()
+
+    return jsonify({"msg": "Filter deleted successfully"}), 200
+
+@api.route('/filters/<int:filter_id>/cards', methods=['GET'])
+@jwt_required()
+def get_saved_filter_cards(filter_id):
+    current_user_id = current_principal().user_id
+    saved_filter = SavedFilter.query.filter_by(id=filter_id, user_id=current_user_id).first()
+
+    if not saved_filter:
+        return jsonify({"msg": "Filter not found"}), 404
+    view, fields, error_msg = parse_card_view()
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    card_filter = saved_card_filter(saved_filter.params)
+
+    def make_query(*entities, options=()):
+        # Resultados ya calculados: búsqueda por clave primaria en saved_filter_results, sin permisos ni filtros
+        return card_filter.select(*entities, options=options) \
+            .join(SavedFilterResult, SavedFilterResult.card_id == Card.id) \
+            .filter(SavedFilterResult.filter_id == saved_filter.id)
+
+    return card_filter_page(card_filter.paginate, make_query, view, fields)
+
+# =========================================================
+# Rutas de Mis Tarjetas
+# =========================================================
+
+def parse_window(value):
+    # '12h', '7d' o '2w' -> timedelta; None si el formato no es válido
+    match = re.fullmatch(r'(\d+)([hdw])', value or '')
+    if not match:
+        return None
+    amount, unit = int(match.group(1)), match.group(2)
+    return {'h': timedelta(hours=amount), 'd': timedelta(days=amount), 'w': timedelta(weeks=amount)}[unit]
+
+def user_index_query(user_id, *conditions):
+    # make_query para card_filter_page sobre las filas de user_card_index del usuario
+    def make_query(*entities, options=()):
+        return db.session.query(*entities).select_from(UserCardIndex) \
+            .join(Card, UserCardIndex.card_id == Card.id) \
+            .join(List, Card.list_id == List.id) \
+            .filter(UserCardIndex.user_id == user_id, *conditions) \
+            .options(*options)
+    return make_query
+
+@api.route('/me/cards', methods=['GET'])
+@jwt_required()
+def get_my_cards():
+    current_user_id = current_principal().user_id
+    # Tarjetas asignadas al usuario, agrupadas por tablero; ?board_id= para uno solo
+    board_id = request.args.get('board_id', type=int)
+    view, fields, error_msg = parse_card_view()
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    conditions = [UserCardIndex.assigned.is_(True)]
+    if board_id:
+        conditions.append(UserCardIndex.board_id == board_id)
+    sort_keys = (UserCardIndex.board_id, UserCardIndex.card_id) # ix_user_card_index_assigned
+
+    return card_filter_page(
+        lambda query: paginate_sorted(query, sort_keys),
+        user_index_query(current_user_id, *conditions), view, fields
     )
-    
-    # Consulta base: todas las tarjetas a las que el usuario tiene acceso
-    query = db.session.query(Card).join(List).join(Board).outerjoin(CardAssignment).filter(access_condition)
 
+@api.route('/me/due', methods=['GET'])
+@jwt_required()
+def get_my_due_cards():
+    current_user_id = current_principal().user_id
+    # Tarjetas visibles (tableros propios o asignadas) que vencen en ?window= (por defecto 7d), por fecha.
+    # ?overdue=true incluye también las ya vencidas; ?assigned=true solo las asignadas al usuario.
+    window = parse_window(request.args.get('window', '7d'))
+    if window is None:
+        return jsonify({"msg": "Invalid window. Use a number followed by h, d or w (e.g. 12h, 7d, 2w)"}), 400
+    view, fields, error_msg = parse_card_view()
+    if error_msg:
+        return jsonify({"msg": error_msg}), 400
+
+    now = datetime.utcnow()
+    conditions = [UserCardIndex.due_date <= now + window]
+    if request.args.get('overdue', 'false').lower() not in ('1', 'true', 'yes'):
+        conditions.append(UserCardIndex.due_date >= now)
+    if request.args.get('assigned', 'false').lower() in ('1', 'true', 'yes'):
+        conditions.append(UserCardIndex.assigned.is_(True))
+    sort_keys = (UserCardIndex.due_date, UserCardIndex.card_id) # ix_user_card_index_due
+
+    return card_filter_page(
+        lambda query: paginate_sorted(query, sort_keys),
+        user_index_query(current_user_id, *conditions), view, fields
+    )
 
-    # Aplicar filtros adicionales basados en los parámetros
-    if user_id_filter:
-        query = query.filter(CardAssignment.user_id == user_id_filter)
-    
-    if creator_id_filter:
-        query = query.filter(Card.creator_id == creator_id_filter)
+# =========================================================
+# Estadísticas de las cachés
+# =========================================================
 
-    if due_date_start_str:
-        try:
-            due_date_start = datetime.fromisoformat(due_date_start_str)
-            query = query.filter(Card.due_date >= due_date_start)
-        except ValueError:
-            return jsonify({"msg": "Invalid due_date_start format. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)"}), 400
+@api.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    # Contadores del worker que atiende la petición (cada proceso tiene sus cachés locales)
+    return jsonify({
+        "pid": os.getpid(),
+        "responses": response_cache().stats(),
+        "card_access": card_access_cache().stats()
+    }), 200
 
-    if due_date_end_str:
-        try:
-            due_date_end = datetime.fromisoformat(due_date_end_str)
-            query = query.filter(Card.due_date <= due_date_end)
-        except ValueError:
-            return jsonify({"msg": "Invalid due_date_end format. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)"}), 400
+# =========================================================
+# Fábrica de la aplicación
+# =========================================================
 
-    if board_id_filter:
-        query = query.filter(Board.id == board_id_filter)
+def configure_sqlite(engine, config):
+    # PRAGMA por conexión: el pool reutiliza conexiones, así que se aplican una sola vez a cada una
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+        cursor.execute(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+        cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+        cursor.execute(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+        cursor.execute("PRAGMA foreign_keys=ON") # SQLite no aplica ON DELETE CASCADE sin esto
+        cursor.close()
+
+def warm_up():
+    """Prepara el proceso antes de atender peticiones: mapeos del ORM y pool de conexiones."""
+    db.configure_mappers() # Resuelve relaciones/backrefs ahora y no en la primera petición
+    with db.engine.connect() as connection:
+        connection.execute(text('SELECT 1')) # Abre la primera conexión del pool
+
+def create_app(config=None):
+    """Crea y configura una instancia de la aplicación.
+
+    config puede ser el nombre de un perfil de config.py ('development', 'production'),
+    una clase de configuración o un dict que se aplica sobre el perfil por defecto.
+    Sin argumento se usa la variable de entorno FLASK_CONFIG (por defecto 'development').
+    """
+    app = Flask(__name__)
+
+    if config is None or isinstance(config, dict):
+        app.config.from_object(config_by_name[os.getenv('FLASK_CONFIG', 'development')])
+        app.config.update(config or {})
+    elif isinstance(config, str):
+        app.config.from_object(config_by_name[config])
+    else:
+        app.config.from_object(config)
 
-    if list_id_filter:
-        query = query.filter(List.id == list_id_filter)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
 
-    if title_contains:
-        query = query.filter(Card.title.ilike(f'%{title_contains}%'))
+    app.json = json_provider_class(app.config['JSON_PROVIDER'])(app)
 
-    # Ordenar y asegurar unicidad de resultados
-    cards = query.order_by(List.order, Card.order).distinct().all()
+    CORS(app)
+    db.init_app(app)
+    jwt.init_app(app)
+    app.register_blueprint(api)
+    app.extensions['card_access_cache'] = TTLCache(app.config['PERMISSION_CACHE_TTL'])
+    app.extensions['principal_cache'] = TTLCache(app.config['PRINCIPAL_CACHE_TTL'])
+    app.extensions['response_cache'] = create_cache(
+        app.config['RESPONSE_CACHE_URL'], app.config['RESPONSE_CACHE_TTL'], app.config['RESPONSE_CACHE_SIZE']
+    )
+    app.extensions['event_broker'] = create_broker(app.config['EVENT_BROKER_URL'], app.config['SSE_QUEUE_SIZE'])
+    app.extensions['board_purger'] = BackgroundJob(lambda: run_board_purger(app), 'board-purger')
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_WORKERS'], app.config['PASSWORD_HASH_QUEUE'],
+        app.config['PASSWORD_HASH_TIMEOUT'], app.config['PASSWORD_HASH_POOL'],
+    )
 
-    cards_data = []
-    for card in cards:
-        assigned_users = []
-        for assignment in card.assignments:
-            user = User.query.get(assignment.user_id)
-            if user:
-                assigned_users.append({
-                    "user_id": user.id,
-                    "username": user.username,
-                    "email": user.email
-                })
-        
-        cards_data.append({
-            "id": card.id,
-            "title": card.title,
-            "description": card.description,
-            "list_id": card.list_id,
-            "creator_id": card.creator_id,
-            "due_date": card.due_date.isoformat() if card.due_date else None,
-            "order": card.order,
-            "created_at": card.created_at.isoformat(),
-            "updated_at": card.updated_at.isoformat(),
-            "assigned_users": assigned_users,
-            "board_id": card.list.board_id # Aseguramos que board_id esté aquí
-        })
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            configure_sqlite(db.engine, app.config)
+        if app.config['AUTO_MIGRATE']:
+            upgrade_database()
+        warm_up()
+
+    return app
 
-    return jsonify(cards_data), 200
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True, port=5000)
+    # Servidor de desarrollo (un proceso, recarga automática y depurador).
+    # En producción usar gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+    app = create_app('development')
+    app.run(debug=app.config['DEBUG'], port=5000)
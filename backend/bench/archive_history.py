@@ -0,0 +1,82 @@
+"""Carga de un tablero con historial antiguo en las tablas calientes o archivado.
+
+Para cada tamaño de historial crea una base nueva con un tablero de 4 listas, 200
+tarjetas activas y N tarjetas de 2020 (3 comentarios cada una). Mide GET
+/boards/<id>/full, archiva las tarjetas de más de un año con archive_where y vuelve a
+medir:
+
+    python -m bench.archive_history --history 0 5000 20000 50000
+"""
+import argparse
+import statistics
+import time
+
+from app import db, text, List, archive_where, card_age_before, repair_counters
+from bench.common import bench_app, login, percentile, temp_database_url, timed
+
+LISTS = 4
+ACTIVE_CARDS = 200
+COMMENTS_PER_CARD = 3
+
+
+def insert_cards(list_ids, count, title, created_at):
+    # Inserción masiva con SQL (CTE recursiva): crear decenas de miles de tarjetas por la API llevaría minutos
+    for list_id in list_ids:
+        db.session.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :count) "
+            "INSERT INTO cards (title, description, list_id, creator_id, \"order\", created_at, updated_at, "
+            "comment_count, assignment_count) "
+            "SELECT :title || ' ' || i, 'some description text for card ' || i, :list_id, 1, i * 1024, "
+            ":created_at, :created_at, 0, 0 FROM seq"
+        ), {'count': count // len(list_ids), 'title': title, 'list_id': list_id, 'created_at': created_at})
+        db.session.execute(text(
+            "INSERT INTO comments (content, card_id, user_id, created_at, updated_at) "
+            "SELECT 'comment ' || cards.id || ' ' || k.n, cards.id, 1, cards.created_at, cards.created_at "
+            "FROM cards, (SELECT 1 AS n UNION SELECT 2 UNION SELECT 3) AS k "
+            "WHERE cards.list_id = :list_id AND cards.title LIKE :pattern"
+        ), {'list_id': list_id, 'pattern': f'{title} %'})
+    repair_counters()
+    db.session.commit()
+
+
+def measure(client, headers, board_id, repeat):
+    response = client.get(f'/boards/{board_id}/full', headers=headers)
+    assert response.status_code == 200, response.json
+    samples = timed(lambda: client.get(f'/boards/{board_id}/full', headers=headers), repeat)
+    return f'{statistics.median(samples):7.1f} {percentile(samples, 95):7.1f} {len(response.data):9}'
+
+
+def run(history, repeat):
+    app = bench_app(temp_database_url())
+    client = app.test_client()
+    headers = login(client, 'bench')
+    board_id = client.post('/boards', json={'title': 'bench'}, headers=headers).json['board']['id']
+    list_ids = [client.post(f'/boards/{board_id}/lists', json={'title': f'L{n}'}, headers=headers).json['list']['id']
+                for n in range(LISTS)]
+    with app.app_context():
+        insert_cards(list_ids, ACTIVE_CARDS, 'active', '2099-01-01 00:00:00')
+        if history:
+            insert_cards(list_ids, history, 'history', '2020-01-01 00:00:00')
+    hot = measure(client, headers, board_id, repeat)
+    with app.app_context():
+        start = time.perf_counter()
+        archived = archive_where(List.board_id == board_id, card_age_before(365), archived_by=None)
+        elapsed = time.perf_counter() - start
+        drift = sum(repair_counters(dry_run=True).values())
+    cold = measure(client, headers, board_id, repeat)
+    print(f'{history:>7}  {hot}   {cold}   (archived {archived} in {elapsed:.2f}s, counter drift {drift})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history', type=int, nargs='+', default=[0, 5000, 20000, 50000])
+    parser.add_argument('--repeat', type=int, default=40)
+    args = parser.parse_args()
+
+    print(f'history  {"kept hot: p50    p95     bytes":31}   archived: p50    p95     bytes')
+    for history in args.history:
+        run(history, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
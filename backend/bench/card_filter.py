@@ -0,0 +1,112 @@
+"""Latencia de /cards/filter sobre un conjunto grande y determinista.
+
+La primera ejecución siembra la base (1k usuarios, 2k tableros, 10k listas, 100k
+tarjetas y ~150k asignaciones, con semilla fija) y la reutiliza en las siguientes.
+Cada caso pide limit=50 como el usuario 7 y muestra cuántas tarjetas devuelve, una
+huella de sus ids (para comprobar que dos versiones devuelven lo mismo) y la media:
+
+    python -m bench.card_filter --database-url sqlite:////tmp/gestion-filter.db
+"""
+import argparse
+import random
+import statistics
+import zlib
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+
+from app import db, text, Board, Card, CardAssignment, List, User, rebuild_search_index, repair_counters, search_enabled
+from bench.common import bench_app, timed
+
+USERS, BOARDS, LISTS, CARDS, ASSIGNMENTS = 1000, 2000, 10000, 100000, 150000
+VIEWER_ID = 7
+
+
+def seed(now):
+    random.seed(1)
+    password_hash = generate_password_hash('secret', method='pbkdf2:sha256:1000')
+    lists_per_board, cards_per_list = LISTS // BOARDS, CARDS // LISTS
+    with db.engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {'id': i, 'username': f'u{i}', 'email': f'u{i}@example.com', 'password_hash': password_hash}
+            for i in range(1, USERS + 1)
+        ])
+        connection.execute(Board.__table__.insert(), [
+            {'id': i, 'title': f'b{i}', 'owner_id': (i - 1) // 2 + 1, 'created_at': now, 'updated_at': now, 'revision': 0}
+            for i in range(1, BOARDS + 1)
+        ])
+        connection.execute(List.__table__.insert(), [
+            {'id': i, 'title': f'l{i}', 'board_id': (i - 1) // lists_per_board + 1,
+             'order': ((i - 1) % lists_per_board + 1) * 1024, 'created_at': now, 'updated_at': now}
+            for i in range(1, LISTS + 1)
+        ])
+        cards = []
+        for i in range(1, CARDS + 1):
+            list_id = (i - 1) // cards_per_list + 1
+            owner_id = ((list_id - 1) // lists_per_board) // 2 + 1
+            cards.append({
+                'id': i, 'title': f'card {i} ' + random.choice(['alpha', 'beta', 'gamma', 'delta']),
+                'description': 'x' * 200, 'list_id': list_id,
+                'creator_id': owner_id if random.random() < .7 else random.randint(1, USERS),
+                'order': ((i - 1) % cards_per_list + 1) * 1024,
+                'due_date': now + timedelta(days=random.randint(-30, 60)) if random.random() < .6 else None,
+                'created_at': now - timedelta(seconds=i), 'updated_at': now,
+            })
+        connection.execute(Card.__table__.insert(), cards)
+        pairs = {(random.randint(1, CARDS), random.randint(1, USERS)) for _ in range(ASSIGNMENTS)}
+        connection.execute(CardAssignment.__table__.insert(), [
+            {'card_id': card_id, 'user_id': user_id, 'assigned_at': now} for card_id, user_id in sorted(pairs)
+        ])
+    repair_counters()
+    if search_enabled():
+        rebuild_search_index()
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def cases(now):
+    day = lambda offset: (now + timedelta(days=offset)).isoformat(timespec='seconds')
+    return [
+        ('none', ''),
+        ('board', 'board_id=13'),
+        ('list', 'list_id=61'),
+        ('assignee=me', f'user_id={VIEWER_ID}'),
+        ('assignee=other', 'user_id=500'),
+        ('creator', f'creator_id={VIEWER_ID}'),
+        ('title', 'title_contains=gamma'),
+        ('due range', f'due_date_start={day(14)}&due_date_end={day(28)}'),
+        ('assignee+due', f'user_id=500&due_date_start={day(0)}'),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default='sqlite:////tmp/gestion-filter.db')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = bench_app(args.database_url)
+    client = app.test_client()
+    with app.app_context():
+        if db.session.get(User, VIEWER_ID) is None:
+            print('seeding...')
+            seed(datetime.utcnow())
+        # Las fechas de los casos son relativas a la siembra, para que los rangos no se vacíen con el tiempo
+        seeded_at = db.session.query(db.func.max(Board.created_at)).scalar()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(VIEWER_ID))}'}
+
+    print(f'{"case":16} {"rows":>4} {"ids":>8} {"mean":>9}')
+    for name, query in cases(seeded_at):
+        url = f'/cards/filter?limit=50&{query}'
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.json
+        ids = sorted(item['id'] for item in response.json['items'])
+        fingerprint = zlib.crc32(repr(ids).encode()) % 100000
+        samples = timed(lambda: client.get(url, headers=headers), args.repeat)
+        print(f'{name:16} {len(ids):4} {fingerprint:8} {statistics.mean(samples):6.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Utilidades compartidas por los scripts de rendimiento de bench/."""
+import http.client
+import json
+import os
+import statistics
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from app import create_app
+
+
+def percentile(samples, p):
+    """Percentil p (1-99) de una lista de muestras."""
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100)[p - 1]
+
+
+def latency_summary(samples_ms):
+    return f'p50 {percentile(samples_ms, 50):.1f} ms  p99 {percentile(samples_ms, 99):.1f} ms'
+
+
+def timed(fn, repeat):
+    """Ejecuta fn repeat veces y devuelve los milisegundos de cada llamada."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+# ======================================================
+# Aplicación en proceso (test client)
+# ======================================================
+
+def temp_database_url(name='bench.db'):
+    """URL de una base SQLite nueva en un directorio temporal."""
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gestion-bench-'), name)}"
+
+
+def bench_app(database_url, **overrides):
+    """Crea la aplicación sobre database_url, sin caché de respuestas y con un hash de contraseñas barato."""
+    config = {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RESPONSE_CACHE_TTL': 0,
+    }
+    config.update(overrides)
+    return create_app(config)
+
+
+def login(client, username, password='secret'):
+    """Registra el usuario si no existe y devuelve las cabeceras con su token."""
+    client.post('/auth/register', json={'username': username, 'email': f'{username}@example.com', 'password': password})
+    token = client.post('/auth/login', json={'username': username, 'password': password}).json['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+# ======================================================
+# Servidor en marcha (HTTP)
+# ======================================================
+
+class HttpClient:
+    """Cliente HTTP mínimo con conexión persistente; uno por hilo."""
+
+    def __init__(self, base_url, token=None):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.token = token
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        for attempt in range(2): # El servidor puede cerrar una conexión keep-alive inactiva
+            try:
+                if self.connection is None:
+                    self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                self.connection.request(method, path, body, headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, json.loads(data) if data else None
+            except (OSError, http.client.HTTPException):
+                self.connection = None
+                if attempt:
+                    raise
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post(self, path, body=None):
+        return self.request('POST', path, body)
+
+
+def wait_for_server(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            HttpClient(base_url).get('/protected')
+            return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def seed_board_over_http(base_url, username, lists, cards_per_list):
+    """Crea (por la API) un usuario y un tablero con lists x cards_per_list tarjetas.
+
+    Devuelve (token, board_id, list_ids).
+    """
+    client = HttpClient(base_url)
+    client.post('/auth/register', {'username': username, 'email': f'{username}@example.com', 'password': 'secret'})
+    status, body = client.post('/auth/login', {'username': username, 'password': 'secret'})
+    if status != 200:
+        raise SystemExit(f'login failed ({status}): {body}')
+    client.token = body['access_token']
+    board_id = client.post('/boards', {'title': 'bench'})[1]['board']['id']
+    list_ids = []
+    for position in range(lists):
+        list_id = client.post(f'/boards/{board_id}/lists', {'title': f'L{position}'})[1]['list']['id']
+        client.post('/cards/bulk', {'operations': [
+            {'op': 'create', 'list_id': list_id, 'title': f'card {n}', 'description': 'x' * 200}
+            for n in range(cards_per_list)
+        ]})
+        list_ids.append(list_id)
+    return client.token, board_id, list_ids
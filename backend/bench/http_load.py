@@ -0,0 +1,66 @@
+"""Carga de lectura contra un servidor en marcha: peticiones/s y latencias por ruta.
+
+Siembra un tablero de --lists x --cards tarjetas y lanza --threads clientes durante
+--duration segundos contra cada ruta. Sirve para comparar el servidor de desarrollo
+con gunicorn sobre la misma máquina:
+
+    python app.py                                    # o bien:
+    WEB_CONCURRENCY=2 GUNICORN_THREADS=4 gunicorn -c gunicorn.conf.py wsgi:app
+    python -m bench.http_load --url http://127.0.0.1:5000
+"""
+import argparse
+import threading
+import time
+import uuid
+
+from bench.common import HttpClient, latency_summary, seed_board_over_http, wait_for_server
+
+DEFAULT_PATHS = ['/boards/{board_id}/full', '/lists/{list_id}/cards', '/boards']
+
+
+def run_load(base_url, token, path, threads, duration):
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    stop = time.time() + duration
+
+    def worker():
+        client = HttpClient(base_url, token)
+        while time.time() < stop:
+            start = time.perf_counter()
+            status, _ = client.get(path)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if status == 200:
+                    samples.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return samples, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=8)
+    parser.add_argument('--lists', type=int, default=10)
+    parser.add_argument('--cards', type=int, default=20, help='cards per list')
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS,
+                        help='paths to load; {board_id} and {list_id} are filled in')
+    args = parser.parse_args()
+
+    wait_for_server(args.url)
+    token, board_id, list_ids = seed_board_over_http(args.url, f'bench-{uuid.uuid4().hex[:8]}', args.lists, args.cards)
+    for pattern in args.paths:
+        path = pattern.format(board_id=board_id, list_id=list_ids[-1])
+        samples, errors = run_load(args.url, token, path, args.threads, args.duration)
+        print(f'{pattern:28} {len(samples) / args.duration:7.0f} req/s  {latency_summary(samples)}  errors {errors}')
+
+
+if __name__ == '__main__':
+    main()
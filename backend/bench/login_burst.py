@@ -0,0 +1,88 @@
+"""Latencia del resto de la API durante una ráfaga de inicios de sesión.
+
+Arranca gunicorn (1 worker, --threads hilos) sobre una base SQLite temporal. Mide
+GET /boards cada 20 ms en reposo y luego mientras --clients clientes inician sesión
+sin pausa, y muestra p50/p99 de ambas fases, inicios de sesión/s y rechazos 503. Las
+variables PASSWORD_HASH_* del entorno llegan al servidor, así que se pueden comparar
+ajustes del pool de hashes:
+
+    python -m bench.login_burst --clients 8
+    PASSWORD_HASH_WORKERS=2 PASSWORD_HASH_QUEUE=0 python -m bench.login_burst
+"""
+import argparse
+import os
+import subprocess
+import threading
+import time
+
+from bench.common import HttpClient, latency_summary, temp_database_url, wait_for_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def probe(base_url, token, count):
+    client = HttpClient(base_url, token)
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get('/boards')
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.02)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8, help='concurrent login loops')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads')
+    parser.add_argument('--port', type=int, default=5100)
+    args = parser.parse_args()
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    env = dict(os.environ, DATABASE_URL=os.getenv('DATABASE_URL', temp_database_url()), RESPONSE_CACHE_TTL='0',
+               WEB_CONCURRENCY='1', GUNICORN_THREADS=str(args.threads), BIND=f'127.0.0.1:{args.port}',
+               GUNICORN_ACCESS_LOG='/dev/null')
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=BACKEND_DIR, env=env,
+                              stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(base_url)
+        client = HttpClient(base_url)
+        client.post('/auth/register', {'username': 'bench', 'email': 'bench@example.com', 'password': 'secret'})
+        client.token = client.post('/auth/login', {'username': 'bench', 'password': 'secret'})[1]['access_token']
+        for n in range(20):
+            client.post('/boards', {'title': f'b{n}'})
+
+        stop = threading.Event()
+        outcomes = {}
+        lock = threading.Lock()
+
+        def login_loop():
+            login_client = HttpClient(base_url)
+            while not stop.is_set():
+                status, _ = login_client.post('/auth/login', {'username': 'bench', 'password': 'secret'})
+                with lock:
+                    outcomes[status] = outcomes.get(status, 0) + 1
+                if status == 503:
+                    time.sleep(0.05) # Como un cliente que respeta Retry-After, sin esperar el segundo entero
+
+        quiet = probe(base_url, client.token, 150)
+        loops = [threading.Thread(target=login_loop) for _ in range(args.clients)]
+        for thread in loops:
+            thread.start()
+        time.sleep(1)
+        start = time.time()
+        busy = probe(base_url, client.token, 300)
+        duration = time.time() - start
+        stop.set()
+        for thread in loops:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f'quiet: {latency_summary(quiet)} | burst: {latency_summary(busy)} | '
+          f'logins {outcomes.get(200, 0) / duration:.1f}/s, rejected (503) {outcomes.get(503, 0)}')
+
+
+if __name__ == '__main__':
+    main()
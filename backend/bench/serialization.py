@@ -0,0 +1,80 @@
+"""Coste de serializar N tarjetas: dicts escritos a mano frente a Schema, json frente a orjson.
+
+Carga --cards tarjetas de una lista (ya leídas de la base, como en una ruta) y mide
+por separado la construcción de los dicts y su codificación:
+
+    python -m bench.serialization --cards 1000
+"""
+import argparse
+import statistics
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import db, Board, Card, List, User
+from bench.common import bench_app, temp_database_url, timed
+from serializers import CARD, OrjsonProvider, orjson
+
+
+def handwritten_card(card):
+    # Dict que construían las rutas antes de serializers.py (referencia de la comparación)
+    return {
+        "id": card.id,
+        "title": card.title,
+        "description": card.description,
+        "list_id": card.list_id,
+        "creator_id": card.creator_id,
+        "due_date": card.due_date.isoformat() if card.due_date else None,
+        "order": card.order,
+        "created_at": card.created_at.isoformat(),
+        "updated_at": card.updated_at.isoformat(),
+        "comment_count": card.comment_count,
+        "assignment_count": card.assignment_count,
+    }
+
+
+def seed_cards(count):
+    user = User(username='bench', email='bench@example.com', password_hash='-')
+    board = Board(title='bench', owner=user)
+    lst = List(title='bench', board=board, order=1024)
+    db.session.add_all([user, board, lst])
+    db.session.flush()
+    db.session.execute(Card.__table__.insert(), [
+        {'title': f'card {n}', 'description': 'x' * 200, 'list_id': lst.id, 'creator_id': user.id, 'order': (n + 1) * 1024}
+        for n in range(count)
+    ])
+    db.session.commit()
+    return lst.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    app = bench_app(args.database_url or temp_database_url())
+    with app.app_context():
+        list_id = seed_cards(args.cards)
+        cards = Card.query.filter_by(list_id=list_id).order_by(Card.order).all()
+        payload = {'items': CARD.dump_many(cards), 'next_cursor': None}
+        stdlib = DefaultJSONProvider(app)
+        encoders = [('stdlib json', stdlib.dumps)]
+        if orjson is not None:
+            encoders.append(('orjson', OrjsonProvider(app).dumps))
+
+        def report(name, fn):
+            print(f'{name:34} {statistics.median(timed(fn, args.repeat)):7.2f} ms')
+
+        print(f'{args.cards} cards, median of {args.repeat} runs')
+        report('build: handwritten dicts', lambda: [handwritten_card(card) for card in cards])
+        report('build: CARD.dump_many', lambda: CARD.dump_many(cards))
+        for name, dumps in encoders:
+            report(f'encode: {name}', lambda: dumps(payload))
+        report('handwritten + stdlib json', lambda: stdlib.dumps({'items': [handwritten_card(card) for card in cards]}))
+        for name, dumps in encoders:
+            report(f'CARD.dump_many + {name}', lambda: dumps({'items': CARD.dump_many(cards)}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Caché LRU en memoria del proceso con expiración por entrada.
+
+    Pensada para datos pequeños y de vida corta (decisiones de permisos, respuestas
+    ya serializadas). Al llenarse descarta la entrada usada hace más tiempo. Cada
+    entrada puede llevar etiquetas para invalidar de una vez todas las de un mismo
+    objeto (p. ej. un tablero). Es segura entre hilos; cada proceso/worker tiene su
+    propia copia.
+    """
+
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict() # clave -> (expira, valor, etiquetas), de menos a más reciente
+        self._tags = {} # etiqueta -> claves
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tags=()):
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            while len(self._data) >= self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+            self._data[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate_tags(self, *tags):
+        # Elimina todas las entradas que lleven alguna de las etiquetas
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._data:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "local",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """Caché compartida entre procesos y servidores sobre Redis, para valores bytes.
+
+    Redis aplica el TTL y su propia política de memoria (maxmemory-policy allkeys-lru).
+    Cada etiqueta es un conjunto de Redis con las claves que la llevan, con el mismo TTL
+    que la entrada más reciente; invalidar borra las claves del conjunto en todos los
+    procesos a la vez. Requiere el paquete 'redis'.
+    """
+
+    def __init__(self, url, ttl, prefix='gestion:cache:'):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("La caché usa Redis pero el paquete 'redis' no está instalado") from exc
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _tag_key(self, tag):
+        # Las etiquetas son tuplas como ('board', 5)
+        return self.prefix + 'tag:' + (':'.join(map(str, tag)) if isinstance(tag, tuple) else str(tag))
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        value = self._client.get(self.prefix + key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, tags=()):
+        if not self.enabled:
+            return
+        ttl = max(1, int(self.ttl))
+        pipe = self._client.pipeline(transaction=False)
+        pipe.set(self.prefix + key, value, ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), self.prefix + key)
+            pipe.expire(self._tag_key(tag), ttl) # El conjunto vive lo que su entrada más reciente
+        pipe.execute()
+
+    def invalidate_tags(self, *tags):
+        # Leer y borrar cada conjunto en una transacción: una clave añadida después va a un
+        # conjunto nuevo y no se pierde su etiqueta
+        if not tags:
+            return
+        pipe = self._client.pipeline(transaction=True)
+        for tag in tags:
+            pipe.smembers(self._tag_key(tag))
+            pipe.delete(self._tag_key(tag))
+        results = pipe.execute()
+        keys = set().union(*results[::2])
+        if keys:
+            deleted = self._client.delete(*keys)
+            with self._lock:
+                self.invalidations += deleted
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+
+def create_cache(url, ttl, maxsize):
+    """Caché local (url vacía) o en Redis (redis://...) con la misma interfaz."""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url, ttl)
+    return TTLCache(ttl, maxsize)
@@ -0,0 +1,144 @@
+import os
+from datetime import timedelta
+
+
+def database_url():
+    # DATABASE_URL permite usar PostgreSQL/MySQL; sin ella se usa SQLite en instance/site.db
+    url = os.getenv('DATABASE_URL', 'sqlite:///site.db')
+    if url.startswith('postgres://'): # Formato antiguo que SQLAlchemy ya no acepta
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+class Config:
+    # Configuración de la base de datos (SQLite por defecto, configurable con DATABASE_URL)
+    SQLALCHEMY_DATABASE_URI = database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexiones para bases de datos de servidor (PostgreSQL, MySQL)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30)) # Segundos esperando una conexión libre
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800)) # Renovar conexiones antes de que el servidor las cierre
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1' # Descartar conexiones muertas antes de usarlas
+
+    # Perfil de SQLite, aplicado con PRAGMA en cada conexión nueva. En modo WAL los
+    # lectores no se bloquean mientras otra petición escribe.
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL') # Seguro con WAL; evita un fsync por commit
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)) # Esperar al bloqueo de escritura en vez de fallar
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+    # Clave Secreta para Flask y JWT. ¡CAMBIA ESTO EN PRODUCCIÓN!
+    # Puedes obtenerla de un .env o asignarla directamente aquí para desarrollo
+    SECRET_KEY = os.getenv('SECRET_KEY', 'tu_super_secreto_para_flask_y_jwt')
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'otra_super_secreta_para_jwt') # Clave específica para JWT
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1) # Los tokens expiran en 1 hora
+
+    # Hash de contraseñas (método de werkzeug.security con su coste). Al cambiarlo, los
+    # hashes guardados se recalculan en el siguiente inicio de sesión correcto de cada usuario.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Los hashes se calculan en un pool propio de cada worker: PASSWORD_HASH_WORKERS hilos
+    # y hasta PASSWORD_HASH_QUEUE en espera. Por encima, registro e inicio de sesión
+    # responden 503 en vez de ocupar más hilos de gunicorn: WORKERS + QUEUE debe quedar
+    # por debajo de GUNICORN_THREADS. Con GUNICORN_WORKER_CLASS=gevent usar
+    # PASSWORD_HASH_POOL=process (los hilos serían greenlets y bloquearían el bucle).
+    PASSWORD_HASH_POOL = os.getenv('PASSWORD_HASH_POOL', 'thread')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 1))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 1))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10)) # Segundos esperando un hash
+
+    # Codificador JSON de las respuestas: 'auto' usa orjson si está instalado, 'orjson' lo exige
+    # y 'default' usa el módulo json de la biblioteca estándar
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+
+    # Caracteres de la descripción que devuelve la vista resumida de tarjetas (?view=summary)
+    CARD_SUMMARY_PREVIEW_LENGTH = int(os.getenv('CARD_SUMMARY_PREVIEW_LENGTH', 140))
+
+    # Paginación: tamaño por defecto y máximo impuesto por el servidor para cualquier listado
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 200))
+
+    # Segundos que se reutiliza una decisión de permisos sobre una tarjeta entre peticiones.
+    # 0 la desactiva (solo se memoiza dentro de cada petición). La caché es local de cada
+    # proceso y su invalidación también: con más de un worker (WEB_CONCURRENCY > 1) un
+    # valor > 0 NO es seguro, porque un usuario desasignado o un tablero borrado sigue
+    # teniendo acceso en los demás workers hasta que expire. Usarlo solo con un worker.
+    PERMISSION_CACHE_TTL = float(os.getenv('PERMISSION_CACHE_TTL', 0))
+    # Segundos que se reutiliza el conjunto de tableros propios de un usuario para comprobar
+    # la propiedad en las rutas de listas y tarjetas. Un tablero nuevo se detecta al momento
+    # (si falta se relee); uno borrado puede seguir en el conjunto de otros workers hasta
+    # que expire, pero las rutas de escritura comprueban deleted_at en la base.
+    PRINCIPAL_CACHE_TTL = float(os.getenv('PRINCIPAL_CACHE_TTL', 60))
+
+    # Caché de respuestas GET de tableros, listas y tarjetas, con la revisión del tablero
+    # en la clave. Sin RESPONSE_CACHE_URL es una LRU por worker de RESPONSE_CACHE_SIZE
+    # entradas; con redis://... se comparte entre workers. TTL 0 la desactiva.
+    RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL', '')
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 2000))
+
+    # Máximo de resultados del modo autocompletado de /search (una petición por tecla)
+    TYPEAHEAD_LIMIT = int(os.getenv('TYPEAHEAD_LIMIT', 10))
+
+    # GET /boards/<id>/changes: con más cambios que este límite se pide recargar el tablero completo
+    CHANGES_MAX_ENTRIES = int(os.getenv('CHANGES_MAX_ENTRIES', 1000))
+    # Días que se conserva el registro de cambios (flask --app app changes-prune)
+    CHANGE_LOG_RETENTION_DAYS = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 30))
+
+    # Eventos en tiempo real (GET /boards/<id>/events). Sin EVENT_BROKER_URL cada worker
+    # solo reparte sus propios eventos; con redis://... llegan a todos los workers y servidores.
+    EVENT_BROKER_URL = os.getenv('EVENT_BROKER_URL', '')
+    SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', 100)) # Eventos pendientes por conexión antes de pedir resincronizar
+
+    # Borrado de tableros: hasta BOARD_PURGE_SYNC_MAX_CARDS tarjetas se purga en la propia
+    # petición; por encima se oculta al instante y un hilo de fondo lo purga por lotes de
+    # BOARD_PURGE_BATCH_SIZE tarjetas, con una pausa entre lotes para otras escrituras.
+    BOARD_PURGE_SYNC_MAX_CARDS = int(os.getenv('BOARD_PURGE_SYNC_MAX_CARDS', 1000))
+    BOARD_PURGE_BATCH_SIZE = int(os.getenv('BOARD_PURGE_BATCH_SIZE', 500))
+    BOARD_PURGE_PAUSE_SECONDS = float(os.getenv('BOARD_PURGE_PAUSE_SECONDS', 0.05))
+
+    # Tarjetas por lote (y por transacción) al archivar por lista, por antigüedad o con 'cards-archive'
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+
+    # Exportación (GET /boards/<id>/export): filas leídas del cursor por trozo escrito.
+    # Importación (POST /boards/import): filas por INSERT y por transacción.
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+
+    # Máximo de operaciones aceptadas en una sola petición a POST /cards/bulk
+    BULK_MAX_OPERATIONS = int(os.getenv('BULK_MAX_OPERATIONS', 500))
+
+    # Aplicar migraciones pendientes al crear la aplicación. En producción las aplica
+    # una sola vez el proceso maestro de gunicorn (ver gunicorn.conf.py), no cada worker.
+    AUTO_MIGRATE = True
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+    AUTO_MIGRATE = False
+
+
+def engine_options(config):
+    """Opciones de create_engine según el backend de SQLALCHEMY_DATABASE_URI."""
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        # El busy timeout de pysqlite se da en segundos; los PRAGMA se aplican al conectar (ver app.py)
+        return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+config_by_name = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
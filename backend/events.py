@@ -0,0 +1,120 @@
+import json
+import queue
+import threading
+
+
+class Subscription:
+    """Cola de eventos de un suscriptor (p. ej. una conexión SSE) a un canal."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.overflowed = False # El suscriptor no consumía a tiempo y se perdieron eventos
+        self._queue = queue.Queue(maxsize)
+
+    def get(self, timeout):
+        # Devuelve el siguiente mensaje (str) o None si no llega ninguno en 'timeout' segundos
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBackend:
+    """Transporte dentro del propio proceso: solo llegan los eventos publicados en este worker."""
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+
+class RedisBackend:
+    """Transporte por Redis pub/sub: los eventos de cualquier worker o servidor llegan a todos.
+
+    Requiere el paquete 'redis' (pip install redis).
+    """
+
+    def __init__(self, url, prefix='gestion:'):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("EVENT_BROKER_URL usa Redis pero el paquete 'redis' no está instalado") from exc
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def start(self, deliver):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self.prefix + '*')
+
+        def listen():
+            for item in pubsub.listen():
+                channel = item['channel'].decode()[len(self.prefix):]
+                deliver(channel, item['data'].decode())
+
+        # Un único hilo por proceso reparte los mensajes entre las conexiones locales
+        threading.Thread(target=listen, name='event-broker', daemon=True).start()
+
+    def publish(self, channel, message):
+        self._client.publish(self.prefix + channel, message)
+
+
+class EventBroker:
+    """Reparte mensajes JSON por canal entre los suscriptores del proceso.
+
+    Cada suscriptor tiene una cola acotada; si se llena (cliente lento) se marca
+    como desbordado en vez de bloquear a quien publica. El backend decide si los
+    eventos cruzan procesos (Redis) o se quedan en el worker (local).
+    """
+
+    def __init__(self, backend=None, queue_size=100):
+        self.queue_size = queue_size
+        self.backend = backend or LocalBackend()
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self.backend.start(self._deliver)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.channel, None)
+
+    def publish(self, channel, message):
+        self.backend.publish(channel, json.dumps(message))
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+
+def create_broker(url='', queue_size=100):
+    """Crea el broker según EVENT_BROKER_URL: vacío o 'local' en proceso, 'redis://...' con Redis."""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return EventBroker(RedisBackend(url), queue_size)
+    return EventBroker(LocalBackend(), queue_size)
@@ -0,0 +1,76 @@
+# Configuración de gunicorn para producción: gunicorn -c gunicorn.conf.py wsgi:app
+# Todos los valores se pueden ajustar con variables de entorno.
+import multiprocessing
+import os
+import re
+
+from gunicorn.glogging import Logger
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# Procesos (workers) e hilos por proceso. gthread atiende varias peticiones por
+# proceso mientras otras esperan a la base de datos.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Cada conexión SSE abierta (GET /boards/<id>/events) ocupa un hilo con gthread.
+# Para miles de espectadores usar GUNICORN_WORKER_CLASS=gevent (pip install gevent):
+# cada conexión inactiva es entonces un greenlet y este es el máximo por worker.
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 2000))
+
+# Apagado ordenado: con SIGTERM cada worker deja de aceptar conexiones y tiene
+# graceful_timeout segundos para terminar las peticiones en curso.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Reciclar workers periódicamente acota el crecimiento de memoria
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+class AccessLogger(Logger):
+    # GET /boards/<id>/events recibe el token en la URL (?jwt=<token>): EventSource no puede
+    # enviar cabeceras. El log de accesos guarda la petición sin el valor del token.
+    TOKEN_PARAM = re.compile(r'(^|&)jwt=[^&]*')
+
+    def atoms(self, resp, req, environ, request_time):
+        atoms = super().atoms(resp, req, environ, request_time)
+        query = atoms['q'] or ''
+        if 'jwt=' in query:
+            redacted = self.TOKEN_PARAM.sub(r'\1jwt=[redacted]', query)
+            atoms['r'] = atoms['r'].replace(query, redacted)
+            atoms['q'] = redacted
+        return atoms
+
+
+logger_class = AccessLogger
+
+
+def on_starting(server):
+    # Las migraciones se aplican una sola vez en el proceso maestro, antes de crear
+    # los workers; cada worker solo calienta su pool de conexiones (ver create_app).
+    from app import create_app, upgrade_database
+
+    app = create_app('production')
+    if workers > 1 and app.config['PERMISSION_CACHE_TTL'] > 0:
+        server.log.warning('PERMISSION_CACHE_TTL=%s con %s workers: la caché de permisos es local '
+                           'de cada proceso y una revocación tarda hasta ese tiempo en verse en los demás',
+                           app.config['PERMISSION_CACHE_TTL'], workers)
+    with app.app_context():
+        upgrade_database()
+        from app import db
+        db.engine.dispose() # Las conexiones del maestro no deben heredarse en los workers
+
+
+def worker_exit(server, worker):
+    # Cierra las conexiones del pool del worker y su pool de hashes de contraseña al terminar
+    from app import db
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose()
+    app.extensions['password_hasher'].shutdown()
@@ -0,0 +1,44 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJob:
+    """Ejecuta una función en un hilo de fondo del proceso, sin solapar ejecuciones.
+
+    request() la pone en marcha si no está corriendo; si ya corre, se repite una vez
+    más al terminar, de modo que ninguna petición se pierde. Pensada para trabajo
+    idempotente que también puede lanzarse desde la línea de comandos (p. ej. purgas).
+    """
+
+    def __init__(self, fn, name):
+        self.fn = fn
+        self.name = name
+        self._pending = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        with self._lock:
+            return self._thread is not None
+
+    def request(self):
+        with self._lock:
+            self._pending = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                self._pending = False
+            try:
+                self.fn()
+            except Exception:
+                logger.exception('Error en la tarea de fondo %s', self.name)
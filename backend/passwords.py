@@ -0,0 +1,83 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Hay demasiados cálculos de contraseña en curso o en cola; reintentar más tarde."""
+
+
+class PasswordHasher:
+    """Calcula y verifica hashes de contraseña en un pool acotado, fuera del hilo de la petición.
+
+    La derivación de claves (scrypt, pbkdf2) es lenta a propósito. Con un pool de
+    'workers' hilos (hashlib libera el GIL mientras calcula) o procesos, una ráfaga
+    de inicios de sesión ocupa como mucho esos núcleos y el resto de peticiones
+    sigue atendiéndose. Se admiten 'queue_size' cálculos más en espera; pasado ese
+    límite se lanza HasherBusy en vez de acumular peticiones bloqueadas.
+
+    'method' es el de werkzeug.security (p. ej. 'scrypt:32768:8:1' o
+    'pbkdf2:sha256:600000'). Los hashes guardados con otro método o coste se
+    detectan con needs_rehash() y se recalculan al iniciar sesión.
+    """
+
+    def __init__(self, method, workers=1, queue_size=1, timeout=10, pool='thread'):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self.pool = pool
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._prefix = None
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # El prefijo de un hash de werkzeug es el método con todos sus parámetros
+        return password_hash.split('$', 1)[0] != self.method_prefix
+
+    @property
+    def method_prefix(self):
+        # werkzeug completa los parámetros omitidos ('scrypt' -> 'scrypt:32768:8:1');
+        # se obtiene de un hash real para comparar siempre con la forma completa
+        if self._prefix is None:
+            self._prefix = self.hash('').split('$', 1)[0]
+        return self._prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy() from None
+
+    def _get_executor(self):
+        # Se crea en el primer uso: así cada worker de gunicorn tiene su propio pool
+        # y no hereda hilos del proceso maestro
+        with self._lock:
+            if self._executor is None:
+                if self.pool == 'process':
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+            return self._executor
@@ -0,0 +1,158 @@
+from operator import attrgetter
+
+from flask.json.provider import DefaultJSONProvider
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class Schema:
+    """Convierte objetos del modelo en dicts para la API a partir de una lista de campos.
+
+    Cada campo es un nombre de atributo o un par (nombre, conversión). Solo usa
+    getattr, así que sirve para entidades del ORM y para filas de consultas por
+    columnas con los mismos nombres. Los campos calculados por la ruta (p. ej.
+    'assigned_users') se declaran en 'extra' y se pasan a dump() ya calculados.
+    """
+
+    def __init__(self, *fields, extra=()):
+        self.fields = {}
+        for field in fields:
+            name, convert = field if isinstance(field, tuple) else (field, None)
+            self.fields[name] = (attrgetter(name), convert)
+        self.extra = tuple(extra)
+        self._plans = {}
+
+    @property
+    def names(self):
+        return (*self.fields, *self.extra)
+
+    def parse_fields(self, value):
+        """Valida ?fields=a,b,c. Devuelve (campos o None si no se pidió, error_msg)."""
+        if not value:
+            return None, None
+        requested = tuple(sorted({name.strip() for name in value.split(',') if name.strip()}))
+        unknown = [name for name in requested if name not in self.fields and name not in self.extra]
+        if unknown or not requested:
+            return None, f"Unknown fields: {', '.join(unknown) or value}. Available: {', '.join(self.names)}"
+        return requested, None
+
+    def wants(self, name, only=None):
+        # Si la ruta debe calcular un campo extra (evita consultas para campos no pedidos)
+        return only is None or name in only
+
+    def dump(self, obj, only=None, **extra):
+        result = {}
+        for name, getter, convert in self._plan(only):
+            value = getter(obj)
+            result[name] = convert(value) if convert is not None and value is not None else value
+        for name, value in extra.items():
+            if only is None or name in only:
+                result[name] = value
+        return result
+
+    def dump_many(self, objs, only=None):
+        return [self.dump(obj, only) for obj in objs]
+
+    def _plan(self, only):
+        # Lista precalculada (nombre, getter, conversión) para cada selección de campos
+        plan = self._plans.get(only)
+        if plan is None:
+            names = self.fields if only is None else [name for name in only if name in self.fields]
+            plan = self._plans[only] = [(name, *self.fields[name]) for name in names]
+        return plan
+
+
+# ---------------------------------------------------------
+# Un esquema por modelo
+# ---------------------------------------------------------
+
+USER = Schema('id', 'username', 'email')
+
+BOARD = Schema(
+    'id', 'title', 'description', 'owner_id',
+    ('created_at', isoformat), ('updated_at', isoformat), 'revision', 'card_count',
+    extra=('lists', 'overdue_count'),
+)
+
+LIST = Schema(
+    'id', 'title', 'board_id', 'order',
+    ('created_at', isoformat), ('updated_at', isoformat), 'card_count',
+    extra=('cards',),
+)
+
+CARD = Schema(
+    'id', 'title', 'description', 'list_id', 'creator_id', ('due_date', isoformat), 'order',
+    ('created_at', isoformat), ('updated_at', isoformat), 'comment_count', 'assignment_count',
+    extra=('assigned_users', 'board_id'),
+)
+
+# Vista resumida (?view=summary): sin el texto completo de la descripción. Se usa
+# con filas de consultas por columnas, no con entidades Card.
+CARD_SUMMARY = Schema(
+    'id', 'title', 'list_id', 'creator_id', ('due_date', isoformat), 'order',
+    'comment_count', 'assignment_count', 'description_length', 'description_preview',
+    extra=('assigned_users', 'board_id'),
+)
+
+COMMENT = Schema(
+    'id', 'content', 'card_id', 'user_id',
+    ('created_at', isoformat), ('updated_at', isoformat),
+    extra=('username',),
+)
+
+ASSIGNMENT = Schema('id', 'card_id', 'user_id', ('assigned_at', isoformat))
+
+# Tarjetas archivadas: card_id y list_id son los que tenían antes de archivarse
+ARCHIVED_CARD = Schema(
+    'id', 'card_id', 'board_id', 'list_id', 'title', 'description', 'creator_id', ('due_date', isoformat), 'order',
+    ('created_at', isoformat), ('updated_at', isoformat), 'comment_count', 'assignment_count',
+    ('archived_at', isoformat), 'archived_by',
+    extra=('assigned_users', 'comments'),
+)
+
+ARCHIVED_COMMENT = Schema('id', 'comment_id', 'content', 'user_id', ('created_at', isoformat), ('updated_at', isoformat))
+
+SAVED_FILTER = Schema('id', 'name', 'params', 'card_count', ('created_at', isoformat), ('updated_at', isoformat))
+
+# Subconjunto de CARD que devuelven las rutas de mover/reordenar
+CARD_POSITION = ('id', 'list_id', 'order', 'title')
+
+
+# ---------------------------------------------------------
+# Codificador JSON rápido
+# ---------------------------------------------------------
+
+try:
+    import orjson
+except ImportError: # Opcional: sin orjson se usa el codificador de la biblioteca estándar
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Proveedor de app.json sobre orjson: mismo resultado (claves ordenadas) y varias veces más rápido."""
+
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Escribe directamente los bytes de orjson, sin pasar por str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.options), mimetype=self.mimetype
+        )
+
+
+def json_provider_class(name):
+    """Clase de proveedor JSON para JSON_PROVIDER: 'orjson', 'default' o 'auto' (orjson si está instalado)."""
+    if name == 'orjson' or (name == 'auto' and orjson is not None):
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER=orjson pero el paquete 'orjson' no está instalado")
+        return OrjsonProvider
+    return DefaultJSONProvider
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db, Board, List, Card, Comment, CardAssignment
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000', # Rápido: los tests no miden el coste del hash
+        'RESPONSE_CACHE_TTL': 0, # Sin caché de respuestas: cada GET llega a la base
+    })
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """register('ana') crea el usuario y devuelve (user_id, cabeceras con su token)."""
+    def register(username):
+        response = client.post('/auth/register', json={
+            'username': username, 'email': f'{username}@example.com', 'password': 'secret'
+        })
+        assert response.status_code == 201, response.json
+        token = client.post('/auth/login', json={'username': username, 'password': 'secret'}).json['access_token']
+        return response.json['user_id'], {'Authorization': f'Bearer {token}'}
+    return register
+
+
+@pytest.fixture
+def make_board(app):
+    """make_board(owner_id, lists, cards_per_list, ...) crea un tablero por el ORM y devuelve sus ids."""
+    def make_board(owner_id, lists, cards_per_list, assignee_ids=(), comments_per_card=0):
+        with app.app_context():
+            board = Board(title='Board', owner_id=owner_id)
+            db.session.add(board)
+            for list_position in range(lists):
+                lst = List(title=f'List {list_position}', board=board, order=(list_position + 1) * 1024)
+                db.session.add(lst)
+                for card_position in range(cards_per_list):
+                    card = Card(title=f'Card {list_position}.{card_position}', list=lst, creator_id=owner_id,
+                                order=(card_position + 1) * 1024)
+                    card.assignments = [CardAssignment(user_id=user_id) for user_id in assignee_ids]
+                    card.comments = [Comment(content=f'Comment {n}', user_id=owner_id) for n in range(comments_per_card)]
+                    db.session.add(card)
+            db.session.commit()
+            return {
+                'board_id': board.id,
+                'list_ids': [lst.id for lst in board.lists],
+                'card_ids': [card.id for lst in board.lists for card in lst.cards],
+            }
+    return make_board
+
+
+class QueryCounter:
+    """Anota las sentencias SQL (con sus parámetros) enviadas a la base mientras está activo."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.executed = [] # (sentencia, parámetros)
+
+    def __enter__(self):
+        self.statements = []
+        self.executed = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.executed.append((statement, parameters))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries(app):
+    with app.app_context():
+        engine = db.engine
+    return lambda: QueryCounter(engine)
@@ -0,0 +1,58 @@
+from app import db, update, Card
+
+
+def board_revision(client, headers, board_id):
+    return client.get(f'/boards/{board_id}', headers=headers).json['revision']
+
+
+def changes_since(client, headers, board_id, since):
+    response = client.get(f'/boards/{board_id}/changes?since={since}', headers=headers)
+    assert response.status_code == 200, response.json
+    assert not response.json['reset']
+    return response.json
+
+
+def test_rebalance_reports_every_renumbered_card(app, client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=3)
+    first, second, third = board['card_ids']
+    with app.app_context():
+        db.session.execute(update(Card).where(Card.id.in_([first, second])).values(order=2048))
+        db.session.commit()
+    since = board_revision(client, headers, board['board_id'])
+
+    # Sin hueco entre las dos empatadas: se renumera toda la lista
+    response = client.put(f'/cards/{third}/move', json={'new_list_id': board['list_ids'][0], 'after_card_id': first},
+                          headers=headers)
+    assert response.status_code == 200, response.json
+
+    changed = {card['id']: card['order'] for card in changes_since(client, headers, board['board_id'], since)['upserts']['card']}
+    served = {card['id']: card['order'] for card in client.get(f"/lists/{board['list_ids'][0]}/cards", headers=headers).json['items']}
+    assert changed == served
+    assert sorted(served, key=lambda card_id: (served[card_id], card_id)) == [first, third, second]
+
+
+def test_changes_after_create_move_and_delete(client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=2, cards_per_list=1)
+    board_id, (source, target) = board['board_id'], board['list_ids']
+
+    since = board_revision(client, headers, board_id)
+    card_id = client.post(f'/lists/{source}/cards', json={'title': 'New'}, headers=headers).json['card']['id']
+    changes = changes_since(client, headers, board_id, since)
+    assert [(card['id'], card['list_id']) for card in changes['upserts']['card']] == [(card_id, source)]
+    assert not any(changes['deletes'].values())
+
+    since = changes['revision']
+    response = client.put(f'/cards/{card_id}/move', json={'new_list_id': target}, headers=headers)
+    assert response.status_code == 200, response.json
+    changes = changes_since(client, headers, board_id, since)
+    assert [(card['id'], card['list_id']) for card in changes['upserts']['card']] == [(card_id, target)]
+    assert {lst['id'] for lst in changes['upserts']['list']} == {source, target} # Contadores de ambas listas
+
+    since = changes['revision']
+    assert client.delete(f'/cards/{card_id}', headers=headers).status_code == 200
+    changes = changes_since(client, headers, board_id, since)
+    assert changes['deletes']['card'] == [card_id]
+    assert changes['upserts']['card'] == []
+    assert changes['revision'] == board_revision(client, headers, board_id)
@@ -0,0 +1,28 @@
+import json
+import sqlite3
+
+
+def test_hello_revision_is_read_after_subscribing(app, client, register, make_board, monkeypatch):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=1)
+    broker = app.extensions['event_broker']
+    path = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+
+    def subscribe(channel):
+        subscription = broker.__class__.subscribe(broker, channel)
+        # Un commit de otra conexión justo después de suscribirse: su evento ya no llegaría a
+        # este stream si se hubiera publicado antes, así que 'hello' debe incluirlo
+        with sqlite3.connect(path) as other:
+            other.execute('UPDATE boards SET revision = revision + 1 WHERE id = ?', (board['board_id'],))
+        return subscription
+
+    monkeypatch.setattr(broker, 'subscribe', subscribe)
+    revision = client.get(f"/boards/{board['board_id']}", headers=headers).json['revision']
+    token = headers['Authorization'].removeprefix('Bearer ')
+
+    response = client.get(f"/boards/{board['board_id']}/events?jwt={token}", buffered=False)
+    hello = next(response.iter_encoded()).decode()
+    response.close()
+
+    assert 'event: hello' in hello
+    assert json.loads(hello.split('data: ', 1)[1]) == {'revision': revision + 1}
@@ -0,0 +1,97 @@
+import json
+import sqlite3
+
+import pytest
+
+from app import db, Board
+
+
+def ndjson(*records):
+    return '\n'.join(json.dumps(record) for record in records) + '\n'
+
+
+def import_board(client, headers, *records):
+    return client.post('/boards/import', data=ndjson(*records), headers=headers,
+                       content_type='application/x-ndjson')
+
+
+def live_boards(app):
+    with app.app_context():
+        return db.session.query(Board).filter(Board.deleted_at.is_(None)).count()
+
+
+def test_export_streams_one_snapshot(app, client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=2, cards_per_list=3)
+    app.config['EXPORT_CHUNK_SIZE'] = 1
+
+    response = client.get(f"/boards/{board['board_id']}/export", headers=headers, buffered=False)
+    assert response.status_code == 200
+    chunks = response.iter_encoded()
+    first = next(chunks) # El tablero ya se ha leído: la instantánea está tomada
+
+    # Una escritura de otra conexión a mitad del stream no debe aparecer en la exportación
+    path = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    with sqlite3.connect(path) as other:
+        other.execute('INSERT INTO lists (title, board_id, "order", created_at, updated_at) '
+                      "VALUES ('late', ?, 99999, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)", (board['board_id'],))
+    body = first + b''.join(chunks)
+    response.close()
+
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert [line['title'] for line in lines if line['type'] == 'list'] == ['List 0', 'List 1']
+    assert sum(line['type'] == 'card' for line in lines) == 6
+
+
+def test_export_rejects_board_deleted_by_another_worker(app, client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=1)
+    # Deja el tablero en la caché de tableros propios de este proceso
+    assert client.put(f"/lists/{board['list_ids'][0]}", json={'title': 'List 0'}, headers=headers).status_code == 200
+    with app.app_context():
+        db.session.get(Board, board['board_id']).deleted_at = db.func.now() # Como si lo borrara otro worker
+        db.session.commit()
+
+    response = client.get(f"/boards/{board['board_id']}/export", headers=headers)
+    assert response.status_code == 404
+
+
+def test_export_then_import_round_trip(client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=2, cards_per_list=2, assignee_ids=(owner_id,), comments_per_card=1)
+    exported = client.get(f"/boards/{board['board_id']}/export", headers=headers).data
+
+    response = client.post('/boards/import', data=exported, headers=headers, content_type='application/x-ndjson')
+    assert response.status_code == 201, response.json
+    assert response.json['imported'] == {'lists': 2, 'cards': 4, 'comments': 4, 'assignments': 4}
+
+
+@pytest.mark.parametrize('records, msg', [
+    ([{'type': 'board', 'title': 'b' * 121}], "Line 1: 'title' is longer than 120 characters"),
+    ([{'type': 'board', 'title': 'B'}, {'type': 'list', 'id': 1, 'title': 'l' * 121}],
+     "Line 2: 'title' is longer than 120 characters"),
+    ([{'type': 'board', 'title': 'B'}, {'type': 'list', 'id': [1], 'title': 'L'}],
+     "Line 2: 'id' must be an integer or a string"),
+    ([{'type': 'board', 'title': 'B'}, {'type': 'list', 'id': 1, 'title': 'L'},
+      {'type': 'card', 'id': 1, 'list_id': {'id': 1}, 'title': 'C'}],
+     "Line 3: 'list_id' must be an integer or a string"),
+    ([{'type': 'board', 'title': 'B'}, {'type': 'list', 'id': 1, 'title': 'L'},
+      {'type': 'card', 'id': 1, 'list_id': 1, 'title': 'C', 'creator_id': [7]}],
+     "Line 3: 'creator_id' must be an integer or a string"),
+    ([{'type': 'board', 'title': 'B'}, {'type': 'list', 'id': 1, 'title': 'L'},
+      {'type': 'card', 'id': 1, 'list_id': 1, 'title': 'C'},
+      {'type': 'comment', 'card_id': 1, 'user_id': {}, 'content': 'x'}],
+     "Line 4: 'user_id' must be an integer or a string"),
+    ([{'type': 'board', 'title': 'B'}, {'type': 'list', 'id': 1, 'title': 'L'},
+      {'type': 'card', 'id': 1, 'list_id': 1, 'title': 'C'},
+      {'type': 'assignment', 'card_id': True, 'user_id': 1}],
+     "Line 4: 'card_id' must be an integer or a string"),
+])
+def test_import_rejects_invalid_lines(app, client, register, records, msg):
+    _, headers = register('ana')
+
+    response = import_board(client, headers, *records)
+
+    assert response.status_code == 400
+    assert response.json['msg'] == msg
+    assert live_boards(app) == 0 # Los lotes ya confirmados se descartan con el tablero
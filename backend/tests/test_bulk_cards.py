@@ -0,0 +1,82 @@
+import pytest
+
+INVALID_IDS = [[1], {'id': 1}, True, '1']
+
+
+@pytest.mark.parametrize('value', INVALID_IDS)
+@pytest.mark.parametrize('op, field', [
+    ({'op': 'create', 'title': 'x'}, 'list_id'),
+    ({'op': 'update', 'title': 'x'}, 'card_id'),
+    ({'op': 'delete'}, 'card_id'),
+    ({'op': 'assign', 'user_id': 1}, 'card_id'),
+    ({'op': 'move', 'card_id': 'CARD'}, 'new_list_id'),
+    ({'op': 'move', 'card_id': 'CARD', 'new_list_id': 'LIST'}, 'after_card_id'),
+    ({'op': 'assign', 'card_id': 'CARD'}, 'user_id'),
+])
+def test_bulk_rejects_non_integer_ids_per_item(client, register, make_board, op, field, value):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=1)
+    list_id, card_id = board['list_ids'][0], board['card_ids'][0]
+    # 'CARD' y 'LIST' se sustituyen por ids válidos; field lleva el valor no válido
+    placeholders = {'CARD': card_id, 'LIST': list_id}
+    invalid = {**{key: placeholders.get(item, item) for key, item in op.items()}, field: value}
+
+    response = client.post('/cards/bulk', headers=headers, json={'operations': [
+        invalid,
+        {'op': 'create', 'list_id': list_id, 'title': 'still created'},
+    ]})
+
+    assert response.status_code == 200, response.json
+    bad, good = response.json['results']
+    assert (bad['status'], bad['msg']) == (400, f'{field} must be an integer')
+    assert good['status'] == 201
+
+
+@pytest.mark.parametrize('move', [{'card_id': [1]}, {'card_id': True}, {'card_id': 1, 'after_card_id': {}}])
+def test_reorder_rejects_non_integer_ids(client, register, make_board, move):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=1)
+
+    response = client.put(f"/lists/{board['list_ids'][0]}/reorder", json={'moves': [move]}, headers=headers)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('op, msg', [
+    ({'op': 'create', 'list_id': 'LIST', 'title': 'x', 'due_date': 5}, "due_date must be an ISO 8601 string or 'null'"),
+    ({'op': 'update', 'card_id': 'CARD', 'due_date': ['2030-01-01']}, "due_date must be an ISO 8601 string or 'null'"),
+    ({'op': 'create', 'list_id': 'LIST', 'title': {'a': 1}}, 'title must be a non-empty string'),
+    ({'op': 'update', 'card_id': 'CARD', 'title': 7}, 'title must be a non-empty string'),
+    ({'op': 'create', 'list_id': 'LIST', 'title': 'x', 'description': []}, 'description must be a string'),
+    ({'op': 'create', 'list_id': 'LIST', 'title': 'x', 'order': '5'}, 'order must be an integer'),
+    ({'op': 'update', 'card_id': 'CARD', 'order': 'abc'}, 'order must be an integer'),
+    ({'op': 'update', 'card_id': 'CARD', 'order': None}, 'order must be an integer'),
+    ({'op': 'move', 'card_id': 'CARD', 'new_list_id': 'LIST', 'new_order': [1]}, 'new_order must be an integer'),
+])
+def test_bulk_rejects_bad_field_types_per_item(client, register, make_board, op, msg):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=1)
+    list_id, card_id = board['list_ids'][0], board['card_ids'][0]
+    placeholders = {'CARD': card_id, 'LIST': list_id}
+    invalid = {key: placeholders.get(item, item) if isinstance(item, str) else item for key, item in op.items()}
+
+    response = client.post('/cards/bulk', headers=headers, json={'operations': [
+        invalid,
+        {'op': 'create', 'list_id': list_id, 'title': 'still created'},
+    ]})
+
+    assert response.status_code == 200, response.json
+    bad, good = response.json['results']
+    assert (bad['status'], bad['msg']) == (400, msg)
+    assert good['status'] == 201
+    items = client.get(f'/lists/{list_id}/cards', headers=headers).json['items']
+    assert all(isinstance(item['order'], int) for item in items)
+
+
+def test_update_card_rejects_non_string_due_date(client, register, make_board):
+    owner_id, headers = register('ana')
+    card_id = make_board(owner_id, lists=1, cards_per_list=1)['card_ids'][0]
+
+    response = client.put(f'/cards/{card_id}', json={'due_date': 5}, headers=headers)
+
+    assert response.status_code == 400
@@ -0,0 +1,44 @@
+import pytest
+
+from cache import RedisCache, TTLCache
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    """redis_cache() crea una RedisCache más (otro worker) sobre el mismo servidor Redis falso."""
+    import redis
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', staticmethod(lambda url: fakeredis.FakeRedis(server=server)))
+    return lambda: RedisCache('redis://localhost', ttl=60)
+
+
+def test_redis_invalidate_tags_reaches_other_workers(redis_cache):
+    worker_a, worker_b = redis_cache(), redis_cache()
+    worker_a.set('1:5:/boards/1/full', b'board 1', tags=(('board', 1),))
+    worker_a.set('2:3:/boards/2/full', b'board 2', tags=(('board', 2),))
+
+    worker_b.invalidate_tags(('board', 1))
+
+    assert worker_a.get('1:5:/boards/1/full') is None
+    assert worker_a.get('2:3:/boards/2/full') == b'board 2'
+    assert worker_b.stats()['invalidations'] == 1
+
+
+def test_redis_tag_sets_expire_with_their_entries(redis_cache):
+    cache = redis_cache()
+    cache.set('k', b'v', tags=(('board', 1),))
+
+    assert 0 < cache._client.ttl(cache._tag_key(('board', 1))) <= 60
+
+
+def test_local_and_redis_caches_invalidate_alike(redis_cache):
+    for cache in (TTLCache(60), redis_cache()):
+        cache.set('a', b'1', tags=(('card', 1), ('board', 1)))
+        cache.set('b', b'2', tags=(('board', 1),))
+        cache.set('c', b'3', tags=(('board', 2),))
+        cache.invalidate_tags(('card', 1))
+        assert (cache.get('a'), cache.get('b'), cache.get('c')) == (None, b'2', b'3')
+        cache.invalidate_tags(('board', 1), ('board', 2))
+        assert (cache.get('b'), cache.get('c')) == (None, None)
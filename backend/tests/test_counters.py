@@ -0,0 +1,27 @@
+from app import repair_counters
+
+
+def assert_no_drift(app):
+    with app.app_context():
+        drift = repair_counters(dry_run=True)
+    assert drift and not any(drift.values()), drift
+
+
+def test_counters_do_not_drift(app, client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=3, cards_per_list=2, assignee_ids=(owner_id,), comments_per_card=2)
+    first, second, third = board['list_ids']
+
+    card_id = client.post(f'/lists/{first}/cards', json={'title': 'New'}, headers=headers).json['card']['id']
+    assert client.put(f'/cards/{card_id}/move', json={'new_list_id': second}, headers=headers).status_code == 200
+    assert client.delete(f"/cards/{board['card_ids'][0]}", headers=headers).status_code == 200
+    assert client.delete(f'/lists/{third}', headers=headers).status_code == 200
+    archived_id = client.post(f"/cards/{board['card_ids'][1]}/archive", headers=headers).json['archived_card']['id']
+    assert_no_drift(app)
+
+    response = client.post(f'/archived-cards/{archived_id}/restore', json={'list_id': second}, headers=headers)
+    assert response.status_code == 200, response.json
+    assert_no_drift(app)
+
+    board_data = client.get(f"/boards/{board['board_id']}", headers=headers).json
+    assert board_data['card_count'] == 4 # 6 + 1 creada - 1 borrada - 2 de la lista borrada
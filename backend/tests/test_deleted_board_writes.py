@@ -0,0 +1,59 @@
+import pytest
+
+from app import db, Board
+
+WRITES = [
+    ('put', '/lists/{list_id}', {'title': 'x'}),
+    ('delete', '/lists/{list_id}', None),
+    ('post', '/lists/{list_id}/cards', {'title': 'x'}),
+    ('put', '/lists/{list_id}/reorder', {'moves': []}),
+    ('post', '/lists/{list_id}/archive', {}),
+    ('post', '/boards/{board_id}/archive', {'older_than_days': 1}),
+]
+READS = [
+    ('get', '/boards/{board_id}/archived-cards', None),
+]
+
+
+@pytest.mark.parametrize('method, path, body', WRITES + READS)
+def test_request_to_board_deleted_by_another_worker(app, client, register, make_board, method, path, body):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=1)
+    # Deja el tablero en la caché de tableros propios de este proceso
+    assert client.put(f"/lists/{board['list_ids'][0]}", json={'title': 'List 0'}, headers=headers).status_code == 200
+    with app.app_context():
+        db.session.get(Board, board['board_id']).deleted_at = db.func.now() # Borrado en otro worker: la caché no se entera
+        db.session.commit()
+
+    url = path.format(board_id=board['board_id'], list_id=board['list_ids'][0])
+    response = getattr(client, method)(url, json=body, headers=headers)
+
+    assert response.status_code == 404
+
+
+def test_restore_into_deleted_board(app, client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=1)
+    archived_id = client.post(f"/cards/{board['card_ids'][0]}/archive", headers=headers).json['archived_card']['id']
+    with app.app_context():
+        db.session.get(Board, board['board_id']).deleted_at = db.func.now()
+        db.session.commit()
+
+    response = client.post(f'/archived-cards/{archived_id}/restore', headers=headers)
+
+    assert response.status_code == 404
+
+
+def test_filter_own_assignments_skips_deleted_board(app, client, register, make_board):
+    owner_id, _ = register('ana')
+    assignee_id, headers = register('bea')
+    board = make_board(owner_id, lists=1, cards_per_list=1, assignee_ids=(assignee_id,))
+    assert len(client.get(f'/cards/filter?user_id={assignee_id}', headers=headers).json['items']) == 1
+    with app.app_context():
+        db.session.get(Board, board['board_id']).deleted_at = db.func.now() # Borrado pendiente de purga
+        db.session.commit()
+
+    response = client.get(f'/cards/filter?user_id={assignee_id}', headers=headers)
+
+    assert response.status_code == 200
+    assert response.json['items'] == []
@@ -0,0 +1,81 @@
+import sqlite3
+
+import app as app_module
+from app import create_app, db, text, Card, MIGRATIONS, SchemaVersion, missing_cascades
+
+# Esquema de la versión inicial (db.create_all de los modelos originales): claves
+# foráneas sin ON DELETE CASCADE, sin contadores, sellos ni tabla de versiones
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, username VARCHAR(80) NOT NULL, email VARCHAR(120) NOT NULL,
+    password_hash VARCHAR(128) NOT NULL, created_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (username), UNIQUE (email)
+);
+CREATE TABLE boards (
+    id INTEGER NOT NULL, title VARCHAR(120) NOT NULL, description TEXT, owner_id INTEGER NOT NULL,
+    created_at DATETIME, PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id)
+);
+CREATE TABLE lists (
+    id INTEGER NOT NULL, title VARCHAR(120) NOT NULL, board_id INTEGER NOT NULL, "order" INTEGER NOT NULL,
+    created_at DATETIME, PRIMARY KEY (id), FOREIGN KEY(board_id) REFERENCES boards (id)
+);
+CREATE TABLE cards (
+    id INTEGER NOT NULL, title VARCHAR(255) NOT NULL, description TEXT, list_id INTEGER NOT NULL,
+    creator_id INTEGER NOT NULL, due_date DATETIME, "order" INTEGER NOT NULL, created_at DATETIME,
+    updated_at DATETIME, PRIMARY KEY (id),
+    FOREIGN KEY(list_id) REFERENCES lists (id), FOREIGN KEY(creator_id) REFERENCES users (id)
+);
+CREATE TABLE comments (
+    id INTEGER NOT NULL, content TEXT NOT NULL, card_id INTEGER NOT NULL, user_id INTEGER NOT NULL,
+    created_at DATETIME, PRIMARY KEY (id),
+    FOREIGN KEY(card_id) REFERENCES cards (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE card_assignments (
+    id INTEGER NOT NULL, card_id INTEGER NOT NULL, user_id INTEGER NOT NULL, assigned_at DATETIME,
+    PRIMARY KEY (id), CONSTRAINT _card_user_uc UNIQUE (card_id, user_id),
+    FOREIGN KEY(card_id) REFERENCES cards (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+INSERT INTO users VALUES (1, 'ana', 'ana@example.com', 'x', '2024-01-01 00:00:00');
+INSERT INTO boards VALUES (1, 'Board', NULL, 1, '2024-01-01 00:00:00');
+INSERT INTO lists VALUES (1, 'List', 1, 0, '2024-01-01 00:00:00');
+INSERT INTO cards VALUES (1, 'Old card', 'legacy notes', 1, 1, NULL, 0, '2024-01-01 00:00:00', NULL);
+INSERT INTO comments VALUES (1, 'legacy comment', 1, 1, '2024-01-01 00:00:00');
+INSERT INTO card_assignments VALUES (1, 1, 1, '2024-01-01 00:00:00');
+"""
+
+
+def search(kind, query):
+    return db.session.execute(text(
+        "SELECT ref_id FROM search_index WHERE search_index MATCH :query AND kind = :kind"
+    ), {'query': query, 'kind': kind}).scalars().all()
+
+
+def test_cascade_migration_on_baseline_schema(tmp_path, monkeypatch):
+    # Hasta la migración 8: la 9 vuelve a crear los disparadores de búsqueda y ocultaría un fallo de la 8
+    monkeypatch.setattr(app_module, 'MIGRATIONS', [migration for migration in MIGRATIONS if migration[0] <= 8])
+    path = tmp_path / 'baseline.db'
+    with sqlite3.connect(path) as baseline:
+        baseline.executescript(BASELINE_SCHEMA)
+
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'RESPONSE_CACHE_TTL': 0})
+    with app.app_context():
+        assert db.session.query(db.func.max(SchemaVersion.version)).scalar() == 8
+        assert list(missing_cascades(db.session.connection())) == []
+
+        # Los disparadores de búsqueda se recrean tras reconstruir cards y comments
+        assert search('card', 'legacy') == [1]
+        assert search('comment', 'legacy') == [1]
+        db.session.get(Card, 1).title = 'Renamed card'
+        db.session.commit()
+        assert search('card', 'renamed') == [1]
+
+        # Borrar el tablero en la base arrastra listas, tarjetas, comentarios y asignaciones
+        db.session.execute(text('DELETE FROM boards WHERE id = 1'))
+        db.session.commit()
+        for table in ('lists', 'cards', 'comments', 'card_assignments'):
+            assert db.session.execute(text(f'SELECT count(*) FROM {table}')).scalar() == 0, table
+        assert search('card', 'renamed') == []
+        assert search('comment', 'legacy') == []
+
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+
+def card_ids(response):
+    assert response.status_code == 200, response.json
+    return sorted(card['id'] for card in response.json['items'])
+
+
+def due_in(days):
+    return (datetime.utcnow() + timedelta(days=days)).replace(microsecond=0).isoformat()
+
+
+def test_my_cards_follow_assignments(client, register, make_board):
+    owner_id, owner_headers = register('ana')
+    assignee_id, headers = register('bea')
+    board = make_board(owner_id, lists=1, cards_per_list=2)
+    card_id = board['card_ids'][0]
+    assert card_ids(client.get('/me/cards', headers=headers)) == []
+
+    assert client.post(f'/cards/{card_id}/assign', json={'user_id': assignee_id}, headers=owner_headers).status_code == 201
+    assert card_ids(client.get('/me/cards', headers=headers)) == [card_id]
+    assert card_ids(client.get(f"/me/cards?board_id={board['board_id']}", headers=headers)) == [card_id]
+
+    assert client.delete(f'/cards/{card_id}/unassign', json={'user_id': assignee_id},
+                         headers=owner_headers).status_code == 200
+    assert card_ids(client.get('/me/cards', headers=headers)) == []
+
+
+def test_my_due_follows_due_date_and_assignment_changes(client, register, make_board):
+    owner_id, owner_headers = register('ana')
+    assignee_id, headers = register('bea')
+    board = make_board(owner_id, lists=1, cards_per_list=2, assignee_ids=(assignee_id,))
+    card_id = board['card_ids'][0]
+    assert card_ids(client.get('/me/due', headers=headers)) == []
+
+    assert client.put(f'/cards/{card_id}', json={'due_date': due_in(2)}, headers=owner_headers).status_code == 200
+    assert card_ids(client.get('/me/due', headers=headers)) == [card_id]
+    assert card_ids(client.get('/me/due', headers=owner_headers)) == [card_id] # También al dueño del tablero
+
+    assert client.put(f'/cards/{card_id}', json={'due_date': due_in(30)}, headers=owner_headers).status_code == 200
+    assert card_ids(client.get('/me/due', headers=headers)) == []
+    assert card_ids(client.get('/me/due?window=5w', headers=headers)) == [card_id]
+
+    assert client.put(f'/cards/{card_id}', json={'due_date': due_in(-1)}, headers=owner_headers).status_code == 200
+    assert card_ids(client.get('/me/due', headers=headers)) == []
+    assert card_ids(client.get('/me/due?overdue=true', headers=headers)) == [card_id]
+
+    assert client.delete(f'/cards/{card_id}/unassign', json={'user_id': assignee_id},
+                         headers=owner_headers).status_code == 200
+    assert card_ids(client.get('/me/due?overdue=true', headers=headers)) == []
+    assert card_ids(client.get('/me/due?overdue=true', headers=owner_headers)) == [card_id]
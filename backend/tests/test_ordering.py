@@ -0,0 +1,31 @@
+from sqlalchemy.dialects import mysql
+
+from app import db, update, append_order, Card
+
+
+def test_append_order_reads_the_updated_table_through_a_derived_table(app):
+    # MySQL rechaza UPDATE cards SET order = (SELECT max(order) FROM cards ...) (error 1093)
+    with app.app_context():
+        statement = update(Card).where(Card.id == 1).values(order=append_order(Card, Card.list_id, 1))
+    sql = ' '.join(str(statement.compile(dialect=mysql.dialect())).split())
+
+    assert 'FROM (SELECT coalesce(max(cards.`order`)' in sql
+
+
+def test_move_between_tied_neighbours_renumbers_the_list(app, client, register, make_board):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=1, cards_per_list=3)
+    first, second, third = board['card_ids']
+    with app.app_context():
+        # Dos altas simultáneas pueden dejar el mismo 'order'; se desempata por id
+        db.session.execute(update(Card).where(Card.id.in_([first, second])).values(order=2048))
+        db.session.commit()
+
+    response = client.put(f'/cards/{third}/move', json={'new_list_id': board['list_ids'][0], 'after_card_id': first},
+                          headers=headers)
+    assert response.status_code == 200, response.json
+
+    items = client.get(f"/lists/{board['list_ids'][0]}/cards", headers=headers).json['items']
+    assert [item['id'] for item in items] == [first, third, second]
+    orders = [item['order'] for item in items]
+    assert orders == sorted(set(orders))
@@ -0,0 +1,49 @@
+"""Las rutas de lectura de tableros, listas y tarjetas hacen un número fijo de consultas.
+
+Cada ruta se mide con un tablero pequeño y con uno grande: el número de sentencias
+no debe depender de cuántas listas, tarjetas, asignaciones o comentarios haya
+(sin consultas N+1) y no debe superar el límite indicado.
+"""
+import pytest
+
+SIZES = {
+    'small': dict(lists=1, cards_per_list=1, comments_per_card=1),
+    'large': dict(lists=6, cards_per_list=20, comments_per_card=5),
+}
+
+# (ruta, límite de sentencias por petición)
+READ_ROUTES = [
+    ('/boards/{board_id}/full', 4),
+    ('/boards/{board_id}/lists', 2),
+    ('/lists/{list_id}/cards', 2),
+    ('/lists/{list_id}/cards?view=summary', 3),
+    ('/cards/filter?board_id={board_id}', 3),
+    ('/cards/{card_id}/comments', 3),
+    ('/cards/{card_id}/assignments', 3),
+]
+
+
+@pytest.fixture
+def boards(register, make_board):
+    owner_id, headers = register('owner')
+    assignee_ids = [register(name)[0] for name in ('ana', 'luis')]
+    built = {name: make_board(owner_id, assignee_ids=assignee_ids, **size) for name, size in SIZES.items()}
+    return headers, built
+
+
+def query_count(client, count_queries, headers, board, route):
+    url = route.format(board_id=board['board_id'], list_id=board['list_ids'][-1], card_id=board['card_ids'][-1])
+    client.get(url, headers=headers) # Primera petición: calienta cachés de proceso (principal, permisos)
+    with count_queries() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.json
+    return counter.count
+
+
+@pytest.mark.parametrize('route, limit', READ_ROUTES)
+def test_read_route_query_count_is_bounded(client, count_queries, boards, route, limit):
+    headers, built = boards
+    counts = {name: query_count(client, count_queries, headers, board, route) for name, board in built.items()}
+
+    assert counts['large'] == counts['small'], f'{route}: las consultas crecen con el tablero {counts}'
+    assert counts['large'] <= limit, f'{route}: {counts["large"]} sentencias (límite {limit})'
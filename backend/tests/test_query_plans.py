@@ -0,0 +1,105 @@
+"""Las consultas de las rutas principales usan los índices de las migraciones, sin recorrer tablas enteras.
+
+Se capturan las sentencias que ejecuta cada ruta y se repiten con EXPLAIN QUERY PLAN
+(SQLite). Cada ruta debe usar su índice y ninguna puede hacer SCAN de una tabla
+caliente sin índice.
+
+Sin estadísticas, SQLite prefiere las igualdades a los rangos: el rango de vencimiento
+(ix_cards_due_date) solo gana al semi-join de acceso cuando ANALYZE dice que es más
+selectivo, y así se comprueba en test_due_range_uses_due_date_index.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import db, Card
+
+HOT_TABLES = {'boards', 'lists', 'cards', 'comments', 'card_assignments', 'change_log',
+              'user_card_index', 'saved_filters', 'saved_filter_results', 'archived_cards'}
+
+# (ruta, índice que debe aparecer en el plan de alguna de sus consultas)
+ROUTES = [
+    ('/boards', 'ix_boards_owner_id'),
+    ('/boards/{board_id}/lists', 'ix_lists_board_order'),
+    ('/lists/{list_id}/cards', 'ix_cards_list_order'),
+    ('/boards/{board_id}/full', 'ix_cards_list_order'),
+    ('/cards/{card_id}/comments', 'ix_comments_card_created'),
+    ('/cards/filter?user_id={assignee_id}', 'ix_card_assignments_user_card'),
+    ('/cards/filter?creator_id={owner_id}', 'ix_cards_creator_id'),
+    ('/boards/{board_id}/changes?since=1', 'ix_change_log_board_revision'),
+    ('/me/cards', 'ix_user_card_index_assigned'),
+    ('/me/due', 'ix_user_card_index_due'),
+    ('/filters', 'ix_saved_filters_user_id'),
+    ('/boards/{board_id}/archived-cards', 'ix_archived_cards_board'),
+]
+
+
+@pytest.fixture
+def board(app, client, register, make_board):
+    owner_id, headers = register('owner')
+    assignee_id, _ = register('ana')
+    built = make_board(owner_id, lists=4, cards_per_list=10, assignee_ids=[assignee_id], comments_per_card=2)
+    with app.app_context():
+        due = datetime.utcnow() + timedelta(days=1)
+        db.session.execute(Card.__table__.update().values(due_date=due))
+        db.session.commit()
+    client.post('/filters', json={'name': 'mine', 'params': {'user_id': assignee_id}}, headers=headers)
+    client.post(f"/cards/{built['card_ids'][0]}/archive", headers=headers)
+    return headers, dict(built, owner_id=owner_id, assignee_id=assignee_id,
+                         list_id=built['list_ids'][-1], card_id=built['card_ids'][-1],
+                         due_start=datetime.utcnow().isoformat(timespec='seconds'))
+
+
+def query_plans(app, executed):
+    # [(sentencia, [líneas del plan])] de las SELECT capturadas
+    plans = []
+    with app.app_context():
+        connection = db.session.connection()
+        for statement, parameters in executed:
+            if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            plans.append((statement, [row[-1] for row in rows]))
+        db.session.rollback()
+    return plans
+
+
+def full_scans(plan):
+    # "SCAN cards" sin "USING ... INDEX": recorrido completo de una tabla caliente
+    return [line for line in plan
+            if (match := re.match(r'SCAN (\w+)', line)) and match.group(1) in HOT_TABLES and 'USING' not in line]
+
+
+@pytest.mark.parametrize('route, index', ROUTES)
+def test_route_uses_index(app, client, count_queries, board, route, index):
+    headers, ids = board
+    url = route.format(**ids)
+    with count_queries() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.json
+
+    plans = query_plans(app, counter.executed)
+    assert any(index in line for _, plan in plans for line in plan), f'{url} no usa {index}: {plans}'
+    for statement, plan in plans:
+        assert not full_scans(plan), f'{url} recorre una tabla entera: {plan}\n{statement}'
+
+
+def test_due_range_uses_due_date_index(app, client, count_queries, register, make_board):
+    owner_id, headers = register('owner')
+    built = make_board(owner_id, lists=4, cards_per_list=100)
+    with app.app_context():
+        cards = Card.__table__
+        db.session.execute(cards.update().values(due_date=datetime(2020, 1, 1)))
+        db.session.execute(cards.update().where(cards.c.id == built['card_ids'][5]).values(due_date=datetime(2030, 1, 1)))
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+    with count_queries() as counter:
+        response = client.get('/cards/filter?due_date_start=2029-01-01T00:00:00', headers=headers)
+    assert [card['id'] for card in response.json['items']] == [built['card_ids'][5]]
+
+    statement, plan = query_plans(app, counter.executed)[0]
+    assert any('ix_cards_due_date' in line for line in plan), plan
+    assert not [line for line in full_scans(plan) if line.startswith('SCAN cards')], plan
@@ -0,0 +1,52 @@
+import pytest
+
+
+def card_ids(response):
+    assert response.status_code == 200, response.json
+    return sorted(card['id'] for card in response.json['items'])
+
+
+@pytest.fixture
+def saved_filter(client):
+    """saved_filter(headers, params) guarda el filtro y devuelve una función que compara sus resultados con /cards/filter."""
+    def saved_filter(headers, params):
+        response = client.post('/filters', json={'name': 'mine', 'params': params}, headers=headers)
+        assert response.status_code == 201, response.json
+        filter_id = response.json['filter']['id']
+
+        def results():
+            materialized = card_ids(client.get(f'/filters/{filter_id}/cards', headers=headers))
+            assert materialized == card_ids(client.get('/cards/filter', query_string=params, headers=headers))
+            return materialized
+        return results
+    return saved_filter
+
+
+def test_saved_filter_follows_assign_and_unassign(client, register, make_board, saved_filter):
+    owner_id, headers = register('ana')
+    assignee_id, _ = register('bea')
+    board = make_board(owner_id, lists=1, cards_per_list=2)
+    card_id = board['card_ids'][0]
+    results = saved_filter(headers, {'user_id': assignee_id})
+    assert results() == []
+
+    assert client.post(f'/cards/{card_id}/assign', json={'user_id': assignee_id}, headers=headers).status_code == 201
+    assert results() == [card_id]
+
+    assert client.delete(f'/cards/{card_id}/unassign', json={'user_id': assignee_id}, headers=headers).status_code == 200
+    assert results() == []
+
+
+def test_saved_filter_follows_moves_between_lists(client, register, make_board, saved_filter):
+    owner_id, headers = register('ana')
+    board = make_board(owner_id, lists=2, cards_per_list=2)
+    source, target = board['list_ids']
+    card_id = board['card_ids'][0]
+    results = saved_filter(headers, {'list_id': target})
+    assert results() == sorted(board['card_ids'][2:])
+
+    assert client.put(f'/cards/{card_id}/move', json={'new_list_id': target}, headers=headers).status_code == 200
+    assert results() == sorted([card_id, *board['card_ids'][2:]])
+
+    assert client.put(f'/cards/{card_id}/move', json={'new_list_id': source}, headers=headers).status_code == 200
+    assert results() == sorted(board['card_ids'][2:])
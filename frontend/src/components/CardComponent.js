@@ -3,7 +3,7 @@ import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { format } from 'date-fns';
 
-function CardComponent({ card, onDeleteCard, onMoveCard, allLists }) {
+function CardComponent({ card, onDeleteCard, onArchiveCard, onMoveCard, allLists }) {
     const [selectedListId, setSelectedListId] = useState(card.list_id);
 
     useEffect(() => {
@@ -25,6 +25,7 @@ function CardComponent({ card, onDeleteCard, onMoveCard, allLists }) {
             </div>
             {card.description && <p className="card-description">{card.description}</p>}
             {card.due_date && <p className="card-due-date">Vence: {format(new Date(card.due_date), 'MMM dd, yyyy')}</p>}
+            {card.comment_count > 0 && <p className="card-comment-count">Comentarios: {card.comment_count}</p>}
 
             <div className="card-actions">
                 <select value={selectedListId} onChange={handleMoveChange} className="move-card-select">
@@ -35,6 +36,7 @@ function CardComponent({ card, onDeleteCard, onMoveCard, allLists }) {
                         </option>
                     ))}
                 </select>
+                <button onClick={() => onArchiveCard(card.id)} className="archive-card-button">Archivar</button>
             </div>
             <Link to={`/card/${card.id}`} className="card-details-link">Ver detalles</Link>
         </div>
@@ -1,33 +1,13 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState } from 'react';
 import { toast } from 'react-toastify';
 import axios from 'axios';
 import CardComponent from './CardComponent';
 
 // ListComponent ahora recibe 'allBoardLists' como una prop
-function ListComponent({ list, onDeleteList, fetchBoardData, allBoardLists }) { // <--- CAMBIO AQUÍ: Añadir allBoardLists
-    const [cards, setCards] = useState([]);
+// Las tarjetas llegan ya cargadas en 'list.cards' desde GET /boards/<id>/full
+function ListComponent({ list, onDeleteList, syncBoard, allBoardLists }) { // <--- CAMBIO AQUÍ: Añadir allBoardLists
+    const cards = list.cards || [];
     const [newCardTitle, setNewCardTitle] = useState('');
-    const [loadingCards, setLoadingCards] = useState(true);
-    const [errorCards, setErrorCards] = useState(null);
-
-    const fetchCards = useCallback(async () => {
-        setLoadingCards(true);
-        setErrorCards(null);
-        try {
-            const response = await axios.get(`http://localhost:5000/lists/${list.id}/cards`);
-            setCards(response.data);
-        } catch (err) {
-            console.error('Error al cargar tarjetas de la lista:', err.response?.data || err.message);
-            setErrorCards('Error al cargar tarjetas.');
-            toast.error('No se pudieron cargar las tarjetas de la lista.');
-        } finally {
-            setLoadingCards(false);
-        }
-    }, [list.id]);
-
-    useEffect(() => {
-        fetchCards();
-    }, [fetchCards]);
 
     const handleCreateCard = async (e) => {
         e.preventDefault();
@@ -41,7 +21,7 @@ function ListComponent({ list, onDeleteList, fetchBoardData, allBoardLists }) {
             });
             toast.success('Tarjeta creada con éxito!');
             setNewCardTitle('');
-            fetchCards(); // Volver a cargar las tarjetas
+            syncBoard(); // Traer solo los cambios del tablero desde la última revisión
         } catch (err) {
             console.error('Error al crear tarjeta:', err.response?.data || err.message);
             toast.error(err.response?.data?.msg || 'Error al crear la tarjeta.');
@@ -53,7 +33,7 @@ function ListComponent({ list, onDeleteList, fetchBoardData, allBoardLists }) {
             try {
                 await axios.delete(`http://localhost:5000/cards/${cardId}`);
                 toast.success('Tarjeta eliminada con éxito!');
-                fetchCards(); // Volver a cargar las tarjetas
+                syncBoard(); // Traer solo los cambios del tablero desde la última revisión
             } catch (err) {
                 console.error('Error al eliminar tarjeta:', err.response?.data || err.message);
                 toast.error(err.response?.data?.msg || 'Error al eliminar la tarjeta.');
@@ -61,6 +41,18 @@ function ListComponent({ list, onDeleteList, fetchBoardData, allBoardLists }) {
         }
     };
 
+    // Archivar la saca del tablero (con sus comentarios); se puede restaurar desde el backend
+    const handleArchiveCard = async (cardId) => {
+        try {
+            await axios.post(`http://localhost:5000/cards/${cardId}/archive`);
+            toast.success('Tarjeta archivada con éxito!');
+            syncBoard(); // El registro de cambios la trae como borrada
+        } catch (err) {
+            console.error('Error al archivar tarjeta:', err.response?.data || err.message);
+            toast.error(err.response?.data?.msg || 'Error al archivar la tarjeta.');
+        }
+    };
+
     // Función para mover una tarjeta (se pasará a CardComponent)
     const handleMoveCard = async (cardId, new_list_id) => {
         if (cardId === null || new_list_id === null) return;
@@ -70,9 +62,8 @@ function ListComponent({ list, onDeleteList, fetchBoardData, allBoardLists }) {
                 // new_order se podría añadir aquí, pero para simplificar, el backend la pone al final
             });
             toast.success('Tarjeta movida con éxito!');
-            // Al mover una tarjeta, necesitamos recargar todas las listas del tablero
-            // para que la tarjeta desaparezca de la lista anterior y aparezca en la nueva.
-            fetchBoardData(); // Recargar datos completos del tablero (listas y sus tarjetas)
+            // Los cambios traen la tarjeta con su nueva list_id: sale de la lista anterior y entra en la nueva
+            syncBoard();
         } catch (err) {
             console.error('Error al mover tarjeta:', err.response?.data || err.message);
             toast.error(err.response?.data?.msg || 'Error al mover la tarjeta.');
@@ -83,15 +74,11 @@ function ListComponent({ list, onDeleteList, fetchBoardData, allBoardLists }) {
     return (
         <div className="list-container">
             <div className="list-header">
-                <h3>{list.title}</h3>
+                <h3>{list.title} <span className="list-card-count">({list.card_count})</span></h3>
                 <button onClick={() => onDeleteList(list.id)} className="delete-button-small">X</button>
             </div>
             <div className="cards-list">
-                {loadingCards ? (
-                    <p>Cargando tarjetas...</p>
-                ) : errorCards ? (
-                    <p>{errorCards}</p>
-                ) : cards.length === 0 ? (
+                {cards.length === 0 ? (
                     <p className="no-cards-message">No hay tarjetas aquí.</p>
                 ) : (
                     cards.map(card => (
@@ -99,6 +86,7 @@ function ListComponent({ list, onDeleteList, fetchBoardData, allBoardLists }) {
                             key={card.id}
                             card={card}
                             onDeleteCard={handleDeleteCard}
+                            onArchiveCard={handleArchiveCard}
                             onMoveCard={handleMoveCard}
                             allLists={allBoardLists} // <--- CAMBIO CLAVE AQUÍ: Usar allBoardLists
                         />
@@ -41,7 +41,7 @@ function UserSearchInput({ onAssignUser, existingAssignedUsers }) {
         setLoadingSearch(true);
         try {
             const response = await axios.get(`http://localhost:5000/users/search?q=${query.trim()}`);
-            const filteredResults = response.data.filter(user =>
+            const filteredResults = response.data.items.filter(user =>
                 // Filtrar usuarios que ya están asignados a la tarjeta
                 !existingAssignedUsers.some(assigned => assigned.user_id === user.id)
             );
@@ -1,19 +1,21 @@
-import React, { useEffect, useState, useCallback } from 'react';
+import React, { useEffect, useState, useCallback, useRef } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { toast } from 'react-toastify';
 import axios from 'axios';
 import ListComponent from '../components/ListComponent';
+import { applyBoardChanges } from '../utils/boardSync';
 
 function BoardPage() {
     const { boardId } = useParams();
     const navigate = useNavigate();
-    const { isAuthenticated, logout } = useAuth();
+    const { isAuthenticated, token, logout } = useAuth();
     const [board, setBoard] = useState(null);
     const [lists, setLists] = useState([]);
     const [newListName, setNewListName] = useState('');
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const revisionRef = useRef(null); // Revisión del tablero que tenemos cargada
 
     useEffect(() => {
         if (!isAuthenticated) {
@@ -27,11 +29,12 @@ function BoardPage() {
         setLoading(true);
         setError(null);
         try {
-            const boardRes = await axios.get(`http://localhost:5000/boards/${boardId}`);
-            setBoard(boardRes.data);
-
-            const listsRes = await axios.get(`http://localhost:5000/boards/${boardId}/lists`);
-            setLists(listsRes.data);
+            // Una sola petición: tablero, listas, tarjetas, asignados y conteo de comentarios
+            const boardRes = await axios.get(`http://localhost:5000/boards/${boardId}/full`);
+            const { lists: boardLists, ...boardInfo } = boardRes.data;
+            setBoard(boardInfo);
+            setLists(boardLists);
+            revisionRef.current = boardInfo.revision;
 
         } catch (err) {
             console.error('Error al cargar datos del tablero:', err.response?.data || err.message);
@@ -45,10 +48,51 @@ function BoardPage() {
         }
     }, [isAuthenticated, boardId, navigate]);
 
+    // Tras una modificación: pedir solo lo cambiado desde nuestra revisión y aplicarlo.
+    // Si el servidor indica 'reset' (demasiados cambios) se recarga el tablero completo.
+    const syncBoard = useCallback(async () => {
+        if (revisionRef.current === null) {
+            return fetchBoardData();
+        }
+        try {
+            const { data } = await axios.get(`http://localhost:5000/boards/${boardId}/changes`, {
+                params: { since: revisionRef.current }
+            });
+            if (data.reset) {
+                return fetchBoardData();
+            }
+            if (data.upserts.board.length > 0) {
+                setBoard(data.upserts.board[0]);
+            }
+            setLists(currentLists => applyBoardChanges(currentLists, data));
+            revisionRef.current = data.revision;
+        } catch (err) {
+            console.error('Error al sincronizar el tablero:', err.response?.data || err.message);
+            fetchBoardData();
+        }
+    }, [boardId, fetchBoardData]);
+
     useEffect(() => {
         fetchBoardData();
     }, [fetchBoardData]);
 
+    // Cambios de otros usuarios en tiempo real (Server-Sent Events). Cada evento trae la
+    // nueva revisión del tablero; si es posterior a la nuestra se piden solo los cambios.
+    useEffect(() => {
+        if (!token || !boardId) return;
+        const source = new EventSource(`http://localhost:5000/boards/${boardId}/events?jwt=${encodeURIComponent(token)}`);
+        const onRevision = (event) => {
+            const { revision } = JSON.parse(event.data);
+            if (revisionRef.current !== null && revision > revisionRef.current) {
+                syncBoard();
+            }
+        };
+        source.addEventListener('hello', onRevision); // Al (re)conectar: recuperar lo ocurrido mientras tanto
+        source.addEventListener('change', onRevision);
+        source.addEventListener('reset', () => syncBoard()); // Se perdieron eventos; el navegador reconecta solo
+        return () => source.close();
+    }, [token, boardId, syncBoard]);
+
     const handleCreateList = async (e) => {
         e.preventDefault();
         if (!newListName.trim()) {
@@ -61,7 +105,7 @@ function BoardPage() {
             });
             toast.success('Lista creada con éxito!');
             setNewListName('');
-            fetchBoardData();
+            syncBoard();
         } catch (err) {
             console.error('Error al crear lista:', err.response?.data || err.message);
             toast.error(err.response?.data?.msg || 'Error al crear la lista.');
@@ -73,7 +117,7 @@ function BoardPage() {
             try {
                 await axios.delete(`http://localhost:5000/lists/${listId}`);
                 toast.success('Lista eliminada con éxito!');
-                fetchBoardData();
+                syncBoard();
             } catch (err) {
                 console.error('Error al eliminar lista:', err.response?.data || err.message);
                 toast.error(err.response?.data?.msg || 'Error al eliminar la lista.');
@@ -139,7 +183,7 @@ function BoardPage() {
                             key={list.id}
                             list={list}
                             onDeleteList={handleDeleteList}
-                            fetchBoardData={fetchBoardData}
+                            syncBoard={syncBoard}
                             allBoardLists={lists} // Corrected line! No more JS comments inside JSX.
                         />
                     ))
@@ -3,6 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { toast } from 'react-toastify';
 import axios from 'axios';
+import { fetchAllPages } from '../utils/pagination';
 import { format } from 'date-fns';
 import UserSearchInput from '../components/UserSearchInput'; // Lo crearemos ahora
 
@@ -43,8 +44,8 @@ function CardDetailsPage() {
             setEditDescription(cardRes.data.description || '');
             setEditDueDate(cardRes.data.due_date ? format(new Date(cardRes.data.due_date), 'yyyy-MM-dd') : ''); // Formato para input type="date"
 
-            const commentsRes = await axios.get(`http://localhost:5000/cards/${cardId}/comments`);
-            setComments(commentsRes.data);
+            const commentsData = await fetchAllPages(`http://localhost:5000/cards/${cardId}/comments`);
+            setComments(commentsData);
 
             const assignmentsRes = await axios.get(`http://localhost:5000/cards/${cardId}/assignments`);
             setAssignedUsers(assignmentsRes.data);
@@ -3,6 +3,7 @@ import { useAuth } from '../context/AuthContext';
 import { toast } from 'react-toastify';
 import { useNavigate, Link } from 'react-router-dom';
 import axios from 'axios';
+import { fetchAllPages } from '../utils/pagination';
 
 function DashboardPage() {
     const { isAuthenticated, logout, user } = useAuth(); // Obtener el objeto de usuario del contexto
@@ -23,8 +24,12 @@ function DashboardPage() {
     const [showOnlyAssignedCards, setShowOnlyAssignedCards] = useState(false);
 
     const [filteredCards, setFilteredCards] = useState([]);
+    const [filterParams, setFilterParams] = useState({});
+    const [filterUrl, setFilterUrl] = useState('http://localhost:5000/cards/filter'); // Filtro libre o filtro guardado
+    const [filterNextCursor, setFilterNextCursor] = useState(null); // Cursor de la siguiente página de resultados
     const [loadingFilteredCards, setLoadingFilteredCards] = useState(false);
     const [showFilteredResults, setShowFilteredResults] = useState(false);
+    const [savedFilters, setSavedFilters] = useState([]); // Filtros guardados en el servidor, con su número de tarjetas
 
 
     // Redirigir si no está autenticado
@@ -41,17 +46,8 @@ function DashboardPage() {
         setLoading(true);
         setError(null);
         try {
-            const response = await axios.get('http://localhost:5000/boards');
-            if (Array.isArray(response.data)) {
-                setBoards(response.data);
-            } else if (response.data && typeof response.data === 'object' && response.data.msg) {
-                setBoards([]);
-                toast.info(response.data.msg);
-            } else {
-                setBoards([]);
-                console.warn("API /boards returned unexpected data:", response.data);
-                toast.error('Formato de datos de tableros inesperado.');
-            }
+            const boardsData = await fetchAllPages('http://localhost:5000/boards');
+            setBoards(boardsData);
         } catch (err) {
             console.error('Error al cargar tableros:', err.response?.data || err.message);
             setError('Error al cargar tableros.');
@@ -68,6 +64,20 @@ function DashboardPage() {
         fetchBoards();
     }, [fetchBoards]);
 
+    // Filtros guardados: el servidor mantiene sus resultados al día, así que solo se piden
+    const fetchSavedFilters = useCallback(async () => {
+        if (!isAuthenticated) return;
+        try {
+            setSavedFilters(await fetchAllPages('http://localhost:5000/filters'));
+        } catch (err) {
+            console.error('Error al cargar filtros guardados:', err.response?.data || err.message);
+        }
+    }, [isAuthenticated]);
+
+    useEffect(() => {
+        fetchSavedFilters();
+    }, [fetchSavedFilters]);
+
     // Función para crear un nuevo tablero
     const handleCreateBoard = async (e) => {
         e.preventDefault();
@@ -104,31 +114,38 @@ function DashboardPage() {
         }
     };
 
-    // --- Función para aplicar filtros y obtener tarjetas ---
-    const handleFilterCards = useCallback(async (e) => {
-        e.preventDefault();
+    // --- Parámetros de /cards/filter según el formulario ---
+    const buildFilterParams = () => {
+        const params = {};
+        if (filterTitle.trim()) params.title_contains = filterTitle.trim();
+        if (filterBoardId) params.board_id = filterBoardId;
+
+        if (showOnlyMyCreatedCards && user && user.id) {
+            params.creator_id = user.id;
+        }
+        if (showOnlyAssignedCards && user && user.id) {
+            params.user_id = user.id;
+        }
+
+        if (filterDueDateStart) params.due_date_start = filterDueDateStart + 'T00:00:00';
+        if (filterDueDateEnd) params.due_date_end = filterDueDateEnd + 'T23:59:59';
+        return params;
+    };
+
+    // --- Pedir la primera página de un filtro (libre o guardado) ---
+    const loadFilteredCards = async (url, params) => {
         setLoadingFilteredCards(true);
         setFilteredCards([]);
         setShowFilteredResults(true);
 
         try {
-            const params = {};
-            if (filterTitle.trim()) params.title_contains = filterTitle.trim();
-            if (filterBoardId) params.board_id = filterBoardId;
-
-            if (showOnlyMyCreatedCards && user && user.id) {
-                params.creator_id = user.id;
-            }
-            if (showOnlyAssignedCards && user && user.id) {
-                params.user_id = user.id;
-            }
-
-            if (filterDueDateStart) params.due_date_start = filterDueDateStart + 'T00:00:00';
-            if (filterDueDateEnd) params.due_date_end = filterDueDateEnd + 'T23:59:59';
-
-            const response = await axios.get('http://localhost:5000/cards/filter', { params });
-            setFilteredCards(response.data);
-            if (response.data.length === 0) {
+            params = { ...params, view: 'summary' }; // Sin descripciones completas, solo un extracto
+            const response = await axios.get(url, { params });
+            setFilterUrl(url);
+            setFilterParams(params);
+            setFilteredCards(response.data.items);
+            setFilterNextCursor(response.data.next_cursor);
+            if (response.data.items.length === 0) {
                 toast.info('No se encontraron tarjetas con esos criterios de filtro.');
             }
         } catch (err) {
@@ -138,7 +155,55 @@ function DashboardPage() {
         } finally {
             setLoadingFilteredCards(false);
         }
-    }, [filterTitle, filterBoardId, showOnlyMyCreatedCards, showOnlyAssignedCards, user, filterDueDateStart, filterDueDateEnd]);
+    };
+
+    // --- Función para aplicar filtros y obtener tarjetas ---
+    const handleFilterCards = (e) => {
+        e.preventDefault();
+        loadFilteredCards('http://localhost:5000/cards/filter', buildFilterParams());
+    };
+
+    // --- Guardar los filtros actuales con un nombre ---
+    const handleSaveFilter = async () => {
+        const name = window.prompt('Nombre del filtro:');
+        if (!name || !name.trim()) return;
+        try {
+            await axios.post('http://localhost:5000/filters', { name: name.trim(), params: buildFilterParams() });
+            toast.success('Filtro guardado con éxito!');
+            fetchSavedFilters();
+        } catch (err) {
+            console.error('Error al guardar filtro:', err.response?.data || err.message);
+            toast.error(err.response?.data?.msg || 'Error al guardar el filtro.');
+        }
+    };
+
+    const handleDeleteSavedFilter = async (filterId) => {
+        try {
+            await axios.delete(`http://localhost:5000/filters/${filterId}`);
+            fetchSavedFilters();
+        } catch (err) {
+            console.error('Error al eliminar filtro:', err.response?.data || err.message);
+            toast.error(err.response?.data?.msg || 'Error al eliminar el filtro.');
+        }
+    };
+
+    // --- Cargar la siguiente página de resultados del filtro ---
+    const handleLoadMoreFilteredCards = async () => {
+        if (!filterNextCursor) return;
+        setLoadingFilteredCards(true);
+        try {
+            const response = await axios.get(filterUrl, {
+                params: { ...filterParams, cursor: filterNextCursor }
+            });
+            setFilteredCards(prevCards => prevCards.concat(response.data.items));
+            setFilterNextCursor(response.data.next_cursor);
+        } catch (err) {
+            console.error('Error al cargar más tarjetas:', err.response?.data || err.message);
+            toast.error(err.response?.data?.msg || 'Error al cargar más tarjetas.');
+        } finally {
+            setLoadingFilteredCards(false);
+        }
+    };
 
 
     if (loading) {
@@ -230,6 +295,10 @@ function DashboardPage() {
                                 <Link to={`/board/${board.id}`}>
                                     <h3>{board.title}</h3>
                                     <p>{board.description}</p>
+                                    <p className="board-counts">
+                                        Tarjetas: {board.card_count}
+                                        {board.overdue_count > 0 && <span className="board-overdue"> · Vencidas: {board.overdue_count}</span>}
+                                    </p>
                                 </Link>
                                 <div className="board-actions">
                                     <button onClick={() => navigate(`/board/${board.id}/edit`)} className="edit-button">Editar</button>
@@ -298,7 +367,22 @@ function DashboardPage() {
                             onChange={(e) => setFilterDueDateEnd(e.target.value)}
                         />
                         <button type="submit">Aplicar Filtros</button>
+                        <button type="button" onClick={handleSaveFilter}>Guardar Filtro</button>
                     </form>
+
+                    {savedFilters.length > 0 && (
+                        <div className="saved-filters">
+                            <h4>Filtros Guardados</h4>
+                            {savedFilters.map(savedFilter => (
+                                <span key={savedFilter.id} className="saved-filter">
+                                    <button onClick={() => loadFilteredCards(`http://localhost:5000/filters/${savedFilter.id}/cards`, {})}>
+                                        {savedFilter.name} ({savedFilter.card_count})
+                                    </button>
+                                    <button onClick={() => handleDeleteSavedFilter(savedFilter.id)} title="Eliminar filtro">×</button>
+                                </span>
+                            ))}
+                        </div>
+                    )}
                 </div>
 
                 {/* --- RESULTADOS DE FILTRO --- */}
@@ -315,7 +399,10 @@ function DashboardPage() {
                                     <div key={card.id} className="board-card card-filtered-item">
                                         <Link to={`/card/${card.id}`}>
                                             <h4>{card.title}</h4>
-                                            <p className="card-description">{card.description}</p>
+                                            <p className="card-description">
+                                                {card.description_preview}
+                                                {card.description_length > card.description_preview?.length && '…'}
+                                            </p>
                                             {card.due_date && <p className="card-due-date">Vence: {new Date(card.due_date).toLocaleDateString()}</p>}
                                             {/* Mostrar usuarios asignados */}
                                             {card.assigned_users && card.assigned_users.length > 0 && (
@@ -331,6 +418,9 @@ function DashboardPage() {
                                 ))}
                             </div>
                         )}
+                        {filterNextCursor && !loadingFilteredCards && (
+                            <button onClick={handleLoadMoreFilteredCards} className="load-more-button">Cargar más</button>
+                        )}
                     </div>
                 )}
             </> {/* <-- Cierre del fragmento JSX */}
@@ -0,0 +1,28 @@
+// Aplica la respuesta de GET /boards/<id>/changes sobre las listas cargadas con /boards/<id>/full.
+// Devuelve un nuevo array de listas (cada una con sus 'cards'), ordenado como en el servidor.
+const byOrder = (a, b) => a.order - b.order || a.id - b.id;
+
+export function applyBoardChanges(lists, { upserts, deletes }) {
+    const deletedLists = new Set(deletes.list);
+    const changedCards = new Set([...deletes.card, ...upserts.card.map(card => card.id)]);
+
+    // Listas: quitar las borradas, actualizar las existentes (conservando sus tarjetas) y añadir las nuevas
+    const listsById = new Map(
+        lists.filter(list => !deletedLists.has(list.id)).map(list => [list.id, {
+            ...list,
+            cards: list.cards.filter(card => !changedCards.has(card.id))
+        }])
+    );
+    upserts.list.forEach(list => {
+        listsById.set(list.id, { ...list, cards: listsById.get(list.id)?.cards || [] });
+    });
+
+    // Tarjetas: cada tarjeta modificada se vuelve a colocar en su lista actual
+    upserts.card.forEach(card => {
+        listsById.get(card.list_id)?.cards.push(card);
+    });
+
+    return [...listsById.values()]
+        .map(list => ({ ...list, cards: list.cards.sort(byOrder) }))
+        .sort(byOrder);
+}
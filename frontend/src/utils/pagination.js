@@ -0,0 +1,14 @@
+import axios from 'axios';
+
+// Los listados del backend devuelven páginas { items, next_cursor }.
+// fetchAllPages recorre todas las páginas siguiendo el cursor y devuelve los items concatenados.
+export async function fetchAllPages(url, params = {}) {
+    let items = [];
+    let cursor = null;
+    do {
+        const response = await axios.get(url, { params: cursor ? { ...params, cursor } : params });
+        items = items.concat(response.data.items);
+        cursor = response.data.next_cursor;
+    } while (cursor);
+    return items;
+}